@@ -1,11 +1,24 @@
 import os
+import sys
 import csv
-import json
-import re
+import argparse
+import functools
 from datetime import datetime, timedelta
-import pandas as pd
-import requests
 import shutil
+from device_registry import load_device_registry
+from log_scanner import scan_folder, split_log_kind, LOG_EXTENSIONS
+from filename_parser import resolve_pc_name, tally_unparseable, format_tally
+from log_reader import read_log_document
+from log_ingest import ingest_logs, read_log_summary, DEFAULT_WORKERS
+from log_stream import count_extensions_streaming
+from log_delta import load_log_state
+from run_report import RunReport, span, count
+
+# pandas を使う実行履歴・実行サマリーは、使う関数の中で読み込む（ExtensionInventory など一覧だけを使う場合の起動を速くする）
+
+# Slack通知は収集ツールと同じ実装（distribute/slack_notifier.py）を使う
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "distribute"))
+from slack_notifier import SlackNotifier
 
 # 設定
 DEVICE_REGISTRY = "端末台帳.csv"
@@ -13,242 +26,247 @@ LOG_FOLDER = r"\\server\logs"
 FACE_PHOTO_FOLDER = r"\\server\face_photos"
 OUTPUT_CSV = "実行突合結果.csv"
 HISTORY_CSV = "実行履歴.csv"
+HISTORY_DB = "実行履歴.sqlite3"
+HISTORY_BACKEND = "sqlite"  # "sqlite" または "csv"
 EXECUTION_SUMMARY = "実行サマリー.csv"
 SLACK_WEBHOOK_URL = "https://hooks.slack.com/services/XXXXXXXXX/XXXXXXXXX/XXXXXXXXXXXXXXXXXXXXXXXX"  # ←必ず差し替え
-
-# ログファイル名のパターン: PC名_ユーザー名_日時.json
-LOG_PATTERN = re.compile(r"(.+)_(.+)_(\d{4}-\d{2}-\d{2})_(.+)\.json")
-PHOTO_PATTERN = re.compile(r"(.+)_(.+)_(\d{8})_(\d{6})\.jpg")
+NOTIFY_NEW_SUBMISSIONS = True  # 前回以降に届いたブラウザ情報を1通にまとめて通知
+RUN_REPORT = "実行記録_突合.json"  # 段階ごとの所要時間・件数（実行サマリーと同じフォルダ）。None で記録しない
 
 def load_registry():
-    """台帳からPC名と使用者を読み込む"""
+    """台帳からPC名と使用者を読み込む（台帳が更新されていなければキャッシュから復元）"""
     if not os.path.exists(DEVICE_REGISTRY):
         print(f"[エラー] 端末台帳が見つかりません: {DEVICE_REGISTRY}")
         return {}
     
-    registry = {}
     try:
-        with open(DEVICE_REGISTRY, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                registry[row["PC名"]] = {
-                    "使用者": row["使用者"],
-                    "OS": row.get("OS", ""),
-                    "取得日時": row.get("取得日時", "")
-                }
-        return registry
+        return load_device_registry(DEVICE_REGISTRY)
     except Exception as e:
         print(f"[エラー] 端末台帳の読み込みに失敗しました: {e}")
+        count("errors")
         return {}
 
-def parse_date_from_filename(filename):
-    """ファイル名から日付を抽出"""
-    # ブラウザログファイルからの日付抽出
-    log_match = LOG_PATTERN.match(filename)
-    if log_match:
-        date_str = log_match.group(3)
-        time_str = log_match.group(4).replace("_", " ")
-        try:
-            return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H%M%S")
-        except:
-            pass
-    
-    # 顔写真ファイルからの日付抽出
-    photo_match = PHOTO_PATTERN.match(filename)
-    if photo_match:
-        date_str = photo_match.group(3)
-        time_str = photo_match.group(4)
-        try:
-            return datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-        except:
-            pass
-    
-    return None
+def list_executed_files(folder, file_extension, since=None, pc_names=None):
+    """指定フォルダから実行結果ファイルを取得（PCごとに最新の1件）
 
-def list_executed_files(folder, file_extension):
-    """指定フォルダから実行結果ファイルを取得"""
+    期間別サブフォルダ（YYYY-MM / YYYY-MM-DD）内のファイルも対象とする。
+    since を指定した場合は、その日時以降のファイルを含むサブフォルダだけを一覧する。
+    pc_names（台帳のPC名）を渡すと、アンダースコアを含むPC名も台帳どおりに分ける。
+    """
     if not os.path.exists(folder):
         print(f"[エラー] フォルダが見つかりません: {folder}")
         return {}
     
+    underscored = {name for name in pc_names if "_" in name} if pc_names else None
     files = {}
+    unparsed = []
     try:
-        for f in os.listdir(folder):
-            if f.endswith(file_extension):
-                parts = f.split("_")
-                if len(parts) >= 2:
-                    pc_name = parts[0]
-                    user_name = parts[1]
-                    timestamp = parse_date_from_filename(f)
-                    
-                    if pc_name not in files or (timestamp and (pc_name not in files or timestamp > files[pc_name]["timestamp"])):
-                        files[pc_name] = {
-                            "user": user_name,
-                            "filename": f,
-                            "timestamp": timestamp
-                        }
+        for entry in scan_folder(folder, file_extension, since=since):
+            if not entry["pc_name"]:
+                unparsed.append(entry["filename"])
+                continue
+            pc_name = entry["pc_name"]
+            user_name = entry["user_name"]
+            if underscored:
+                pc_name, user_name = resolve_pc_name(pc_name, user_name, underscored)
+            timestamp = entry["timestamp"]
+            
+            current = files.get(pc_name)
+            if current is None or (timestamp and (current["timestamp"] is None or timestamp > current["timestamp"])):
+                files[pc_name] = {
+                    "user": user_name,
+                    "filename": entry["filename"],
+                    "path": entry["path"],
+                    "timestamp": timestamp
+                }
+        if unparsed:
+            print(f"[スキップ] ファイル名を解析できないファイル {len(unparsed)}件（{format_tally(tally_unparseable(unparsed))}）")
+            count("unparsed", len(unparsed))
         return files
     except Exception as e:
         print(f"[エラー] ファイル一覧の取得に失敗しました: {e}")
+        count("errors")
         return {}
 
-def check_extension_count(log_file_path):
-    """JSONファイルから拡張機能の数を取得"""
+def check_extension_count(log_file_path, streaming=False):
+    """JSONファイルから拡張機能の数を取得（集計サマリーがあればそちらを使用）
+
+    streaming=True の場合はファイル全体を展開せずに順に読みながら数える。
+    差分・ハートビートのログは同じPCの過去のログから全件を復元して数える。
+    """
+    summary = read_log_summary(log_file_path)
+    if summary is not None:
+        return summary["extension_count"]
+    
     try:
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if split_log_kind(log_file_path)[1] != "full":
+            # 差分・ハートビートは過去のログから全件を復元
+            data = load_log_state(log_file_path)
+        elif streaming:
+            return count_extensions_streaming(log_file_path)
+        else:
+            data = read_log_document(log_file_path)
         
         extension_count = sum(len(profile.get("extensions", [])) for profile in data)
         return extension_count
     except Exception as e:
         print(f"[エラー] 拡張機能数の確認に失敗しました: {e}")
+        count("errors")
         return 0
 
+def get_history_store(read_only=False):
+    """設定に応じた実行履歴バックエンドを開く（read_only=True の場合はデータベースを作成しない）"""
+    from execution_history import open_history_store
+    return open_history_store(HISTORY_BACKEND, HISTORY_CSV, HISTORY_DB, read_only)
+
 def get_execution_history():
     """実行履歴を取得"""
-    if os.path.exists(HISTORY_CSV):
-        try:
-            return pd.read_csv(HISTORY_CSV, encoding='utf-8')
-        except Exception as e:
-            print(f"[エラー] 実行履歴の読み込みに失敗しました: {e}")
-    
-    # 履歴がなければ新規作成
-    return pd.DataFrame(columns=["PC名", "使用者", "ブラウザ情報実行日時", "顔写真実行日時", "拡張機能数", "最終確認日"])
+    store = get_history_store(read_only=True)
+    try:
+        return store.latest_per_pc()
+    finally:
+        store.close()
 
 def update_execution_history(pc_name, user_name, browser_info_time, face_photo_time, extension_count):
-    """実行履歴を更新"""
-    history_df = get_execution_history()
-    
-    # 現在の日時
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # 既存のエントリを検索
-    pc_idx = history_df[history_df["PC名"] == pc_name].index
-    
-    if len(pc_idx) > 0:
-        # 既存エントリの更新
-        if browser_info_time:
-            history_df.at[pc_idx[0], "ブラウザ情報実行日時"] = browser_info_time
-            history_df.at[pc_idx[0], "拡張機能数"] = extension_count
-        if face_photo_time:
-            history_df.at[pc_idx[0], "顔写真実行日時"] = face_photo_time
-        history_df.at[pc_idx[0], "最終確認日"] = now
-    else:
-        # 新規エントリの追加
-        new_row = {
-            "PC名": pc_name,
-            "使用者": user_name,
-            "ブラウザ情報実行日時": browser_info_time if browser_info_time else "",
-            "顔写真実行日時": face_photo_time if face_photo_time else "",
-            "拡張機能数": extension_count,
-            "最終確認日": now
-        }
-        history_df = pd.concat([history_df, pd.DataFrame([new_row])], ignore_index=True)
-    
-    # 履歴を保存
-    history_df.to_csv(HISTORY_CSV, index=False, encoding='utf-8')
-    return history_df
+    """実行履歴を更新（1台分。複数台の場合は HistoryBatch を使用）"""
+    from execution_history import HistoryBatch
+    store = get_history_store()
+    try:
+        batch = HistoryBatch(store)
+        batch.add(pc_name, user_name, browser_info_time, face_photo_time, extension_count)
+        history_df = batch.commit()
+        store.export_csv()
+        return history_df
+    finally:
+        store.close()
 
-def create_execution_summary(history_df, registry):
+def format_status(times, now):
+    """実行日時の列から提出状況（✅ / 要更新(N日経過) / 未提出）の列を作成"""
+    days = (now - times).dt.days
+    status = "要更新(" + days.fillna(0).astype("int64").astype(str) + "日経過)"
+    status = status.where(~(days <= 30), "✅")
+    return status.where(times.notna(), "未提出")
+
+def create_execution_summary(history_df, registry, now=None):
     """実行状況のサマリーを作成"""
-    # 現在の日時
-    now = datetime.now()
+    import pandas as pd
     
-    # サマリー用のデータフレームを作成
-    summary_data = []
+    # 現在の日時
+    if now is None:
+        now = datetime.now()
     
-    for pc_name, info in registry.items():
-        user_name = info["使用者"]
-        
-        # 履歴から該当PCの情報を取得
-        pc_history = history_df[history_df["PC名"] == pc_name]
-        
-        if len(pc_history) > 0:
-            browser_time_str = pc_history.iloc[0]["ブラウザ情報実行日時"]
-            face_time_str = pc_history.iloc[0]["顔写真実行日時"]
-            extension_count = pc_history.iloc[0]["拡張機能数"]
-            
-            # 日時文字列をdatetimeオブジェクトに変換
-            browser_time = None
-            face_time = None
-            
-            if browser_time_str:
-                try:
-                    browser_time = datetime.strptime(browser_time_str, "%Y-%m-%d %H:%M:%S")
-                except:
-                    pass
-            
-            if face_time_str:
-                try:
-                    face_time = datetime.strptime(face_time_str, "%Y-%m-%d %H:%M:%S")
-                except:
-                    pass
-            
-            # 最新の実行から30日経過したかどうかを確認
-            browser_status = "未提出"
-            if browser_time:
-                days_since_browser = (now - browser_time).days
-                if days_since_browser <= 30:
-                    browser_status = "✅"
-                else:
-                    browser_status = f"要更新({days_since_browser}日経過)"
-            
-            face_status = "未提出"
-            if face_time:
-                days_since_face = (now - face_time).days
-                if days_since_face <= 30:
-                    face_status = "✅"
-                else:
-                    face_status = f"要更新({days_since_face}日経過)"
-            
-            # 提出状況のサマリー
-            status_summary = "未完了"
-            if browser_status == "✅" and face_status == "✅":
-                status_summary = "完了"
-            elif browser_status == "✅" or face_status == "✅":
-                status_summary = "一部完了"
-            
-            summary_data.append({
-                "PC名": pc_name,
-                "使用者": user_name,
-                "OS": info.get("OS", ""),
-                "ブラウザ情報状況": browser_status,
-                "顔写真状況": face_status,
-                "拡張機能数": extension_count if extension_count else 0,
-                "ブラウザ情報実行日時": browser_time_str,
-                "顔写真実行日時": face_time_str,
-                "提出状況": status_summary
-            })
-        else:
-            # 履歴に存在しない場合
-            summary_data.append({
-                "PC名": pc_name,
-                "使用者": user_name,
-                "OS": info.get("OS", ""),
-                "ブラウザ情報状況": "未提出",
-                "顔写真状況": "未提出",
-                "拡張機能数": 0,
-                "ブラウザ情報実行日時": "",
-                "顔写真実行日時": "",
-                "提出状況": "未完了"
-            })
+    if not registry:
+        summary_df = pd.DataFrame([])
+        summary_df.to_csv(EXECUTION_SUMMARY, index=False, encoding='utf-8')
+        return summary_df
+    
+    # 台帳の順に、履歴の該当PC（同一PC名が複数ある場合は先頭行）の位置を求める
+    pc_names = list(registry)
+    first_rows = history_df[~history_df["PC名"].duplicated(keep="first")]
+    positions = pd.Index(first_rows["PC名"]).get_indexer(pc_names)
+    found = positions >= 0
+    
+    def pick(column, default):
+        values = first_rows[column].to_numpy(dtype=object)
+        values = values[positions.clip(min=0)] if len(values) else [None] * len(pc_names)
+        return pd.Series(values, dtype=object).where(found, default)
+    
+    browser_time_str = pick("ブラウザ情報実行日時", "").infer_objects()
+    face_time_str = pick("顔写真実行日時", "").infer_objects()
+    # 拡張機能数が空（None・空文字・0）の場合は0（列の型は値から従来どおり決まる）
+    extension_count = pick("拡張機能数", 0).map(lambda v: v if v else 0).infer_objects()
+    
+    # 日時文字列を列ごとに変換し、最新の実行から30日経過したかどうかを確認
+    browser_time = pd.to_datetime(browser_time_str, format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    face_time = pd.to_datetime(face_time_str, format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    browser_status = format_status(browser_time, now)
+    face_status = format_status(face_time, now)
+    
+    # 提出状況のサマリー
+    browser_ok = browser_status == "✅"
+    face_ok = face_status == "✅"
+    status_summary = pd.Series("未完了", index=browser_status.index)
+    status_summary = status_summary.mask(browser_ok | face_ok, "一部完了").mask(browser_ok & face_ok, "完了")
     
     # サマリーデータフレームを作成
-    summary_df = pd.DataFrame(summary_data)
+    summary_df = pd.DataFrame({
+        "PC名": pc_names,
+        "使用者": [info["使用者"] for info in registry.values()],
+        "OS": [info.get("OS", "") for info in registry.values()],
+        "ブラウザ情報状況": browser_status,
+        "顔写真状況": face_status,
+        "拡張機能数": extension_count,
+        "ブラウザ情報実行日時": browser_time_str,
+        "顔写真実行日時": face_time_str,
+        "提出状況": status_summary
+    })
     
     # サマリーを保存
     summary_df.to_csv(EXECUTION_SUMMARY, index=False, encoding='utf-8')
     return summary_df
 
+def update_history(registry, browser_logs, face_photos, extension_counts, notifier=None):
+    """台帳の全端末について最新の提出状況を実行履歴に反映し、更新後の履歴を返す
+
+    notifier を渡すと、前回から変わったブラウザ情報を新規提出として send() する。
+    """
+    from execution_history import HistoryBatch
+    history_store = get_history_store()
+    history_batch = HistoryBatch(history_store)
+    
+    previous_browser_times = {}
+    if notifier is not None:
+        previous_history = history_store.latest_per_pc()
+        previous_browser_times = dict(zip(previous_history["PC名"], previous_history["ブラウザ情報実行日時"]))
+    
+    for pc_name, pc_info in registry.items():
+        user_name = pc_info["使用者"]
+        
+        # ブラウザ情報の確認
+        browser_time = None
+        extension_count = 0
+        if pc_name in browser_logs:
+            browser_info = browser_logs[pc_name]
+            browser_time = browser_info["timestamp"].strftime("%Y-%m-%d %H:%M:%S") if browser_info["timestamp"] else None
+            extension_count = extension_counts.get(pc_name, 0)
+            if notifier is not None and browser_time and browser_time != previous_browser_times.get(pc_name):
+                notifier.send(f"・{pc_name}（{user_name}）拡張機能 {extension_count}件")
+        
+        # 顔写真の確認
+        face_time = None
+        if pc_name in face_photos:
+            face_info = face_photos[pc_name]
+            face_time = face_info["timestamp"].strftime("%Y-%m-%d %H:%M:%S") if face_info["timestamp"] else None
+        
+        # 更新内容を蓄積（書き込みはまとめて1回）
+        history_batch.add(pc_name, user_name, browser_time, face_time, extension_count)
+    
+    updated_history = history_batch.commit()
+    count("history_rows", len(registry))
+    # 既存の利用者向けに従来形式のCSVも出力
+    history_store.export_csv()
+    history_store.close()
+    return updated_history
+
+def write_comparison_csv(summary_df):
+    """従来形式の実行突合結果CSVを出力"""
+    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PC名", "使用者", "ブラウザ情報", "顔写真", "提出状況"])
+        
+        for _, row in summary_df.iterrows():
+            writer.writerow([
+                row["PC名"],
+                row["使用者"],
+                row["ブラウザ情報状況"],
+                row["顔写真状況"],
+                row["提出状況"]
+            ])
+
 def post_to_slack(message):
     """Slackにメッセージを送信"""
-    payload = {"text": message}
-    try:
-        res = requests.post(SLACK_WEBHOOK_URL, json=payload)
-        if res.status_code != 200:
-            print(f"[Slack通知エラー] ステータスコード: {res.status_code}")
-    except Exception as e:
-        print(f"[Slack通知失敗] {e}")
+    with SlackNotifier(SLACK_WEBHOOK_URL) as notifier:
+        return notifier.post(message)
 
 def create_backup_folder():
     """バックアップフォルダを作成"""
@@ -306,115 +324,148 @@ def analyze_summary(summary_df):
     
     return analysis
 
-def main():
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="端末台帳とブラウザ情報・顔写真の提出状況を突合します。")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"ログファイルを同時に読み込む数（既定: {DEFAULT_WORKERS}）")
+    parser.add_argument("--stream", action="store_true",
+                        help="ログファイルを全体展開せずに順に読み込む（巨大なログでのメモリ使用量を抑える）")
+    parser.add_argument("--days", type=int, default=None,
+                        help="直近の指定日数分の期間別サブフォルダだけを確認する（それより前の提出は実行履歴の値を使う）")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile の結果を実行記録に含める（.prof ファイルも保存）")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="処理段階ごとのピークメモリを実行記録に含める（処理は遅くなる）")
+    return parser.parse_args(argv)
+
+def get_run_report_path():
+    """実行記録の保存先（実行サマリーと同じフォルダ）"""
+    return os.path.join(os.path.dirname(EXECUTION_SUMMARY), RUN_REPORT)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not RUN_REPORT:
+        check_submissions(args)
+        return
+    
+    report = RunReport("CompareDeviceLogs", args.profile, args.trace_memory).start()
+    status = "error"
+    try:
+        status = check_submissions(args)
+    finally:
+        report.finish(get_run_report_path(), status)
+
+def flush_new_submissions(notifier):
+    """ためておいた新規提出の通知を1通にまとめて送信"""
+    new_submissions = len(notifier.pending)
+    if new_submissions:
+        notifier.flush(header=f"📥 新規提出 {new_submissions}台")
+
+def check_submissions(args):
+    """台帳と提出状況を突合し、実行履歴・実行サマリーの更新と通知を行う（中断した場合は "aborted"）"""
     print("====== ブラウザ情報収集 実行状況確認ツール ======")
     print(f"実行日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 端末台帳の読み込み
     print("\n[処理開始] 端末台帳の読み込み...")
-    registry = load_registry()
+    with span("registry_load"):
+        registry = load_registry()
     if not registry:
         print("[処理中断] 端末台帳の読み込みに失敗しました。")
-        return
+        return "aborted"
     print(f"[処理完了] {len(registry)}台の端末情報を読み込みました。")
     
+    # 確認する期間（指定がなければすべて）
+    since = None
+    if args.days is not None:
+        since = (datetime.now() - timedelta(days=args.days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        print(f"\n[確認期間] {since.strftime('%Y-%m-%d')} 以降の提出を確認します。")
+    
     # ブラウザ情報ファイルの確認
     print("\n[処理開始] ブラウザ情報ファイルの確認...")
-    browser_logs = list_executed_files(LOG_FOLDER, ".json")
+    with span("listing_logs"):
+        browser_logs = list_executed_files(LOG_FOLDER, LOG_EXTENSIONS, since, registry.keys())
     print(f"[処理完了] {len(browser_logs)}件のブラウザ情報ファイルを確認しました。")
     
     # 顔写真ファイルの確認
     print("\n[処理開始] 顔写真ファイルの確認...")
-    face_photos = list_executed_files(FACE_PHOTO_FOLDER, ".jpg")
+    with span("listing_photos"):
+        face_photos = list_executed_files(FACE_PHOTO_FOLDER, ".jpg", since, registry.keys())
     print(f"[処理完了] {len(face_photos)}件の顔写真ファイルを確認しました。")
     
+    # 台帳にあるPCの最新ログを並列に読み込み
+    print(f"\n[処理開始] ブラウザ情報ファイルの読み込み（並列数: {args.workers}）...")
+    log_paths = {
+        pc_name: browser_logs[pc_name]["path"]
+        for pc_name in registry if pc_name in browser_logs
+    }
+    reader = functools.partial(check_extension_count, streaming=args.stream)
+    with span("ingestion"):
+        extension_counts = ingest_logs(log_paths, reader, args.workers)
+    print(f"[処理完了] {len(extension_counts)}件のブラウザ情報ファイルを読み込みました。")
+    
     # 実行履歴の更新
     print("\n[処理開始] 実行履歴の更新...")
-    updated_history = get_execution_history()
-    
-    for pc_name, pc_info in registry.items():
-        user_name = pc_info["使用者"]
-        
-        # ブラウザ情報の確認
-        browser_time = None
-        extension_count = 0
-        if pc_name in browser_logs:
-            browser_info = browser_logs[pc_name]
-            browser_time = browser_info["timestamp"].strftime("%Y-%m-%d %H:%M:%S") if browser_info["timestamp"] else None
-            
-            # 拡張機能数の確認
-            log_path = os.path.join(LOG_FOLDER, browser_info["filename"])
-            extension_count = check_extension_count(log_path)
-        
-        # 顔写真の確認
-        face_time = None
-        if pc_name in face_photos:
-            face_info = face_photos[pc_name]
-            face_time = face_info["timestamp"].strftime("%Y-%m-%d %H:%M:%S") if face_info["timestamp"] else None
-        
-        # 履歴を更新
-        updated_history = update_execution_history(pc_name, user_name, browser_time, face_time, extension_count)
-    
-    print(f"[処理完了] 実行履歴を更新しました。")
-    
-    # 実行サマリーの作成
-    print("\n[処理開始] 実行サマリーの作成...")
-    summary_df = create_execution_summary(updated_history, registry)
-    print(f"[処理完了] 実行サマリーを作成しました: {EXECUTION_SUMMARY}")
-    
-    # 従来の出力CSVも作成（互換性のため）
-    print("\n[処理開始] 実行突合結果の作成...")
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["PC名", "使用者", "ブラウザ情報", "顔写真", "提出状況"])
-        
-        for _, row in summary_df.iterrows():
-            writer.writerow([
-                row["PC名"],
-                row["使用者"],
-                row["ブラウザ情報状況"],
-                row["顔写真状況"],
-                row["提出状況"]
-            ])
-    
-    print(f"[処理完了] 実行突合結果を作成しました: {OUTPUT_CSV}")
-    
-    # 実行サマリーの分析
-    analysis = analyze_summary(summary_df)
-    
-    # 分析結果の表示
-    print("\n====== 実行状況サマリー ======")
-    print(f"総端末数: {analysis['total']}台")
-    print(f"提出完了: {analysis['completed']}台 ({analysis['completion_rate']:.1f}%)")
-    print(f"一部提出: {analysis['partial']}台")
-    print(f"未提出: {analysis['not_completed']}台")
-    
-    # Slack通知
-    if analysis['not_completed'] > 0:
-        not_submitted_list = "\n".join([f"・{pc}" for pc in analysis['not_submitted'][:10]])
-        if len(analysis['not_submitted']) > 10:
-            not_submitted_list += f"\n（他 {len(analysis['not_submitted']) - 10}台）"
-        
-        slack_message = (
-            f"🔍 ブラウザ情報収集 実行状況レポート\n"
-            f"📊 提出状況: {analysis['completed']}台/{analysis['total']}台 ({analysis['completion_rate']:.1f}%)\n"
-            f"⚠️ 未提出/一部提出: {analysis['not_completed'] + analysis['partial']}台\n\n"
-            f"📋 未提出PC一覧（最大10台表示）:\n{not_submitted_list}"
-        )
-        
-        post_to_slack(slack_message)
-        print("\n[完了] Slackに通知を送信しました。")
-    else:
-        slack_message = (
-            f"✅ ブラウザ情報収集 実行状況レポート\n"
-            f"📊 提出状況: {analysis['completed']}台/{analysis['total']}台 (100%)\n"
-            f"🎉 すべての端末で提出が完了しています！"
-        )
+    # 新規提出の通知は端末ごとに送らず、まとめて1通にする
+    notifier = SlackNotifier(SLACK_WEBHOOK_URL, batch=True)
+    try:
+        with span("history_update"):
+            updated_history = update_history(registry, browser_logs, face_photos, extension_counts,
+                                             notifier if NOTIFY_NEW_SUBMISSIONS else None)
+        print(f"[処理完了] 実行履歴を更新しました。")
+    
+        # 実行サマリーの作成
+        print("\n[処理開始] 実行サマリーの作成...")
+        with span("summary"):
+            summary_df = create_execution_summary(updated_history, registry)
+        print(f"[処理完了] 実行サマリーを作成しました: {EXECUTION_SUMMARY}")
+    
+        # 従来の出力CSVも作成（互換性のため）
+        print("\n[処理開始] 実行突合結果の作成...")
+        with span("comparison_csv"):
+            write_comparison_csv(summary_df)
+        print(f"[処理完了] 実行突合結果を作成しました: {OUTPUT_CSV}")
+    
+        # 実行サマリーの分析
+        analysis = analyze_summary(summary_df)
+    
+        # 分析結果の表示
+        print("\n====== 実行状況サマリー ======")
+        print(f"総端末数: {analysis['total']}台")
+        print(f"提出完了: {analysis['completed']}台 ({analysis['completion_rate']:.1f}%)")
+        print(f"一部提出: {analysis['partial']}台")
+        print(f"未提出: {analysis['not_completed']}台")
+    
+        # Slack通知
+        if analysis['not_completed'] > 0:
+            not_submitted_list = "\n".join([f"・{pc}" for pc in analysis['not_submitted'][:10]])
+            if len(analysis['not_submitted']) > 10:
+                not_submitted_list += f"\n（他 {len(analysis['not_submitted']) - 10}台）"
         
-        post_to_slack(slack_message)
-        print("\n[完了] Slackに通知を送信しました。")
-    
+            slack_message = (
+                f"🔍 ブラウザ情報収集 実行状況レポート\n"
+                f"📊 提出状況: {analysis['completed']}台/{analysis['total']}台 ({analysis['completion_rate']:.1f}%)\n"
+                f"⚠️ 未提出/一部提出: {analysis['not_completed'] + analysis['partial']}台\n\n"
+                f"📋 未提出PC一覧（最大10台表示）:\n{not_submitted_list}"
+            )
+        else:
+            slack_message = (
+                f"✅ ブラウザ情報収集 実行状況レポート\n"
+                f"📊 提出状況: {analysis['completed']}台/{analysis['total']}台 (100%)\n"
+                f"🎉 すべての端末で提出が完了しています！"
+            )
+    
+        with span("notify"):
+            flush_new_submissions(notifier)
+            notifier.post(slack_message)
+            print("\n[完了] Slackに通知を送信しました。")
+    finally:
+        # 途中で失敗した場合も、ためておいた新規提出の通知は送ってから接続を閉じる
+        flush_new_submissions(notifier)
+        notifier.close()
     print("\n処理が完了しました。")
+    return "ok"
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,25 @@
 import os
-import shutil
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-import json
+import sys
+import argparse
+from datetime import datetime
 import csv
-import re
+from device_registry import load_device_registry
+from log_scanner import split_log_kind, LOG_EXTENSIONS
+from submission_catalog import catalog_folder
+from filename_parser import format_tally
+from archiver import archive_catalog, format_stats, ARCHIVE_WORKERS
+from log_reader import read_log_document
+from log_ingest import read_log_summary
+from log_stream import count_extensions_streaming
+from log_delta import load_log_state
+from run_report import RunReport, span, count
+from run_lock import RunLock
+from stage_runner import run_stages, STAGE_WORKERS
+from trend_chart import build_trend_data, write_chart, write_group_charts, CHART_FORMATS
+from overall_report import summarize_status, merge_latest, write_markdown
+from report_fanout import build_partitions, render_partitions, write_index, PARTITION_DIMENSIONS, REPORT_WORKERS
+
+# pandas・matplotlib（PNG のグラフのみ）・実行履歴（pandas を使用）はレポートを作成するときだけ読み込む（アーカイブのみの実行の起動を速くする）
 
 # 設定
 LOG_FOLDER = r"\\server\logs"
@@ -13,141 +27,124 @@ FACE_PHOTO_FOLDER = r"\\server\face_photos"
 ARCHIVE_FOLDER = r"\\server\archives"
 REPORTS_FOLDER = "レポート"
 EXECUTION_SUMMARY = "実行サマリー.csv"
+DEVICE_REGISTRY = "端末台帳.csv"
 HISTORY_CSV = "実行履歴.csv"
+HISTORY_DB = "実行履歴.sqlite3"
+HISTORY_BACKEND = "sqlite"  # "sqlite" または "csv"
+RUN_REPORT = "実行記録_履歴管理.json"  # 段階ごとの所要時間・件数（実行サマリーと同じフォルダ）。None で記録しない
+RUN_PROFILE = False  # cProfile の結果を実行記録に含める
+RUN_TRACE_MEMORY = False  # 処理段階ごとのピークメモリを実行記録に含める（処理は遅くなる）
+LOCK_FILE = "履歴管理.lock"  # 定期実行の重複を防ぐロックファイル
+TREND_CHART_FORMAT = "png"  # 実行傾向レポートのグラフ形式（"png" / "svg" / "html"。svg・html は matplotlib 不要）
+TREND_BY_DEPARTMENT = False  # 台帳の部署別の実行傾向レポートも作成する
 
-# ログファイル名のパターン
-LOG_PATTERN = re.compile(r"(.+)_(.+)_(\d{4}-\d{2}-\d{2})_(.+)\.json")
-PHOTO_PATTERN = re.compile(r"(.+)_(.+)_(\d{8})_(\d{6})\.jpg")
+# 終了コード（2 は引数の誤り）
+EXIT_OK = 0
+EXIT_FAILED = 1  # 失敗した処理がある
+EXIT_LOCKED = 3  # 別の処理が実行中
 
 def ensure_directory(path):
-    """ディレクトリの存在を確認し、なければ作成"""
+    """ディレクトリの存在を確認し、なければ作成（並列に実行する処理から同時に呼ばれても失敗しない）"""
     if not os.path.exists(path):
-        os.makedirs(path)
+        os.makedirs(path, exist_ok=True)
         print(f"[作成完了] ディレクトリ: {path}")
 
-def parse_date_from_filename(filename):
-    """ファイル名から日付を抽出"""
-    # ブラウザログファイルからの日付抽出
-    log_match = LOG_PATTERN.match(filename)
-    if log_match:
-        date_str = log_match.group(3)
-        time_str = log_match.group(4).replace("_", " ")
-        try:
-            return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H%M%S")
-        except:
-            pass
-    
-    # 顔写真ファイルからの日付抽出
-    photo_match = PHOTO_PATTERN.match(filename)
-    if photo_match:
-        date_str = photo_match.group(3)
-        time_str = photo_match.group(4)
-        try:
-            return datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-        except:
-            pass
-    
-    return None
+def load_registry():
+    """端末台帳を読み込む（見つからない・読み込めない場合は None）"""
+    if not os.path.exists(DEVICE_REGISTRY):
+        return None
+    try:
+        return load_device_registry(DEVICE_REGISTRY)
+    except Exception as e:
+        print(f"[警告] 端末台帳の読み込みに失敗しました: {e}")
+        return None
 
-def organize_files_by_date(src_folder, file_ext, archive_base):
-    """ファイルを日付ごとに整理"""
-    if not os.path.exists(src_folder):
-        print(f"[エラー] フォルダが見つかりません: {src_folder}")
-        return []
-    
-    # アーカイブベースフォルダの作成
-    archive_path = os.path.join(ARCHIVE_FOLDER, archive_base)
-    ensure_directory(archive_path)
-    
-    # ファイル情報を収集
-    file_info = []
-    
-    for filename in os.listdir(src_folder):
-        if not filename.endswith(file_ext):
-            continue
-        
-        file_path = os.path.join(src_folder, filename)
-        timestamp = parse_date_from_filename(filename)
-        
-        if not timestamp:
-            print(f"[スキップ] 日付を解析できませんでした: {filename}")
-            continue
-        
-        # 年月フォルダの作成
-        year_month = timestamp.strftime("%Y-%m")
-        year_month_folder = os.path.join(archive_path, year_month)
-        ensure_directory(year_month_folder)
-        
-        # ファイル情報を記録
-        file_info.append({
-            "filename": filename,
-            "original_path": file_path,
-            "archive_path": os.path.join(year_month_folder, filename),
-            "timestamp": timestamp,
-            "year_month": year_month,
-            "pc_name": filename.split("_")[0] if "_" in filename else "",
-            "user_name": filename.split("_")[1] if "_" in filename and len(filename.split("_")) > 1 else ""
-        })
-    
-    return file_info
+def load_catalog(kind, days_threshold=90):
+    """ブラウザログ（browser）または顔写真（photo）のフォルダを一覧して集計（PC名は台帳に合わせて分ける）"""
+    registry = load_registry()
+    pc_names = registry.keys() if registry else None
+    if kind == "browser":
+        catalog = catalog_folder(LOG_FOLDER, LOG_EXTENSIONS,
+                                 os.path.join(ARCHIVE_FOLDER, "browser_logs"), days_threshold, pc_names=pc_names)
+    else:
+        catalog = catalog_folder(FACE_PHOTO_FOLDER, ".jpg",
+                                 os.path.join(ARCHIVE_FOLDER, "face_photos"), days_threshold, pc_names=pc_names)
+    for filename in catalog["skipped"]:
+        print(f"[スキップ] 日付を解析できませんでした: {filename}")
+    if catalog["skipped"]:
+        print(f"[スキップ集計] {catalog['folder']}: {len(catalog['skipped'])}件（{format_tally(catalog['skipped_reasons'])}）")
+    return catalog
 
-def archive_old_files(file_info, days_threshold=90):
-    """古いファイルをアーカイブ"""
-    now = datetime.now()
-    archive_count = 0
-    
-    for info in file_info:
-        # ファイルの経過日数を計算
-        days_old = (now - info["timestamp"]).days
-        
-        # 指定日数より古いファイルをアーカイブ
-        if days_old > days_threshold:
-            # アーカイブにコピー
-            try:
-                shutil.copy2(info["original_path"], info["archive_path"])
-                archive_count += 1
-            except Exception as e:
-                print(f"[アーカイブ失敗] {info['filename']}: {e}")
-    
-    return archive_count
+def load_catalogs(days_threshold=90):
+    """ブラウザログ・顔写真のフォルダをそれぞれ1回だけ一覧し、レポートとアーカイブで共有する集計を作成"""
+    print("\n[処理開始] 提出フォルダの一覧取得...")
+    with span("catalog"):
+        catalogs = {kind: load_catalog(kind, days_threshold) for kind in ("browser", "photo")}
+    print("[処理完了] 提出フォルダの一覧を取得しました。")
+    return catalogs
 
-def check_extension_count(log_file_path):
-    """JSONファイルから拡張機能の数を取得"""
+def archive_old_files(catalog):
+    """古いファイルをアーカイブ先へ移動（中断した場合は次回の実行で続きから再開）"""
+    stats = archive_catalog(catalog, ARCHIVE_WORKERS)
+    print(f"[アーカイブ結果] {format_stats(stats)}")
+    count("files_archived", stats["files"])
+    count("bytes_archived", stats["bytes"])
+    count("errors", stats["failed"])
+    return stats
+
+def check_extension_count(log_file_path, streaming=False):
+    """JSONファイルから拡張機能の数を取得（集計サマリーがあればそちらを使用）
+
+    streaming=True の場合はファイル全体を展開せずに順に読みながら数える。
+    差分・ハートビートのログは同じPCの過去のログから全件を復元して数える。
+    """
+    summary = read_log_summary(log_file_path)
+    if summary is not None:
+        return summary["extension_count"]
+    
     try:
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if split_log_kind(log_file_path)[1] != "full":
+            # 差分・ハートビートは過去のログから全件を復元
+            data = load_log_state(log_file_path)
+        elif streaming:
+            return count_extensions_streaming(log_file_path)
+        else:
+            data = read_log_document(log_file_path)
         
         extension_count = sum(len(profile.get("extensions", [])) for profile in data)
         return extension_count
     except Exception as e:
         print(f"[エラー] 拡張機能数の確認に失敗しました: {log_file_path}: {e}")
+        count("errors")
         return 0
 
-def create_execution_trends_report():
-    """実行傾向レポートの作成"""
+def create_execution_trends_report(chart_format=None, by_department=None):
+    """実行傾向レポートの作成（by_department=True の場合は台帳の部署別のグラフもまとめて作成）"""
+    chart_format = chart_format or TREND_CHART_FORMAT
+    if by_department is None:
+        by_department = TREND_BY_DEPARTMENT
     # レポートフォルダの作成
     ensure_directory(REPORTS_FOLDER)
     
-    # 履歴CSVの読み込み
-    if not os.path.exists(HISTORY_CSV):
-        print(f"[エラー] 実行履歴が見つかりません: {HISTORY_CSV}")
+    # 実行履歴の読み込み
+    history_source = HISTORY_DB if HISTORY_BACKEND == "sqlite" else HISTORY_CSV
+    if not os.path.exists(history_source) and not os.path.exists(HISTORY_CSV):
+        print(f"[エラー] 実行履歴が見つかりません: {history_source}")
         return
     
     try:
-        history_df = pd.read_csv(HISTORY_CSV, encoding='utf-8')
+        from execution_history import open_history_store
+        history_store = open_history_store(HISTORY_BACKEND, HISTORY_CSV, HISTORY_DB, read_only=True)
+        try:
+            history_df = history_store.latest_per_pc()
+            # PC・種類・年月ごとの実行数（グラフ用に全体・部署別の月別実行数へまとめる）
+            monthly_rows = history_store.monthly_counts_by_pc()
+        finally:
+            history_store.close()
     except Exception as e:
         print(f"[エラー] 実行履歴の読み込みに失敗しました: {e}")
         return
     
-    # 日付列を日付型に変換
-    for col in ["ブラウザ情報実行日時", "顔写真実行日時", "最終確認日"]:
-        if col in history_df.columns:
-            history_df[col] = pd.to_datetime(history_df[col], errors='coerce')
-    
-    # 月ごとの実行数を集計
-    browser_monthly = history_df.groupby(history_df["ブラウザ情報実行日時"].dt.strftime("%Y-%m")).size()
-    photo_monthly = history_df.groupby(history_df["顔写真実行日時"].dt.strftime("%Y-%m")).size()
-    
     # 拡張機能数の統計
     extension_stats = {
         "平均": history_df["拡張機能数"].mean(),
@@ -155,40 +152,43 @@ def create_execution_trends_report():
         "最小": history_df["拡張機能数"].min(),
         "中央値": history_df["拡張機能数"].median()
     }
+    extension_counts = {
+        str(pc_name): value
+        for pc_name, value in zip(history_df["PC名"].tolist(), history_df["拡張機能数"].tolist())
+        if value == value  # 欠損値（NaN）を除く
+    }
     
-    # グラフの作成
-    plt.figure(figsize=(12, 8))
-    
-    # 月別実行数のグラフ
-    plt.subplot(2, 1, 1)
-    browser_monthly.plot(kind='bar', color='blue', alpha=0.6, label='ブラウザ情報')
-    photo_monthly.plot(kind='bar', color='green', alpha=0.6, label='顔写真')
-    plt.title('月別実行数')
-    plt.xlabel('年月')
-    plt.ylabel('実行数')
-    plt.xticks(rotation=45)
-    plt.legend()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # 拡張機能数の分布
-    plt.subplot(2, 1, 2)
-    history_df["拡張機能数"].plot(kind='hist', bins=20, color='orange', alpha=0.7)
-    plt.title('拡張機能数の分布')
-    plt.xlabel('拡張機能数')
-    plt.ylabel('PC数')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    plt.tight_layout()
+    # 実行履歴が空の場合（初回・アーカイブ直後など）はグラフを作成しない
+    trend_data = build_trend_data(monthly_rows, extension_counts).get("")
+    if trend_data is None:
+        print("[スキップ] 実行傾向レポート: 実行履歴に記録がありません")
+        return
     
     # グラフを保存
-    report_path = os.path.join(REPORTS_FOLDER, f"実行傾向レポート_{datetime.now().strftime('%Y%m%d')}.png")
-    plt.savefig(report_path)
-    plt.close()
-    
+    date = datetime.now().strftime('%Y%m%d')
+    report_path = os.path.join(REPORTS_FOLDER, f"実行傾向レポート_{date}.{chart_format}")
+    with span("trends_chart"):
+        write_chart(trend_data, report_path, chart_format)
     print(f"[作成完了] 実行傾向レポート: {report_path}")
     
+    # 部署別のグラフ（全部署の月別実行数は同じ年月の並びにそろえる）
+    if by_department:
+        registry = load_registry()
+        if registry is None:
+            print(f"[スキップ] 部署別の実行傾向レポート: 端末台帳が見つかりません: {DEVICE_REGISTRY}")
+        else:
+            group_of = {pc_name: department
+                        for department, pc_names in registry.by_department.items() for pc_name in pc_names}
+            department_folder = os.path.join(REPORTS_FOLDER, "部署別")
+            ensure_directory(department_folder)
+            with span("trends_department_charts"):
+                groups = build_trend_data(monthly_rows, extension_counts, group_of)
+                paths = write_group_charts(groups, department_folder, f"実行傾向レポート_{date}", chart_format)
+            count("charts_written", len(paths))
+            print(f"[作成完了] 部署別の実行傾向レポート: {department_folder}（{len(groups)}部署、{len(paths)}ファイル）")
+    
     # 統計情報のCSV出力
-    stats_path = os.path.join(REPORTS_FOLDER, f"拡張機能統計_{datetime.now().strftime('%Y%m%d')}.csv")
+    stats_path = os.path.join(REPORTS_FOLDER, f"拡張機能統計_{date}.csv")
     
     with open(stats_path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
@@ -200,179 +200,275 @@ def create_execution_trends_report():
     
     return report_path, stats_path
 
-def get_submission_status():
-    """提出状況のサマリーを取得"""
+def read_submission_statuses():
+    """実行サマリーから (PC名, 提出状況) のリストを取得（見つからない・読み込めない場合は None）"""
     if not os.path.exists(EXECUTION_SUMMARY):
         print(f"[エラー] 実行サマリーが見つかりません: {EXECUTION_SUMMARY}")
         return None
     
     try:
-        summary_df = pd.read_csv(EXECUTION_SUMMARY, encoding='utf-8')
-        
-        total = len(summary_df)
-        completed = len(summary_df[summary_df["提出状況"] == "完了"])
-        partial = len(summary_df[summary_df["提出状況"] == "一部完了"])
-        not_completed = len(summary_df[summary_df["提出状況"] == "未完了"])
-        
-        return {
-            "total": total,
-            "completed": completed,
-            "partial": partial,
-            "not_completed": not_completed,
-            "completion_rate": (completed / total) * 100 if total > 0 else 0
-        }
+        with open(EXECUTION_SUMMARY, 'r', newline='', encoding='utf-8') as f:
+            return [(row["PC名"], row["提出状況"]) for row in csv.DictReader(f)]
     except Exception as e:
         print(f"[エラー] 実行サマリーの読み込みに失敗しました: {e}")
         return None
 
-def create_overall_report():
-    """総合レポートの作成"""
+def get_submission_status():
+    """提出状況のサマリーを取得"""
+    statuses = read_submission_statuses()
+    if statuses is None:
+        return None
+    return summarize_status([status for _, status in statuses])
+
+def create_overall_report(catalogs=None):
+    """総合レポートの作成（catalogs を渡した場合は提出フォルダを一覧し直さない）"""
     # レポートフォルダの作成
     reports_path = os.path.join(REPORTS_FOLDER, "定期レポート")
     ensure_directory(reports_path)
     
     # 現在の日時
     now = datetime.now()
-    report_date = now.strftime("%Y年%m月%d日")
     
     # 提出状況を取得
     status = get_submission_status()
     if not status:
         return
     
-    # ブラウザログファイルの整理
-    browser_logs = organize_files_by_date(LOG_FOLDER, ".json", "browser_logs")
-    
-    # 顔写真ファイルの整理
-    face_photos = organize_files_by_date(FACE_PHOTO_FOLDER, ".jpg", "face_photos")
-    
-    # PC名ごとに最新の提出日を取得
-    latest_submissions = {}
-    
-    for log in browser_logs:
-        pc_name = log["pc_name"]
-        if pc_name not in latest_submissions or log["timestamp"] > latest_submissions[pc_name]["browser_time"]:
-            if pc_name not in latest_submissions:
-                latest_submissions[pc_name] = {"browser_time": None, "photo_time": None}
-            latest_submissions[pc_name]["browser_time"] = log["timestamp"]
-    
-    for photo in face_photos:
-        pc_name = photo["pc_name"]
-        if pc_name not in latest_submissions or photo["timestamp"] > latest_submissions[pc_name]["photo_time"]:
-            if pc_name not in latest_submissions:
-                latest_submissions[pc_name] = {"browser_time": None, "photo_time": None}
-            latest_submissions[pc_name]["photo_time"] = photo["timestamp"]
-    
-    # 月別の提出数を集計
-    browser_monthly = {}
-    photo_monthly = {}
-    
-    for log in browser_logs:
-        year_month = log["year_month"]
-        if year_month not in browser_monthly:
-            browser_monthly[year_month] = 0
-        browser_monthly[year_month] += 1
-    
-    for photo in face_photos:
-        year_month = photo["year_month"]
-        if year_month not in photo_monthly:
-            photo_monthly[year_month] = 0
-        photo_monthly[year_month] += 1
+    # 提出フォルダの集計（月別の提出数・PCごとの最新の提出日時）
+    if catalogs is None:
+        catalogs = load_catalogs()
+    data = {
+        "status": status,
+        "browser_monthly": catalogs["browser"]["monthly"],
+        "photo_monthly": catalogs["photo"]["monthly"],
+        "browser_files": len(catalogs["browser"]["files"]),
+        "photo_files": len(catalogs["photo"]["files"]),
+        "latest": merge_latest(catalogs["browser"]["latest"], catalogs["photo"]["latest"])
+    }
     
     # レポートファイルを作成
     report_path = os.path.join(reports_path, f"ブラウザ情報収集_総合レポート_{now.strftime('%Y%m%d')}.md")
-    
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(f"# ブラウザ情報収集 総合レポート\n\n")
-        f.write(f"**作成日時:** {report_date}\n\n")
-        
-        f.write("## 1. 提出状況サマリー\n\n")
-        f.write(f"- **総端末数:** {status['total']}台\n")
-        f.write(f"- **提出完了:** {status['completed']}台 ({status['completion_rate']:.1f}%)\n")
-        f.write(f"- **一部提出:** {status['partial']}台\n")
-        f.write(f"- **未提出:** {status['not_completed']}台\n\n")
-        
-        f.write("## 2. 月別提出数\n\n")
-        f.write("### ブラウザ情報\n\n")
-        f.write("| 年月 | 提出数 |\n")
-        f.write("|------|-------|\n")
-        for year_month in sorted(browser_monthly.keys(), reverse=True):
-            f.write(f"| {year_month} | {browser_monthly[year_month]} |\n")
-        
-        f.write("\n### 顔写真\n\n")
-        f.write("| 年月 | 提出数 |\n")
-        f.write("|------|-------|\n")
-        for year_month in sorted(photo_monthly.keys(), reverse=True):
-            f.write(f"| {year_month} | {photo_monthly[year_month]} |\n")
-        
-        f.write("\n## 3. ファイル管理状況\n\n")
-        f.write(f"- **ブラウザ情報ファイル総数:** {len(browser_logs)}件\n")
-        f.write(f"- **顔写真ファイル総数:** {len(face_photos)}件\n\n")
-        
-        # 今月と先月の提出状況
-        current_month = now.strftime("%Y-%m")
-        last_month = (now - timedelta(days=30)).strftime("%Y-%m")
-        
-        current_month_browser = browser_monthly.get(current_month, 0)
-        last_month_browser = browser_monthly.get(last_month, 0)
-        current_month_photo = photo_monthly.get(current_month, 0)
-        last_month_photo = photo_monthly.get(last_month, 0)
-        
-        f.write("## 4. 今月と先月の提出状況\n\n")
-        f.write("| 項目 | 今月 | 先月 | 増減 |\n")
-        f.write("|------|------|------|------|\n")
-        f.write(f"| ブラウザ情報 | {current_month_browser} | {last_month_browser} | {current_month_browser - last_month_browser} |\n")
-        f.write(f"| 顔写真 | {current_month_photo} | {last_month_photo} | {current_month_photo - last_month_photo} |\n\n")
-        
-        f.write("## 5. 提出遅延状況\n\n")
-        
-        # 30日以上提出のないPCをカウント
-        browser_delay_count = 0
-        photo_delay_count = 0
-        
-        for pc_name, times in latest_submissions.items():
-            if times["browser_time"] and (now - times["browser_time"]).days > 30:
-                browser_delay_count += 1
-            if times["photo_time"] and (now - times["photo_time"]).days > 30:
-                photo_delay_count += 1
-        
-        f.write("### 30日以上提出のないPC数\n\n")
-        f.write(f"- **ブラウザ情報:** {browser_delay_count}台\n")
-        f.write(f"- **顔写真:** {photo_delay_count}台\n\n")
-        
-        f.write("## 6. 次回のアクション\n\n")
-        f.write("- [ ] 未提出PCへのリマインダー送信\n")
-        f.write("- [ ] 30日以上提出のないPCの確認\n")
-        f.write("- [ ] 古いファイルのアーカイブ処理\n")
+    write_markdown(report_path, data, now)
     
     print(f"[作成完了] 総合レポート: {report_path}")
     return report_path
 
-def archive_files_by_period(days_threshold=90):
-    """一定期間経過したファイルをアーカイブ"""
+def create_partition_reports(catalogs=None, dimensions=("department", "os"), workers=REPORT_WORKERS):
+    """総合レポートを台帳の部署別・OS別に分けて作成
+
+    提出フォルダの一覧と実行サマリーの読み込みは1回だけ行い、台帳の属性ごとに振り分けてから、
+    分割ごとのレポート（Markdown）と統計（CSV）を workers 個のプロセスで作成する。
+    """
+    reports_path = os.path.join(REPORTS_FOLDER, "定期レポート")
+    ensure_directory(reports_path)
+    now = datetime.now()
+    
+    statuses = read_submission_statuses()
+    if statuses is None:
+        return
+    registry = load_registry()
+    if not registry:
+        print(f"[エラー] 端末台帳を読み込めません: {DEVICE_REGISTRY}")
+        return
+    if catalogs is None:
+        catalogs = load_catalogs()
+    
+    with span("partition"):
+        partitions = build_partitions(statuses, catalogs, registry, dimensions)
+    with span("partition_render"):
+        results = render_partitions(partitions, reports_path, now, workers)
+    count("reports_written", len(results))
+    
+    index_path = os.path.join(reports_path, f"ブラウザ情報収集_総合レポート_分割一覧_{now.strftime('%Y%m%d')}.md")
+    write_index(index_path, results, now)
+    print(f"[作成完了] 部署別・OS別の総合レポート: {len(results)}件（一覧: {index_path}）")
+    return index_path
+
+def archive_files_by_period(days_threshold=90, catalogs=None):
+    """一定期間経過したファイルをアーカイブ（catalogs を渡した場合は提出フォルダを一覧し直さない）"""
     print("\n====== ファイルアーカイブ処理 ======")
     
-    # ブラウザログファイルの整理
-    print("\n[処理開始] ブラウザログファイルの整理...")
-    browser_logs = organize_files_by_date(LOG_FOLDER, ".json", "browser_logs")
-    browser_archive_count = archive_old_files(browser_logs, days_threshold)
+    if catalogs is None or catalogs["browser"]["days_threshold"] != days_threshold:
+        catalogs = load_catalogs(days_threshold)
+    
+    # ブラウザログファイルのアーカイブ
+    print("\n[処理開始] ブラウザログファイルのアーカイブ...")
+    with span("archive_browser"):
+        browser_archive_count = archive_old_files(catalogs["browser"])["files"]
     print(f"[処理完了] {browser_archive_count}件のブラウザログファイルをアーカイブしました。")
     
-    # 顔写真ファイルの整理
-    print("\n[処理開始] 顔写真ファイルの整理...")
-    face_photos = organize_files_by_date(FACE_PHOTO_FOLDER, ".jpg", "face_photos")
-    photo_archive_count = archive_old_files(face_photos, days_threshold)
+    # 顔写真ファイルのアーカイブ
+    print("\n[処理開始] 顔写真ファイルのアーカイブ...")
+    with span("archive_photos"):
+        photo_archive_count = archive_old_files(catalogs["photo"])["files"]
     print(f"[処理完了] {photo_archive_count}件の顔写真ファイルをアーカイブしました。")
     
     return browser_archive_count, photo_archive_count
 
-def main():
-    """メイン処理"""
+def build_stages(days_threshold=90, chart_format=None, by_department=None, dimensions=(), workers=REPORT_WORKERS):
+    """一括実行の処理と依存関係（提出フォルダの一覧は1回だけ行い、総合レポート・分割レポート・アーカイブで共有）
+
+    ブラウザログと顔写真の一覧、実行傾向レポート、総合レポート、2種類のアーカイブは互いに独立しており並列に実行できる。
+    dimensions（部署・OS）を指定した場合は、総合レポートを台帳の属性ごとに分けたレポートも作成する。
+    """
+    def catalog_stage(kind):
+        catalog = load_catalog(kind, days_threshold)
+        return os.path.exists(catalog["folder"]), catalog
+    
+    def trends_stage(inputs):
+        result = create_execution_trends_report(chart_format, by_department)
+        return result is not None, result
+    
+    def overall_stage(inputs):
+        result = create_overall_report({"browser": inputs["catalog_logs"], "photo": inputs["catalog_photos"]})
+        return result is not None, result
+    
+    def partition_stage(inputs):
+        catalogs = {"browser": inputs["catalog_logs"], "photo": inputs["catalog_photos"]}
+        result = create_partition_reports(catalogs, dimensions, workers)
+        return result is not None, result
+    
+    def archive_stage(catalog):
+        stats = archive_old_files(catalog)
+        return stats["failed"] == 0, stats
+    
+    return {
+        "catalog_logs": {"label": "ブラウザログの一覧取得", "after": [],
+                         "run": lambda inputs: catalog_stage("browser")},
+        "catalog_photos": {"label": "顔写真の一覧取得", "after": [],
+                           "run": lambda inputs: catalog_stage("photo")},
+        "trends_report": {"label": "実行傾向レポートの作成", "after": [], "run": trends_stage},
+        "overall_report": {"label": "総合レポートの作成", "after": ["catalog_logs", "catalog_photos"], "run": overall_stage},
+        "partition_reports": {"label": "部署別・OS別の総合レポートの作成", "after": ["catalog_logs", "catalog_photos"],
+                              "run": partition_stage},
+        "archive_logs": {"label": "ブラウザログファイルのアーカイブ", "after": ["catalog_logs"],
+                         "run": lambda inputs: archive_stage(inputs["catalog_logs"])},
+        "archive_photos": {"label": "顔写真ファイルのアーカイブ", "after": ["catalog_photos"],
+                           "run": lambda inputs: archive_stage(inputs["catalog_photos"])}
+    }
+
+def select_stages(stages, targets):
+    """targets の処理と、それらが依存する処理だけを取り出す"""
+    selected = {}
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected[name] = stages[name]
+            pending.extend(stages[name]["after"])
+    return {name: stage for name, stage in stages.items() if name in selected}
+
+def get_targets(args):
+    """サブコマンドで実行する処理"""
+    if args.command == "trends":
+        return ["trends_report"]
+    partitions = ["partition_reports"] if args.by else []
+    if args.command == "report":
+        return ["overall_report"] + partitions
+    if args.command == "archive":
+        return {"browser": ["archive_logs"], "photo": ["archive_photos"]}.get(args.target, ["archive_logs", "archive_photos"])
+    return ["trends_report", "overall_report"] + partitions + ["archive_logs", "archive_photos"]
+
+def run_batch(args):
+    """サブコマンドの処理を依存関係に従って実行し、終了コードを返す"""
+    ensure_directory(REPORTS_FOLDER)
+    stages = select_stages(build_stages(args.days, args.format, args.by_department or None, args.by or (), args.workers),
+                           get_targets(args))
+    with span(args.command):
+        results = run_stages(stages, args.jobs)
+    
+    print("\n====== 実行結果 ======")
+    labels = {"ok": "完了", "failed": "失敗", "skipped": "未実行"}
+    for name, stage in stages.items():
+        result = results[name]
+        print(f"{stage['label']}: {labels[result['status']]}（{result['seconds']:.1f}秒）")
+    if all(result["status"] == "ok" for result in results.values()):
+        return EXIT_OK
+    return EXIT_FAILED
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析（サブコマンドを省略した場合は従来どおりメニューを表示）"""
+    parser = argparse.ArgumentParser(
+        description="実行傾向レポート・総合レポートの作成と、古い提出ファイルのアーカイブを行います。",
+        epilog=f"終了コード: {EXIT_OK} 成功 / {EXIT_FAILED} 失敗した処理がある / 2 引数の誤り / {EXIT_LOCKED} 別の処理が実行中"
+    )
+    parser.add_argument("--lock-file", default=LOCK_FILE, help=f"重複実行を防ぐロックファイル（既定: {LOCK_FILE}）")
+    parser.add_argument("--no-lock", action="store_true", help="ロックファイルを使わない")
+    parser.add_argument("--profile", action="store_true", help="cProfile の結果を実行記録に含める")
+    parser.add_argument("--trace-memory", action="store_true", help="処理段階ごとのピークメモリを実行記録に含める")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    subparsers.add_parser("menu", help="対話形式のメニューを表示（既定）")
+    trends_parser = subparsers.add_parser("trends", help="実行傾向レポートを作成")
+    report_parser = subparsers.add_parser("report", help="総合レポートを作成")
+    
+    archive_parser = subparsers.add_parser("archive", help="一定期間経過したファイルをアーカイブ")
+    archive_parser.add_argument("--days", type=int, default=90, help="アーカイブする経過日数（既定: 90）")
+    archive_parser.add_argument("--target", choices=["all", "browser", "photo"], default="all", help="アーカイブするファイルの種類")
+    archive_parser.add_argument("--jobs", type=int, default=STAGE_WORKERS, help="同時に実行する処理の数")
+    
+    run_all_parser = subparsers.add_parser("run-all", help="レポートの作成とアーカイブをすべて実行（独立した処理は並列）")
+    run_all_parser.add_argument("--days", type=int, default=90, help="アーカイブする経過日数（既定: 90）")
+    run_all_parser.add_argument("--jobs", type=int, default=STAGE_WORKERS,
+                                help=f"同時に実行する処理の数（既定: {STAGE_WORKERS}、1で順に実行）")
+    
+    for chart_parser in (trends_parser, run_all_parser):
+        chart_parser.add_argument("--format", choices=CHART_FORMATS,
+                                  help=f"実行傾向レポートのグラフ形式（既定: {TREND_CHART_FORMAT}）")
+        chart_parser.add_argument("--by-department", action="store_true", help="台帳の部署別の実行傾向レポートも作成")
+    for partition_parser in (report_parser, run_all_parser):
+        partition_parser.add_argument("--by", action="append", choices=list(PARTITION_DIMENSIONS),
+                                      help="総合レポートを台帳の部署別（department）・OS別（os）にも作成（複数指定可）")
+        partition_parser.add_argument("--workers", type=int, default=REPORT_WORKERS,
+                                      help=f"分割したレポートを作成するプロセス数（既定: {REPORT_WORKERS}）")
+    
+    # オプションのないサブコマンドの既定値
+    parser.set_defaults(days=90, jobs=STAGE_WORKERS, target="all", format=None, by_department=False,
+                        by=None, workers=REPORT_WORKERS)
+    return parser.parse_args(argv)
+
+def get_run_report_path():
+    """実行記録の保存先（実行サマリーと同じフォルダ）"""
+    return os.path.join(os.path.dirname(EXECUTION_SUMMARY), RUN_REPORT)
+
+def main(argv=None):
+    """メイン処理（終了コードを返す）"""
+    args = parse_args(argv)
+    batch = args.command not in (None, "menu")
+    lock = RunLock(args.lock_file) if not args.no_lock else None
+    if batch:
+        if lock is not None and not lock.acquire():
+            return EXIT_LOCKED
+    
+    report = None
+    if RUN_REPORT:
+        report = RunReport("ExecutionHistoryLogger", args.profile or RUN_PROFILE,
+                           args.trace_memory or RUN_TRACE_MEMORY).start()
+    status = "error"
+    try:
+        if batch:
+            code = run_batch(args)
+        else:
+            run_menu(report, lock)
+            code = EXIT_OK
+        status = "ok" if code == EXIT_OK else "failed"
+        return code
+    finally:
+        if report is not None:
+            report.finish(get_run_report_path(), status)
+        if batch and lock is not None:
+            lock.release()
+
+def run_menu(report=None, lock=None):
+    """操作を選択して実行
+
+    report を渡すと操作ごとに実行記録を保存し、lock を渡すと操作の間だけロックを取得する
+    （メニューを開いたままでも定期実行を妨げない）。
+    """
     print("====== ブラウザ情報収集 履歴管理ツール ======")
     print(f"実行日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # アーカイブフォルダの作成
-    ensure_directory(ARCHIVE_FOLDER)
+    # レポートフォルダの作成（アーカイブフォルダはアーカイブ時に作成）
     ensure_directory(REPORTS_FOLDER)
     
     while True:
@@ -386,39 +482,62 @@ def main():
         
         choice = input("\n選択（0-5）: ")
         
-        if choice == "1":
-            print("\n[処理開始] 実行傾向レポートの作成...")
-            create_execution_trends_report()
-        
-        elif choice == "2":
-            print("\n[処理開始] 総合レポートの作成...")
-            create_overall_report()
-        
-        elif choice == "3":
-            print("\n[処理開始] ファイルのアーカイブ処理（90日）...")
-            archive_files_by_period(90)
+        if choice == "0":
+            print("\n処理を終了します。")
+            break
+        if choice not in ("1", "2", "3", "4", "5"):
+            print("[エラー] 0から5の数字を入力してください。")
+            continue
         
-        elif choice == "4":
-            try:
-                days = int(input("アーカイブする日数を入力してください（例: 30）: "))
-                print(f"\n[処理開始] ファイルのアーカイブ処理（{days}日）...")
-                archive_files_by_period(days)
-            except ValueError:
-                print("[エラー] 有効な数値を入力してください。")
+        if lock is not None and not lock.acquire():
+            continue
+        try:
+            run_menu_choice(choice)
+        finally:
+            if lock is not None:
+                lock.release()
         
-        elif choice == "5":
-            print("\n[処理開始] すべての処理を実行...")
+        # 途中で中断しても、それまでの操作の記録は残す
+        if report is not None:
+            report.write(get_run_report_path())
+
+def run_menu_choice(choice):
+    """メニューで選択した操作（1-5）を実行"""
+    if choice == "1":
+        print("\n[処理開始] 実行傾向レポートの作成...")
+        with span("trends_report"):
             create_execution_trends_report()
+    
+    elif choice == "2":
+        print("\n[処理開始] 総合レポートの作成...")
+        with span("overall_report"):
             create_overall_report()
+    
+    elif choice == "3":
+        print("\n[処理開始] ファイルのアーカイブ処理（90日）...")
+        with span("archive"):
             archive_files_by_period(90)
-            print("[処理完了] すべての処理が完了しました。")
-        
-        elif choice == "0":
-            print("\n処理を終了します。")
-            break
-        
-        else:
-            print("[エラー] 0から5の数字を入力してください。")
+    
+    elif choice == "4":
+        try:
+            days = int(input("アーカイブする日数を入力してください（例: 30）: "))
+            print(f"\n[処理開始] ファイルのアーカイブ処理（{days}日）...")
+            with span("archive"):
+                archive_files_by_period(days)
+        except ValueError:
+            print("[エラー] 有効な数値を入力してください。")
+    
+    elif choice == "5":
+        print("\n[処理開始] すべての処理を実行...")
+        # 提出フォルダの一覧は1回だけ取得し、総合レポートとアーカイブで共有
+        catalogs = load_catalogs(90)
+        with span("trends_report"):
+            create_execution_trends_report()
+        with span("overall_report"):
+            create_overall_report(catalogs)
+        with span("archive"):
+            archive_files_by_period(90, catalogs)
+        print("[処理完了] すべての処理が完了しました。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
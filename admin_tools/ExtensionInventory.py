@@ -0,0 +1,211 @@
+import os
+import csv
+import json
+import sqlite3
+import argparse
+import functools
+from datetime import datetime
+from CompareDeviceLogs import DEVICE_REGISTRY, LOG_FOLDER, list_executed_files
+from device_registry import load_device_registry
+from log_ingest import iter_ingest, DEFAULT_WORKERS
+from log_stream import iter_extension_records
+from log_scanner import split_log_kind, LOG_EXTENSIONS
+from log_delta import load_log_state
+
+# 設定
+INVENTORY_DB = "拡張機能インベントリ.sqlite3"
+EXPORT_CSV = "拡張機能インベントリ.csv"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sources (
+        pc_name TEXT PRIMARY KEY,
+        user_name TEXT,
+        filename TEXT NOT NULL,
+        log_time TEXT,
+        indexed_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS installs (
+        ext_id TEXT NOT NULL,
+        version TEXT NOT NULL,
+        name TEXT,
+        pc_name TEXT NOT NULL,
+        user_name TEXT,
+        browser TEXT,
+        profile TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_installs_ext ON installs (ext_id, version);
+    CREATE INDEX IF NOT EXISTS idx_installs_pc ON installs (pc_name);
+"""
+
+EXPORT_COLUMNS = ["拡張機能ID", "バージョン", "名称", "PC名", "使用者", "ブラウザ", "プロファイル"]
+
+def open_inventory(db_path=INVENTORY_DB):
+    """インベントリDBを開く"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def read_extension_records(log_file_path, streaming=False):
+    """ログファイルから拡張機能ごとのレコードを取得"""
+    try:
+        if streaming and split_log_kind(log_file_path)[1] == "full":
+            return [
+                (ext.get("id", ""), ext.get("version", ""), ext.get("name", ""),
+                 profile.get("browser", ""), profile.get("profile", ""))
+                for profile, ext in iter_extension_records(log_file_path)
+            ]
+        
+        # 差分・ハートビートは過去のログから全件を復元
+        data = load_log_state(log_file_path)
+    except Exception as e:
+        print(f"[エラー] ログの読み込みに失敗しました: {log_file_path}: {e}")
+        return None
+
+    records = []
+    for profile in data:
+        for ext in profile.get("extensions", []):
+            records.append((
+                ext.get("id", ""),
+                ext.get("version", ""),
+                ext.get("name", ""),
+                profile.get("browser", ""),
+                profile.get("profile", "")
+            ))
+    return records
+
+def load_registry_names():
+    """端末台帳のPC名を読み込む（見つからない・読み込めない場合は None、ファイル名のPC名をそのまま使う）"""
+    if not os.path.exists(DEVICE_REGISTRY):
+        return None
+    try:
+        return load_device_registry(DEVICE_REGISTRY).keys()
+    except Exception as e:
+        print(f"[警告] 端末台帳の読み込みに失敗しました: {e}")
+        return None
+
+def update_inventory(conn, log_folder=LOG_FOLDER, workers=DEFAULT_WORKERS, streaming=False, pc_names=None):
+    """新しく届いたログだけを読み込んでインベントリを更新（pc_names を渡すとアンダースコアを含むPC名も台帳どおりに分ける）"""
+    latest_logs = list_executed_files(log_folder, LOG_EXTENSIONS, pc_names=pc_names)
+    indexed = dict(conn.execute("SELECT pc_name, filename FROM sources").fetchall())
+
+    # 最新ログが前回索引化したものと異なるPCのみ対象
+    targets = {
+        pc_name: info["path"]
+        for pc_name, info in latest_logs.items()
+        if indexed.get(pc_name) != info["filename"]
+    }
+    if not targets:
+        return 0
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    updated = 0
+    with conn:
+        reader = functools.partial(read_extension_records, streaming=streaming)
+        for pc_name, records in iter_ingest(targets, reader, workers):
+            if records is None:
+                continue
+            info = latest_logs[pc_name]
+            conn.execute("DELETE FROM installs WHERE pc_name = ?", (pc_name,))
+            conn.executemany(
+                "INSERT INTO installs (ext_id, version, name, pc_name, user_name, browser, profile) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(ext_id, version, name, pc_name, info["user"], browser, profile)
+                 for ext_id, version, name, browser, profile in records])
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (pc_name, user_name, filename, log_time, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (pc_name, info["user"], info["filename"],
+                 info["timestamp"].strftime("%Y-%m-%d %H:%M:%S") if info["timestamp"] else None, now))
+            updated += 1
+    return updated
+
+def query_extension(conn, ext_id, version=None):
+    """拡張機能IDで導入PCを検索"""
+    sql = ("SELECT ext_id, version, name, pc_name, user_name, browser, profile FROM installs "
+           "WHERE ext_id = ?")
+    params = [ext_id]
+    if version:
+        sql += " AND version = ?"
+        params.append(version)
+    sql += " ORDER BY version, pc_name, browser, profile"
+    return conn.execute(sql, params).fetchall()
+
+def export_inventory(conn, output_path, output_format="csv"):
+    """インベントリ全体を出力"""
+    rows = conn.execute(
+        "SELECT ext_id, version, name, pc_name, user_name, browser, profile FROM installs "
+        "ORDER BY ext_id, version, pc_name, browser, profile")
+
+    if output_format == "json":
+        # 拡張機能ID → バージョン → 導入先 の入れ子構造
+        index = {}
+        for ext_id, version, name, pc_name, user_name, browser, profile in rows:
+            index.setdefault(ext_id, {}).setdefault(version, []).append({
+                "name": name,
+                "pc_name": pc_name,
+                "user_name": user_name,
+                "browser": browser,
+                "profile": profile
+            })
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        return len(index)
+
+    count = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="全端末の拡張機能インベントリを管理・検索します。")
+    parser.add_argument("--db", default=INVENTORY_DB, help=f"インベントリDBのパス（既定: {INVENTORY_DB}）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="新しいログを取り込んでインベントリを更新")
+    update_parser.add_argument("--log-folder", default=LOG_FOLDER, help="ログフォルダ")
+    update_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ログを同時に読み込む数")
+    update_parser.add_argument("--stream", action="store_true", help="ログを全体展開せずに順に読み込む")
+
+    query_parser = subparsers.add_parser("query", help="拡張機能IDで導入PCを検索")
+    query_parser.add_argument("ext_id", help="拡張機能ID")
+    query_parser.add_argument("--version", help="バージョンで絞り込み")
+
+    export_parser = subparsers.add_parser("export", help="インベントリ全体を出力")
+    export_parser.add_argument("--output", default=EXPORT_CSV, help=f"出力先（既定: {EXPORT_CSV}）")
+    export_parser.add_argument("--format", choices=["csv", "json"], default="csv", help="出力形式")
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    conn = open_inventory(args.db)
+    try:
+        if args.command == "update":
+            print("[処理開始] 拡張機能インベントリの更新...")
+            updated = update_inventory(conn, args.log_folder, args.workers, args.stream,
+                                       pc_names=load_registry_names())
+            print(f"[処理完了] {updated}台分のログを取り込みました。")
+
+        elif args.command == "query":
+            rows = query_extension(conn, args.ext_id, args.version)
+            if not rows:
+                print(f"[検索結果] 該当する端末はありません: {args.ext_id}")
+                return
+            print(f"[検索結果] {len(rows)}件")
+            print("バージョン\t名称\tPC名\t使用者\tブラウザ\tプロファイル")
+            for ext_id, version, name, pc_name, user_name, browser, profile in rows:
+                print(f"{version}\t{name}\t{pc_name}\t{user_name}\t{browser}\t{profile}")
+
+        elif args.command == "export":
+            count = export_inventory(conn, args.output, args.format)
+            print(f"[作成完了] 拡張機能インベントリ: {args.output} ({count}件)")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
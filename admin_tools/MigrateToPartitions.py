@@ -0,0 +1,113 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from filename_parser import parse_filename
+
+# 期間別サブフォルダの名前は収集ツールと同じ実装（distribute/partitioning.py）を使う
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "distribute"))
+from partitioning import partition_name, PARTITION_FORMATS
+
+# 設定
+LOG_FOLDER = r"\\server\logs"
+FACE_PHOTO_FOLDER = r"\\server\face_photos"
+MIGRATION_WORKERS = 8
+
+def plan_migration(folder, layout="month"):
+    """提出フォルダ直下のファイルの移動先（期間別サブフォルダ）を決める
+
+    集計サマリーは対応するログと同じサブフォルダへ移す。日時を解析できないファイルと
+    転送途中の一時ファイル（先頭が "."）は移動しない。
+    戻り値は ((元のパス, 移動先のパス) のリスト, 移動しないファイル名のリスト)。
+    """
+    moves = []
+    skipped = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name.startswith("."):
+                continue
+            name = entry.name
+            _, _, timestamp = parse_filename(name)
+            if timestamp is None:
+                skipped.append(name)
+                continue
+            moves.append((entry.path, os.path.join(folder, partition_name(timestamp, layout), name)))
+    # ファイル名順（ログ本体が集計サマリーより先）
+    moves.sort(key=lambda move: move[0])
+    return moves, skipped
+
+def move_to_partition(move):
+    """1ファイルを同じ共有フォルダ内で名前変更して移動（移動先に同名がある場合は移動しない）"""
+    src, dst = move
+    if os.path.exists(dst):
+        return "exists"
+    os.replace(src, dst)
+    return "moved"
+
+def migrate_folder(folder, layout="month", workers=MIGRATION_WORKERS, dry_run=False):
+    """提出フォルダ直下のファイルを期間別サブフォルダへ移動し、件数を返す
+
+    途中で中断しても、もう一度実行すれば直下に残ったファイルだけを移動する。
+    """
+    result = {"moved": 0, "exists": 0, "failed": 0, "skipped": 0}
+    if not os.path.exists(folder):
+        print(f"[エラー] フォルダが見つかりません: {folder}")
+        return result
+
+    moves, skipped = plan_migration(folder, layout)
+    result["skipped"] = len(skipped)
+    for name in skipped:
+        print(f"[スキップ] 日付を解析できませんでした: {name}")
+
+    partitions = sorted({os.path.dirname(dst) for _, dst in moves})
+    if dry_run:
+        for partition in partitions:
+            count = sum(1 for _, dst in moves if os.path.dirname(dst) == partition)
+            print(f"[移動予定] {partition}: {count}件")
+        result["moved"] = len(moves)
+        return result
+
+    for partition in partitions:
+        os.makedirs(partition, exist_ok=True)
+
+    def worker(move):
+        try:
+            outcome = move_to_partition(move)
+        except Exception as e:
+            print(f"[移動失敗] {move[0]}: {e}")
+            return "failed"
+        if outcome == "exists":
+            print(f"[警告] 移動先に同名のファイルがあるため残しました: {move[0]}")
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for outcome in executor.map(worker, moves):
+            result[outcome] += 1
+    return result
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="提出フォルダ直下のファイルを期間別サブフォルダ（YYYY-MM / YYYY-MM-DD）へ移動します。")
+    parser.add_argument("folders", nargs="*", default=[LOG_FOLDER, FACE_PHOTO_FOLDER],
+                        help="移動する提出フォルダ（既定: ブラウザログと顔写真のフォルダ）")
+    parser.add_argument("--layout", choices=[name for name in PARTITION_FORMATS if name != "flat"], default="month",
+                        help="サブフォルダの分け方（収集ツールの PARTITION_LAYOUT と合わせる。既定: month）")
+    parser.add_argument("--workers", type=int, default=MIGRATION_WORKERS,
+                        help=f"同時に移動する数（既定: {MIGRATION_WORKERS}）")
+    parser.add_argument("--dry-run", action="store_true", help="移動せずに移動先と件数だけを表示")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("====== 提出フォルダ 期間別サブフォルダ移行ツール ======")
+    for folder in args.folders:
+        print(f"\n[処理開始] {folder} の移行...")
+        result = migrate_folder(folder, args.layout, args.workers, args.dry_run)
+        if args.dry_run:
+            print(f"[確認完了] 移動予定 {result['moved']}件 / 対象外 {result['skipped']}件")
+        else:
+            print(f"[処理完了] 移動 {result['moved']}件 / 移動先に同名あり {result['exists']}件 / "
+                  f"失敗 {result['failed']}件 / 対象外 {result['skipped']}件")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from log_scanner import is_partition_name
+
+# アーカイブの同時実行数と、中断時に再開するための記録（ジャーナル）の保存先
+ARCHIVE_WORKERS = 8
+JOURNAL_DIR = ".archive_journal"
+PARTIAL_SUFFIX = ".partial"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def protect_latest_snapshots(catalog):
+    """アーカイブ対象から、PCごとの最新の全件ログとそれ以降の差分・ハートビートを除く
+
+    差分は提出フォルダ（期間別サブフォルダを含む）にある直近の全件ログから復元するため、これらは移動しない。
+    全件ログが1件もないPCの差分・ハートビートも移動しない。ブラウザログ以外はそのまま返す。
+    """
+    latest_full = {}
+    for info in catalog["files"]:
+        if info.get("format") and info["kind"] == "full":
+            current = latest_full.get(info["pc_name"])
+            if current is None or info["timestamp"] > current:
+                latest_full[info["pc_name"]] = info["timestamp"]
+
+    candidates = []
+    for info in catalog["archive_candidates"]:
+        if info.get("format"):
+            full_time = latest_full.get(info["pc_name"])
+            if full_time is None or info["timestamp"] >= full_time:
+                continue
+        candidates.append(info)
+    return candidates
+
+def build_tasks(candidates):
+    """移動する (元のパス, 移動先のパス) の組を作成（集計サマリーはログの直後に同じ場所へ）"""
+    tasks = []
+    for info in candidates:
+        pairs = [(info["original_path"], info["archive_path"])]
+        if info.get("summary_path"):
+            pairs.append((info["summary_path"], os.path.join(
+                os.path.dirname(info["archive_path"]), os.path.basename(info["summary_path"]))))
+        tasks.append({"filename": info["filename"], "pairs": pairs})
+    return tasks
+
+# ===== 1ファイルの移動 =====
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copy_with_hash(src, dst):
+    """コピーしながら元ファイルのハッシュを計算"""
+    digest = hashlib.sha256()
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for chunk in iter(lambda: fin.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            fout.write(chunk)
+    return digest.hexdigest()
+
+def same_volume(src, dst_dir):
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+def move_file(src, dst):
+    """ファイルを移動し (方法, バイト数) を返す
+
+    同じボリューム上ではサーバー側の名前変更（os.replace）で移動する。名前変更できない
+    場合は一時名でコピーし、サイズとハッシュが一致することを確認してから元ファイルを削除する。
+    """
+    size = os.path.getsize(src)
+    dst_dir = os.path.dirname(dst)
+    os.makedirs(dst_dir, exist_ok=True)
+
+    if same_volume(src, dst_dir):
+        try:
+            os.replace(src, dst)
+            return "rename", size
+        except OSError:
+            pass  # 共有フォルダをまたぐ場合などはコピーで移動
+
+    partial = dst + PARTIAL_SUFFIX
+    try:
+        src_hash = copy_with_hash(src, partial)
+        if os.path.getsize(partial) != size or file_hash(partial) != src_hash:
+            raise IOError(f"コピー後のサイズまたはハッシュが一致しません: {src}")
+        os.replace(partial, dst)
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.remove(src)
+    return "copy", size
+
+# ===== ジャーナル（中断した処理の再開用）=====
+def get_journal_path(archive_root, journal_dir=JOURNAL_DIR):
+    key = hashlib.sha1(os.path.abspath(archive_root).lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(journal_dir, f"{key}.jsonl")
+
+def load_journal(journal_path):
+    """前回中断した処理の未完了タスクを取得（完了済みは除く）"""
+    if not os.path.exists(journal_path):
+        return []
+    planned = {}
+    done = set()
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 書き込み途中で中断した行
+            if record["event"] == "plan":
+                planned[record["filename"]] = record["pairs"]
+            elif record["event"] == "done":
+                done.add(record["filename"])
+    return [{"filename": name, "pairs": [tuple(p) for p in pairs]}
+            for name, pairs in planned.items() if name not in done]
+
+class Journal:
+    def __init__(self, journal_path):
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        self.path = journal_path
+        self.lock = threading.Lock()
+        self.file = open(journal_path, "a", encoding="utf-8")
+
+    def write(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self, remove=False):
+        self.file.close()
+        if remove:
+            os.remove(self.path)
+
+# ===== アーカイブの実行 =====
+def run_task(task):
+    """1件分（ログと集計サマリー）を移動。前回の実行で移動済みのファイルは飛ばす"""
+    methods = []
+    moved_bytes = 0
+    for src, dst in task["pairs"]:
+        if not os.path.exists(src):
+            # 前回の実行で移動済み（移動先にもない場合は手動で削除されたものとして飛ばす）
+            if not os.path.exists(dst):
+                print(f"[警告] 移動元が見つかりません: {src}")
+            continue
+        method, size = move_file(src, dst)
+        methods.append(method)
+        moved_bytes += size
+    return methods, moved_bytes
+
+def remove_empty_partitions(tasks):
+    """移動によって空になった提出フォルダの期間別サブフォルダを削除"""
+    directories = {os.path.dirname(src) for task in tasks for src, _ in task["pairs"]}
+    for directory in sorted(directories):
+        if is_partition_name(os.path.basename(directory)):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass  # まだファイルが残っている
+
+def archive_catalog(catalog, workers=ARCHIVE_WORKERS, journal_dir=JOURNAL_DIR):
+    """カタログのアーカイブ対象を並列に移動し、実行結果（件数・バイト数・所要時間など）を返す"""
+    start = time.perf_counter()
+    journal_path = get_journal_path(catalog["archive_root"], journal_dir)
+
+    # 前回中断した分を先に、今回の対象を後に（同じファイルは1回だけ）
+    resumed = load_journal(journal_path)
+    if resumed:
+        print(f"[再開] 前回中断したアーカイブ処理の残り{len(resumed)}件から再開します。")
+    seen = {task["filename"] for task in resumed}
+    tasks = resumed + [t for t in build_tasks(protect_latest_snapshots(catalog)) if t["filename"] not in seen]
+
+    stats = {"files": 0, "bytes": 0, "renamed": 0, "copied": 0, "failed": 0, "resumed": len(resumed)}
+    if not tasks:
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    journal = Journal(journal_path)
+    for task in tasks[len(resumed):]:
+        journal.write({"event": "plan", "filename": task["filename"], "pairs": task["pairs"]})
+
+    def worker(task):
+        try:
+            result = run_task(task)
+        except Exception as e:
+            print(f"[アーカイブ失敗] {task['filename']}: {e}")
+            return None
+        journal.write({"event": "done", "filename": task["filename"]})
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for result in executor.map(worker, tasks):
+            if result is None:
+                stats["failed"] += 1
+                continue
+            methods, moved_bytes = result
+            stats["files"] += 1
+            stats["bytes"] += moved_bytes
+            stats["renamed"] += methods.count("rename")
+            stats["copied"] += methods.count("copy")
+
+    remove_empty_partitions(tasks)
+
+    # すべて完了した場合のみジャーナルを削除（失敗分は次回再試行）
+    journal.close(remove=stats["failed"] == 0)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def format_stats(stats):
+    """実行結果を表示用の文字列にする"""
+    megabytes = stats["bytes"] / 1024 / 1024
+    throughput = megabytes / stats["seconds"] if stats["seconds"] > 0 else 0
+    return (f"{stats['files']}件 / {megabytes:.1f}MB を移動（{stats['seconds']:.1f}秒、{throughput:.1f}MB/秒、"
+            f"名前変更 {stats['renamed']}件・コピー {stats['copied']}件、失敗 {stats['failed']}件）")
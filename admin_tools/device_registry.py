@@ -0,0 +1,195 @@
+import os
+import gc
+import csv
+import pickle
+import hashlib
+import tempfile
+
+# 台帳の解析結果（キャッシュ）の保存先
+REGISTRY_CACHE_DIR = ".registry_cache"
+REGISTRY_CACHE_VERSION = 1
+
+# 台帳の列名（OS・部署・取得日時は任意）
+REGISTRY_COLUMNS = {
+    "pc_name": "PC名",
+    "user_name": "使用者",
+    "os": "OS",
+    "department": "部署",
+    "acquired_at": "取得日時"
+}
+
+class DeviceRecord:
+    """台帳の1行（従来の辞書と同じく record["使用者"] や record.get("OS", "") でも参照できる）"""
+
+    __slots__ = ("pc_name", "user_name", "os", "department", "acquired_at")
+
+    FIELDS = {column: field for field, column in REGISTRY_COLUMNS.items()}
+
+    def __init__(self, pc_name, user_name, os="", department="", acquired_at=""):
+        self.pc_name = pc_name
+        self.user_name = user_name
+        self.os = os
+        self.department = department
+        self.acquired_at = acquired_at
+
+    def __getitem__(self, column):
+        return getattr(self, self.FIELDS[column])
+
+    def get(self, column, default=None):
+        field = self.FIELDS.get(column)
+        return default if field is None else getattr(self, field)
+
+    def __repr__(self):
+        return f"DeviceRecord({self.pc_name!r}, {self.user_name!r}, os={self.os!r}, department={self.department!r})"
+
+class DeviceRegistry:
+    """端末台帳（PC名 → DeviceRecord）と、使用者・OS・部署から PC名 を引く索引
+
+    台帳は列ごとのリストで保持し、PC名から行位置を引く辞書と索引はキャッシュに含める。
+    DeviceRecord は参照時に作成するため、大きな台帳でも読み込みは索引の復元だけで済む。
+    PC名をキーとする辞書と同じように len / in / [] / items() などで扱える。
+    同じPC名が複数行ある場合は従来どおり後の行で上書きする（並び順は最初の行）。
+    """
+
+    INDEX_FIELDS = {"by_user": "user_name", "by_os": "os", "by_department": "department"}
+
+    def __init__(self, columns, positions=None, indexes=None):
+        self.columns = columns
+        if positions is None:
+            positions = {}
+            for i, pc_name in enumerate(columns["pc_name"]):
+                positions[pc_name] = i
+        self.positions = positions
+        if indexes is None:
+            indexes = {name: self.build_index(field) for name, field in self.INDEX_FIELDS.items()}
+        self.indexes = indexes
+        self.by_user = indexes["by_user"]
+        self.by_os = indexes["by_os"]
+        self.by_department = indexes["by_department"]
+
+    def build_index(self, field):
+        index = {}
+        values = self.columns[field]
+        for pc_name, i in self.positions.items():
+            index.setdefault(values[i] or "", []).append(pc_name)
+        return index
+
+    def record_at(self, i):
+        return DeviceRecord(*(self.columns[field][i] for field in REGISTRY_COLUMNS))
+
+    def pcs_for_user(self, user_name):
+        return self.by_user.get(user_name, [])
+
+    def pcs_for_os(self, os_name):
+        return self.by_os.get(os_name, [])
+
+    def pcs_for_department(self, department):
+        return self.by_department.get(department, [])
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __contains__(self, pc_name):
+        return pc_name in self.positions
+
+    def __getitem__(self, pc_name):
+        return self.record_at(self.positions[pc_name])
+
+    def get(self, pc_name, default=None):
+        i = self.positions.get(pc_name)
+        return default if i is None else self.record_at(i)
+
+    def keys(self):
+        return self.positions.keys()
+
+    def values(self):
+        return (self.record_at(i) for i in self.positions.values())
+
+    def items(self):
+        return ((pc_name, self.record_at(i)) for pc_name, i in self.positions.items())
+
+def parse_registry_csv(csv_path):
+    """台帳CSVを列ごとのリストに変換（使用者の列がない場合は KeyError）"""
+    columns = {field: [] for field in REGISTRY_COLUMNS}
+    # 同じ値を同じ文字列オブジェクトにまとめる（キャッシュが小さくなり、読み込みも速い）
+    shared = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = {column: i for i, column in enumerate(header)}
+        for column in ("PC名", "使用者"):
+            if column not in positions:
+                raise KeyError(column)
+        for row in reader:
+            if not row:
+                continue
+            for field, column in REGISTRY_COLUMNS.items():
+                i = positions.get(column)
+                # 列がない場合は空文字、行の途中で値が切れている場合は None（csv.DictReader と同じ）
+                value = "" if i is None else (row[i] if i < len(row) else None)
+                columns[field].append(shared.setdefault(value, value))
+    return columns
+
+def get_cache_path(csv_path, cache_dir=REGISTRY_CACHE_DIR):
+    """台帳ごとのキャッシュファイルのパスを取得"""
+    key = hashlib.sha1(os.path.abspath(csv_path).lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.pickle")
+
+def load_cached_registry(cache_path, stat):
+    """台帳の更新日時・サイズが一致する場合のみキャッシュから復元"""
+    if not os.path.exists(cache_path):
+        return None
+    # 大量の辞書・リストを復元する間はガベージコレクションを止める
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != REGISTRY_CACHE_VERSION:
+            return None
+        if data.get("mtime_ns") != stat.st_mtime_ns or data.get("size") != stat.st_size:
+            return None
+        return DeviceRegistry(data["columns"], data["positions"], data["indexes"])
+    except Exception as e:
+        print(f"[警告] 台帳キャッシュを読み込めませんでした（再作成します）: {e}")
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def save_cached_registry(cache_path, stat, registry):
+    """キャッシュを一時ファイル経由でアトミックに保存"""
+    directory = os.path.dirname(cache_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".registry_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({
+                "version": REGISTRY_CACHE_VERSION,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "columns": registry.columns,
+                "positions": registry.positions,
+                "indexes": registry.indexes
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_device_registry(csv_path, cache_dir=REGISTRY_CACHE_DIR):
+    """端末台帳を読み込む（台帳が更新されていなければキャッシュから復元）"""
+    stat = os.stat(csv_path)
+    cache_path = get_cache_path(csv_path, cache_dir)
+    registry = load_cached_registry(cache_path, stat)
+    if registry is None:
+        registry = DeviceRegistry(parse_registry_csv(csv_path))
+        try:
+            save_cached_registry(cache_path, stat, registry)
+        except Exception as e:
+            print(f"[警告] 台帳キャッシュの保存に失敗しました: {e}")
+    return registry
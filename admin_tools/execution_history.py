@@ -0,0 +1,332 @@
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+import pandas as pd
+
+# 実行履歴の列定義
+HISTORY_COLUMNS = ["PC名", "使用者", "ブラウザ情報実行日時", "顔写真実行日時", "拡張機能数", "最終確認日"]
+
+# SQLite で実行日時から年月を取り出す式と、年月を取り出せる行の条件（year_month と同じ判定）
+YEAR_MONTH_SQL = "substr(executed_at, 1, 4) || '-' || substr(executed_at, 6, 2)"
+YEAR_MONTH_FILTER_SQL = "executed_at GLOB '[0-9][0-9][0-9][0-9][-/][0-9][0-9]*'"
+
+def year_month(value):
+    """実行日時（"YYYY-MM-DD HH:MM:SS" など）から年月 "YYYY-MM" を取り出す（日時でない値は None）"""
+    if not isinstance(value, str) or len(value) < 7 or value[4] not in "-/":
+        return None
+    if not (value[:4].isdigit() and value[5:7].isdigit()):
+        return None
+    return f"{value[:4]}-{value[5:7]}"
+
+def empty_history():
+    """空の実行履歴を作成"""
+    return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+def read_history_csv(path):
+    """実行履歴CSVを読み込む（存在しない場合は空の履歴）"""
+    if os.path.exists(path):
+        try:
+            return pd.read_csv(path, encoding='utf-8')
+        except Exception as e:
+            print(f"[エラー] 実行履歴の読み込みに失敗しました: {e}")
+    return empty_history()
+
+def write_history_csv(history_df, path):
+    """実行履歴CSVを一時ファイル経由でアトミックに書き込む"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".history_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            history_df.to_csv(f, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def upsert_history(history_df, updates, now=None):
+    """PC名をキーに実行履歴へ更新内容を一括反映（upsert）
+
+    updates は PC名・使用者・ブラウザ情報実行日時・顔写真実行日時・拡張機能数 を
+    持つ辞書のリストまたはDataFrame。既存PCは1件ずつ更新した場合と同じ規則で
+    上書きし、未登録のPCは末尾に追加する。
+    """
+    if now is None:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    updates_df = pd.DataFrame(updates, columns=HISTORY_COLUMNS[:5])
+    if updates_df.empty:
+        return history_df
+    updates_df = updates_df.drop_duplicates("PC名", keep="last").set_index("PC名")
+
+    history_df = history_df.copy()
+    for col in HISTORY_COLUMNS:
+        if col not in history_df.columns:
+            history_df[col] = pd.Series(dtype=object)
+    for col in ["ブラウザ情報実行日時", "顔写真実行日時", "最終確認日"]:
+        history_df[col] = history_df[col].astype(object)
+
+    # 既存エントリの更新（同一PC名が複数ある場合は従来どおり先頭行のみ）
+    first_rows = ~history_df["PC名"].duplicated(keep="first")
+    matched = first_rows & history_df["PC名"].isin(updates_df.index)
+    keys = history_df.loc[matched, "PC名"]
+
+    browser_times = keys.map(updates_df["ブラウザ情報実行日時"])
+    has_browser = browser_times.notna() & (browser_times != "")
+    browser_idx = browser_times.index[has_browser]
+    history_df.loc[browser_idx, "ブラウザ情報実行日時"] = browser_times[has_browser]
+    history_df.loc[browser_idx, "拡張機能数"] = keys.map(updates_df["拡張機能数"])[has_browser]
+
+    face_times = keys.map(updates_df["顔写真実行日時"])
+    has_face = face_times.notna() & (face_times != "")
+    history_df.loc[face_times.index[has_face], "顔写真実行日時"] = face_times[has_face]
+
+    history_df.loc[matched, "最終確認日"] = now
+
+    # 新規エントリの追加
+    new_rows = updates_df[~updates_df.index.isin(history_df["PC名"])].reset_index()
+    if not new_rows.empty:
+        new_rows["ブラウザ情報実行日時"] = new_rows["ブラウザ情報実行日時"].fillna("")
+        new_rows["顔写真実行日時"] = new_rows["顔写真実行日時"].fillna("")
+        new_rows["最終確認日"] = now
+        history_df = pd.concat([history_df, new_rows[HISTORY_COLUMNS]], ignore_index=True)
+
+    return history_df
+
+class CsvHistoryStore:
+    """実行履歴CSV（PCごとに最新1行）をそのまま保存先とするバックエンド"""
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+
+    def record(self, updates, now=None):
+        """更新内容を反映して書き込む"""
+        history_df = upsert_history(read_history_csv(self.csv_path), updates, now)
+        write_history_csv(history_df, self.csv_path)
+        return history_df
+
+    def latest_per_pc(self):
+        """PCごとの最新の実行状況を取得"""
+        return read_history_csv(self.csv_path)
+
+    def monthly_counts(self, kind):
+        """月別の実行数を取得（kind は "browser" または "photo"）"""
+        counts = {}
+        for _, row_kind, ym, n in self.monthly_counts_by_pc():
+            if row_kind == kind:
+                counts[ym] = counts.get(ym, 0) + n
+        return pd.Series(dict(sorted(counts.items())), dtype="int64")
+
+    def monthly_counts_by_pc(self):
+        """PC・種類・年月ごとの実行数を (PC名, 種類, 年月, 件数) のリストで取得
+
+        日時の列は文字列の先頭から年月を取り出す（列全体を日時型に変換しない）。
+        """
+        history_df = self.latest_per_pc()
+        rows = []
+        for kind, column in (("browser", "ブラウザ情報実行日時"), ("photo", "顔写真実行日時")):
+            for pc_name, value in zip(history_df["PC名"].tolist(), history_df[column].tolist()):
+                ym = year_month(value)
+                if ym is not None:
+                    rows.append((str(pc_name), kind, ym, 1))
+        return rows
+
+    def export_csv(self, path=None):
+        """実行履歴をCSVに出力"""
+        path = path or self.csv_path
+        if os.path.abspath(path) != os.path.abspath(self.csv_path):
+            write_history_csv(self.latest_per_pc(), path)
+        return path
+
+    def close(self):
+        pass
+
+class SqliteHistoryStore:
+    """実行ごとの行を追記していくSQLiteバックエンド
+
+    executions に実行（ブラウザ情報・顔写真）1回につき1行を追記し、
+    checks にPCごとの最終確認日を保持する。PC名・使用者・実行日時に
+    インデックスを張り、最新状況や月別件数をインデックスで引けるようにする。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS executions (
+            id INTEGER PRIMARY KEY,
+            pc_name TEXT NOT NULL,
+            user_name TEXT,
+            kind TEXT NOT NULL,
+            executed_at TEXT NOT NULL,
+            extension_count INTEGER,
+            recorded_at TEXT NOT NULL,
+            UNIQUE (pc_name, kind, executed_at)
+        );
+        CREATE INDEX IF NOT EXISTS idx_executions_user ON executions (user_name);
+        CREATE INDEX IF NOT EXISTS idx_executions_kind_time ON executions (kind, executed_at);
+        CREATE TABLE IF NOT EXISTS checks (
+            pc_name TEXT PRIMARY KEY,
+            user_name TEXT,
+            last_checked TEXT
+        );
+    """
+
+    LATEST_QUERY = """
+        SELECT
+            c.pc_name AS "PC名",
+            c.user_name AS "使用者",
+            b.executed_at AS "ブラウザ情報実行日時",
+            (SELECT executed_at FROM executions
+              WHERE pc_name = c.pc_name AND kind = 'photo'
+              ORDER BY executed_at DESC LIMIT 1) AS "顔写真実行日時",
+            COALESCE(b.extension_count, 0) AS "拡張機能数",
+            c.last_checked AS "最終確認日"
+        FROM checks AS c
+        LEFT JOIN executions AS b ON b.id = (
+            SELECT id FROM executions
+             WHERE pc_name = c.pc_name AND kind = 'browser'
+             ORDER BY executed_at DESC LIMIT 1)
+        ORDER BY c.rowid
+    """
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        is_new = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(self.SCHEMA)
+        # 初回は既存の実行履歴CSVを取り込む
+        if is_new and csv_path and os.path.exists(csv_path):
+            self.import_csv(csv_path)
+
+    def import_csv(self, csv_path):
+        """既存の実行履歴CSVを取り込む"""
+        history_df = read_history_csv(csv_path)
+        history_df = history_df.astype(object).where(history_df.notna(), None)
+        with self.conn:
+            for row in history_df.to_dict("records"):
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO checks (pc_name, user_name, last_checked) VALUES (?, ?, ?)",
+                    (str(row["PC名"]), row["使用者"], row["最終確認日"]))
+                if row["ブラウザ情報実行日時"]:
+                    count = row["拡張機能数"]
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO executions (pc_name, user_name, kind, executed_at, extension_count, recorded_at) "
+                        "VALUES (?, ?, 'browser', ?, ?, ?)",
+                        (str(row["PC名"]), row["使用者"], row["ブラウザ情報実行日時"],
+                         int(count) if count is not None else None, row["最終確認日"] or ""))
+                if row["顔写真実行日時"]:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO executions (pc_name, user_name, kind, executed_at, extension_count, recorded_at) "
+                        "VALUES (?, ?, 'photo', ?, NULL, ?)",
+                        (str(row["PC名"]), row["使用者"], row["顔写真実行日時"], row["最終確認日"] or ""))
+        print(f"[取り込み完了] 実行履歴CSV → {self.db_path} ({len(history_df)}件)")
+
+    def record(self, updates, now=None):
+        """更新内容を追記する（同じ実行の重複登録は無視）"""
+        if now is None:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        updates_df = pd.DataFrame(updates, columns=HISTORY_COLUMNS[:5])
+        updates_df = updates_df.astype(object).where(updates_df.notna(), None)
+        rows = updates_df.to_dict("records")
+
+        browser_rows = [
+            (r["PC名"], r["使用者"], r["ブラウザ情報実行日時"], int(r["拡張機能数"] or 0), now)
+            for r in rows if r["ブラウザ情報実行日時"]
+        ]
+        photo_rows = [
+            (r["PC名"], r["使用者"], r["顔写真実行日時"], now)
+            for r in rows if r["顔写真実行日時"]
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO executions (pc_name, user_name, kind, executed_at, extension_count, recorded_at) "
+                "VALUES (?, ?, 'browser', ?, ?, ?)", browser_rows)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO executions (pc_name, user_name, kind, executed_at, extension_count, recorded_at) "
+                "VALUES (?, ?, 'photo', ?, NULL, ?)", photo_rows)
+            # 使用者は初回登録時の値を保持する（CSV版と同じ規則）
+            self.conn.executemany(
+                "INSERT INTO checks (pc_name, user_name, last_checked) VALUES (?, ?, ?) "
+                "ON CONFLICT (pc_name) DO UPDATE SET last_checked = excluded.last_checked",
+                [(r["PC名"], r["使用者"], now) for r in rows])
+        return self.latest_per_pc()
+
+    def latest_per_pc(self):
+        """PCごとの最新の実行状況を取得"""
+        return pd.read_sql_query(self.LATEST_QUERY, self.conn)
+
+    def monthly_counts(self, kind):
+        """月別の実行数を取得（kind は "browser" または "photo"）"""
+        cursor = self.conn.execute(
+            f"SELECT {YEAR_MONTH_SQL} AS ym, COUNT(*) FROM executions "
+            f"WHERE kind = ? AND {YEAR_MONTH_FILTER_SQL} GROUP BY ym ORDER BY ym", (kind,))
+        counts = dict(cursor.fetchall())
+        return pd.Series(counts, dtype="int64")
+
+    def monthly_counts_by_pc(self):
+        """PC・種類・年月ごとの実行数を (PC名, 種類, 年月, 件数) のリストで取得（日時でない行は含めない）"""
+        cursor = self.conn.execute(
+            f"SELECT pc_name, kind, {YEAR_MONTH_SQL} AS ym, COUNT(*) FROM executions "
+            f"WHERE {YEAR_MONTH_FILTER_SQL} GROUP BY pc_name, kind, ym")
+        return cursor.fetchall()
+
+    def runs_for_pc(self, pc_name):
+        """指定PCの全実行を取得"""
+        return pd.read_sql_query(
+            "SELECT kind, executed_at, user_name, extension_count, recorded_at FROM executions "
+            "WHERE pc_name = ? ORDER BY executed_at", self.conn, params=(pc_name,))
+
+    def runs_for_user(self, user_name):
+        """指定使用者の全実行を取得"""
+        return pd.read_sql_query(
+            "SELECT pc_name, kind, executed_at, extension_count, recorded_at FROM executions "
+            "WHERE user_name = ? ORDER BY executed_at", self.conn, params=(user_name,))
+
+    def export_csv(self, path=None):
+        """従来の実行履歴CSVと同じ列で出力"""
+        path = path or self.csv_path
+        write_history_csv(self.latest_per_pc().fillna(""), path)
+        return path
+
+    def close(self):
+        self.conn.close()
+
+def open_history_store(backend, csv_path, db_path=None, read_only=False):
+    """設定に応じた実行履歴バックエンドを開く
+
+    read_only=True の場合はデータベースを新たに作成しない（まだない場合は実行履歴CSVから読む）。
+    CSVの取り込みは、実行履歴を書き込む CompareDeviceLogs.py で開いたときに行う。
+    """
+    if backend == "sqlite":
+        if read_only and not os.path.exists(db_path):
+            return CsvHistoryStore(csv_path)
+        return SqliteHistoryStore(db_path, csv_path)
+    if backend == "csv":
+        return CsvHistoryStore(csv_path)
+    raise ValueError(f"不明な実行履歴バックエンド: {backend}")
+
+class HistoryBatch:
+    """PCごとの実行履歴の更新をメモリ上に蓄積し、最後に一括で書き込む"""
+
+    def __init__(self, store):
+        self.store = store
+        self.updates = []
+
+    def add(self, pc_name, user_name, browser_info_time, face_photo_time, extension_count):
+        """1台分の更新内容を追加"""
+        self.updates.append({
+            "PC名": pc_name,
+            "使用者": user_name,
+            "ブラウザ情報実行日時": browser_info_time,
+            "顔写真実行日時": face_photo_time,
+            "拡張機能数": extension_count
+        })
+
+    def __len__(self):
+        return len(self.updates)
+
+    def commit(self):
+        """蓄積した更新をバックエンドに1回で反映"""
+        history_df = self.store.record(self.updates)
+        self.updates = []
+        return history_df
@@ -0,0 +1,154 @@
+import re
+import functools
+from collections import namedtuple
+from datetime import datetime
+
+# ブラウザログの保存形式ごとのファイル名末尾（長いものから判定）
+LOG_FORMAT_SUFFIXES = [
+    (".jsonl.gz", "jsonl.gz"),
+    (".jsonl.zst", "jsonl.zst"),
+    (".col.json", "columnar"),
+    (".json", "json")
+]
+LOG_EXTENSIONS = tuple(suffix for suffix, _ in LOG_FORMAT_SUFFIXES)
+PHOTO_EXTENSION = ".jpg"
+
+# 差分送信のログの種類を表すファイル名の印（全件ログには付かない）
+LOG_KIND_MARKERS = [
+    (".delta", "delta"),
+    (".heartbeat", "heartbeat")
+]
+
+# ログに付随する集計サマリーのファイル名末尾
+SUMMARY_SUFFIX = ".summary.json"
+
+# 種類の印・拡張子ごとの保存形式（顔写真は None）
+KIND_BY_MARKER = dict([(marker, kind) for marker, kind in LOG_KIND_MARKERS] + [(".summary", "summary")])
+FORMAT_BY_SUFFIX = dict(LOG_FORMAT_SUFFIXES + [(PHOTO_EXTENSION, None)])
+
+# ファイル名の日時以降（_YYYY-MM-DD_HHMMSS[.種類].拡張子、顔写真は _YYYYMMDD_HHMMSS.jpg）
+# 最後の "_" から固定長だけ戻った位置で照合し末尾まで一致させるため、バックトラックは起きない
+NAME_PATTERN = re.compile(
+    r"_(\d{4}-\d{2}-\d{2}|\d{8})_(\d{6})"
+    r"(" + "|".join(re.escape(marker) for marker in KIND_BY_MARKER) + r")?"
+    r"(" + "|".join(re.escape(suffix) for suffix in FORMAT_BY_SUFFIX) + r")\Z",
+    re.ASCII
+)
+LOG_DATE_WIDTH = len("_2024-05-01")
+PHOTO_DATE_WIDTH = len("_20240501")
+
+# 同じファイル名の解析結果を再利用する件数
+PARSE_CACHE_SIZE = 1 << 17
+
+# 解析できなかった理由
+FAILURE_REASONS = {
+    "extension": "対象外の拡張子",
+    "timestamp": "日時の形式が異なる",
+    "date": "存在しない日時",
+    "owner": "PC名・使用者がない"
+}
+
+# 解析結果。kind は full / delta / heartbeat / summary（顔写真は full）、format は保存形式（集計サマリーは json、顔写真は None）
+ParsedName = namedtuple("ParsedName", ["pc_name", "user_name", "timestamp", "kind", "format"])
+
+def split_log_name(filename):
+    """ブラウザログのファイル名を (基本名, 種類, 形式) に分ける
+
+    例: PC_user_2024-05-01_120000.delta.jsonl.gz → (PC_user_2024-05-01_120000, delta, jsonl.gz)
+    ブラウザログとして認識できない場合、形式は None になる。
+    """
+    stem, fmt = filename, None
+    for suffix, name in LOG_FORMAT_SUFFIXES:
+        if filename.endswith(suffix):
+            stem, fmt = filename[:-len(suffix)], name
+            break
+    for marker, kind in LOG_KIND_MARKERS:
+        if stem.endswith(marker):
+            return stem[:-len(marker)], kind, fmt
+    return stem, "full", fmt
+
+def split_log_kind(filename):
+    """ファイル名を全件ログ相当の名前（.json）と種類（full / delta / heartbeat）に分ける"""
+    stem, kind, fmt = split_log_name(filename)
+    if fmt is None:
+        return filename, kind
+    return stem + ".json", kind
+
+def match_name(filename):
+    """日時以降の部分を照合（ブラウザログ・顔写真の日付の幅で最後の "_" から戻った位置のみ）"""
+    last = filename.rfind("_")
+    for width in (LOG_DATE_WIDTH, PHOTO_DATE_WIDTH):
+        start = last - width
+        if start >= 0:
+            match = NAME_PATTERN.match(filename, start)
+            if match is not None:
+                return match
+    return None
+
+def diagnose(filename):
+    """ファイル名を解析し (ParsedName, None) または (None, 失敗理由) を返す"""
+    match = match_name(filename)
+    if match is None:
+        return None, "timestamp" if filename.endswith(tuple(FORMAT_BY_SUFFIX)) else "extension"
+    date, time, marker, suffix = match.groups()
+
+    fmt = FORMAT_BY_SUFFIX[suffix]
+    kind = KIND_BY_MARKER[marker] if marker else "full"
+    # 顔写真に種類の印はなく、集計サマリーは .summary.json のみ
+    if (fmt is None and marker) or (kind == "summary" and suffix != ".json"):
+        return None, "extension"
+    # ブラウザログは区切りあり（YYYY-MM-DD）、顔写真は区切りなし（YYYYMMDD）の日付のみ認める
+    if (fmt is None) == (len(date) == 10):
+        return None, "timestamp"
+    # 固定長のため位置で切り出し、ISO形式として変換する（strptime より速い）
+    if fmt is None:
+        date = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+    try:
+        timestamp = datetime.fromisoformat(f"{date}T{time[:2]}:{time[2:4]}:{time[4:]}")
+    except ValueError:
+        return None, "date"
+
+    # 使用者名にアンダースコアが含まれる場合もあるため、PC名は最初の区切りまで
+    pc_name, _, user_name = filename[:match.start()].partition("_")
+    if not pc_name or not user_name:
+        return None, "owner"
+    return ParsedName(pc_name, user_name, timestamp, kind, fmt), None
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_name(filename):
+    """ファイル名を解析して ParsedName を返す（解析できない場合は None）"""
+    return diagnose(filename)[0]
+
+def parse_filename(filename):
+    """ファイル名からPC名・ユーザー名・日時を取得（解析できない場合は ("", "", None)）"""
+    parsed = parse_name(filename)
+    if parsed is None:
+        return "", "", None
+    return parsed.pc_name, parsed.user_name, parsed.timestamp
+
+def tally_unparseable(filenames):
+    """解析できなかったファイルの件数を理由ごとに集計（理由 → 件数）"""
+    tally = {}
+    for filename in filenames:
+        if parse_name(filename) is None:
+            reason = diagnose(filename)[1]
+            tally[reason] = tally.get(reason, 0) + 1
+    return tally
+
+def format_tally(tally):
+    """集計結果を表示用の文字列にする"""
+    return "、".join(f"{FAILURE_REASONS[reason]} {count}件" for reason, count in tally.items())
+
+def resolve_pc_name(pc_name, user_name, pc_names):
+    """PC名にアンダースコアを含む端末について、台帳のPC名に合わせて (PC名, 使用者) を分け直す
+
+    pc_names はアンダースコアを含む台帳のPC名の集合。一致するものが複数ある場合は長い方を使う。
+    """
+    owner = f"{pc_name}_{user_name}"
+    end = len(owner)
+    while True:
+        end = owner.rfind("_", 0, end)
+        if end <= len(pc_name):
+            return pc_name, user_name
+        if owner[:end] in pc_names:
+            return owner[:end], owner[end + 1:]
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+from log_scanner import scan_folder, split_log_kind, parse_filename, partition_root, LOG_EXTENSIONS
+from log_reader import read_log_document
+
+# 正規化とハッシュは収集ツールと同じ実装（distribute/delta_upload.py）を使う（規則がずれると差分の起点が一致しなくなる）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "distribute"))
+from delta_upload import canonical_inventory, inventory_hash
+
+# フォルダごとの (一覧したファイル名の集合, PC別ログ一覧)（一覧にないログを求められるまで再スキャンしない）
+_folder_logs = {}
+_folder_lock = threading.Lock()
+
+def profiles_from_inventory(inventory):
+    """正規化した一覧を全件ログと同じ形式（プロファイルのリスト）に戻す"""
+    profiles = []
+    for key in sorted(inventory):
+        p = inventory[key]
+        profiles.append({
+            "browser": p["browser"],
+            "profile": p["profile"],
+            "user_name": p["user_name"],
+            "gaia_name": p["gaia_name"],
+            "extensions": [e for ext_id in sorted(p["extensions"]) for e in p["extensions"][ext_id]]
+        })
+    return profiles
+
+def apply_delta(inventory, delta):
+    """差分を適用した新しい一覧を返す"""
+    inventory = dict(inventory)
+    for change in delta.get("profiles", []):
+        key = f"{change['browser']}/{change['profile']}"
+        if change["status"] == "removed":
+            inventory.pop(key, None)
+            continue
+
+        before = inventory.get(key)
+        extensions = dict(before["extensions"]) if before and change["status"] == "changed" else {}
+        for ext_id in change.get("removed", []):
+            extensions.pop(ext_id, None)
+        replaced = {}
+        for ext in change.get("added", []) + change.get("updated", []):
+            replaced.setdefault(ext["id"], []).append(ext)
+        for ext_id, records in replaced.items():
+            extensions[ext_id] = sorted(records, key=lambda e: e["version"])
+
+        inventory[key] = {
+            "browser": change["browser"],
+            "profile": change["profile"],
+            "user_name": change.get("user_name", ""),
+            "gaia_name": change.get("gaia_name", ""),
+            "extensions": extensions
+        }
+    return inventory
+
+def rebuild_state(entries):
+    """1台分のログ一覧（時刻順）から最後の時点の全件を復元
+
+    最新の全件ログを起点に、その後の差分を順に適用する。差分の起点や
+    ハートビートのハッシュが一致しない場合（途中のファイルの欠落など）は
+    警告を表示し、次の全件ログまでは得られた範囲で復元する。
+    """
+    start = None
+    for i, entry in enumerate(entries):
+        if entry["kind"] == "full":
+            start = i
+    if start is None:
+        print(f"[警告] 全件ログが見つからないため差分のみから復元します: {entries[-1]['filename'] if entries else ''}")
+        inventory = {}
+        start = -1
+    else:
+        inventory = canonical_inventory(read_log_document(entries[start]["path"]))
+
+    for entry in entries[start + 1:]:
+        if entry["kind"] == "full":
+            continue
+        document = read_log_document(entry["path"])
+        current = inventory_hash(inventory)
+        if entry["kind"] == "delta":
+            if document.get("base") != current:
+                print(f"[警告] 差分の起点が一致しません（途中のログが欠落している可能性）: {entry['filename']}")
+            inventory = apply_delta(inventory, document)
+        elif document.get("hash") != current:
+            print(f"[警告] ハートビートの内容が復元結果と一致しません: {entry['filename']}")
+    return profiles_from_inventory(inventory)
+
+def get_pc_logs(folder, pc_name, filename=None):
+    """提出フォルダ内の指定PCのログ一覧（時刻順）を取得
+
+    期間別サブフォルダを渡した場合も提出フォルダ全体（他の期間を含む）から探す。
+    filename（復元するログのファイル名）が前回の一覧にない場合は、一覧以降に届いたログとみなして一覧し直す。
+    """
+    folder = partition_root(folder)
+    key = os.path.abspath(folder)
+    with _folder_lock:
+        cached = _folder_logs.get(key)
+        if cached is None or (filename is not None and filename not in cached[0]):
+            names = set()
+            grouped = {}
+            for entry in scan_folder(folder, LOG_EXTENSIONS):
+                names.add(entry["filename"])
+                if entry["timestamp"]:
+                    grouped.setdefault(entry["pc_name"], []).append(entry)
+            for logs in grouped.values():
+                logs.sort(key=lambda e: e["timestamp"])
+            cached = _folder_logs[key] = (names, grouped)
+    return cached[1].get(pc_name, [])
+
+def load_log_state(log_file_path):
+    """ログファイル時点の全件（プロファイルのリスト）を取得
+
+    全件ログはそのまま読み込み、差分・ハートビートは同じPCの過去のログから復元する。
+    """
+    filename = os.path.basename(log_file_path)
+    _, kind = split_log_kind(filename)
+    if kind == "full":
+        return read_log_document(log_file_path)
+
+    pc_name, _, timestamp = parse_filename(filename)
+    entries = [e for e in get_pc_logs(os.path.dirname(log_file_path), pc_name, filename)
+               if timestamp is None or e["timestamp"] <= timestamp]
+    return rebuild_state(entries)
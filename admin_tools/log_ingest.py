@@ -0,0 +1,60 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from log_scanner import SUMMARY_SUFFIX, split_log_kind
+from run_report import count_file
+
+# 同時に読み込むファイル数の既定値
+DEFAULT_WORKERS = 8
+
+def iter_ingest(paths_by_key, reader, workers=DEFAULT_WORKERS):
+    """ファイルを並列に読み込み、完了したものから (キー, 結果) を返す
+
+    共有フォルダの待ち時間を重ねるためのスレッドプール。処理中のファイル数は
+    workers の2倍までに抑え、結果を溜め込まずに順次返す。
+    reader はファイルパスを受け取り結果を返す関数で、エラーの報告は reader 側で行う。
+    """
+    workers = max(1, int(workers))
+    items = iter(paths_by_key.items())
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def submit_next():
+            for key, path in items:
+                pending[executor.submit(reader, path)] = key
+                return True
+            return False
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                submit_next()
+                yield key, future.result()
+
+def ingest_logs(paths_by_key, reader, workers=DEFAULT_WORKERS):
+    """ファイルを並列に読み込み、キーごとの結果を辞書で返す"""
+    return dict(iter_ingest(paths_by_key, reader, workers))
+
+def get_summary_path(log_path):
+    """ログファイルに対応する集計サマリーのパスを取得"""
+    base, _ = split_log_kind(log_path)
+    base = base[:-len(".json")] if base.endswith(".json") else base
+    return base + SUMMARY_SUFFIX
+
+def read_log_summary(log_path):
+    """集計サマリーを読み込む（存在しない・不正な場合は None）"""
+    summary_path = get_summary_path(log_path)
+    try:
+        with open(summary_path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        if "extension_count" not in summary:
+            return None
+        count_file(summary_path, "summaries_read")
+        return summary
+    except (OSError, ValueError):
+        return None
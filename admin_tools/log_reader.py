@@ -0,0 +1,81 @@
+import os
+import json
+import gzip
+from log_scanner import split_log_name
+from run_report import count_file
+
+# 圧縮形式の先頭バイト（拡張子で判定できない場合に使用）
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def detect_log_format(log_file_path):
+    """ブラウザログの保存形式を判定"""
+    _, _, fmt = split_log_name(os.path.basename(log_file_path))
+    if fmt is not None:
+        return fmt
+    with open(log_file_path, "rb") as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return "jsonl.gz"
+    if head.startswith(ZSTD_MAGIC):
+        return "jsonl.zst"
+    return "json"
+
+def open_zstd_text(log_file_path):
+    """zstd圧縮ファイルをテキストとして開く"""
+    try:
+        from compression import zstd  # Python 3.14 以降
+        return zstd.open(log_file_path, "rt", encoding="utf-8")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd形式のログを読むには zstandard パッケージが必要です")
+    return zstandard.open(log_file_path, "rt", encoding="utf-8")
+
+def open_log_text(log_file_path, fmt=None):
+    """保存形式に応じてログをテキストとして開く"""
+    fmt = fmt or detect_log_format(log_file_path)
+    if fmt == "jsonl.gz":
+        return gzip.open(log_file_path, "rt", encoding="utf-8")
+    if fmt == "jsonl.zst":
+        return open_zstd_text(log_file_path)
+    return open(log_file_path, "r", encoding="utf-8")
+
+def expand_columnar(document):
+    """辞書表形式をプロファイルのリストに戻す"""
+    fields = document["fields"]
+    table = [dict(zip(fields, row)) for row in document["extensions"]]
+    profiles = []
+    for p in document["profiles"]:
+        prof = {k: v for k, v in p.items() if k != "extensions"}
+        prof["extensions"] = [dict(table[i]) for i in p["extensions"]]
+        profiles.append(prof)
+    return profiles
+
+def iter_jsonl(log_file_path, fmt=None):
+    """JSON Lines 形式のログを1行ずつ読み込む"""
+    with open_log_text(log_file_path, fmt) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_log_document(log_file_path):
+    """形式を判定してログを読み込む
+
+    全件ログはプロファイルのリスト、差分・ハートビートは辞書を返す。
+    """
+    _, kind, _ = split_log_name(os.path.basename(log_file_path))
+    fmt = detect_log_format(log_file_path)
+    if fmt in ("jsonl.gz", "jsonl.zst"):
+        records = list(iter_jsonl(log_file_path, fmt))
+        count_file(log_file_path)
+        return records if kind == "full" else records[0]
+
+    with open(log_file_path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    count_file(log_file_path)
+    if isinstance(document, dict) and document.get("format") == "columnar":
+        return expand_columnar(document)
+    return document
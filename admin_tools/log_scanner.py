@@ -0,0 +1,152 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from run_report import count
+# ファイル名の解析は filename_parser にまとめている（従来どおりこのモジュールからも参照できる）
+from filename_parser import (
+    parse_filename, split_log_name, split_log_kind,
+    LOG_FORMAT_SUFFIXES, LOG_EXTENSIONS, LOG_KIND_MARKERS, SUMMARY_SUFFIX
+)
+
+# スキャン結果（マニフェスト）の保存先
+MANIFEST_DIR = ".scan_manifest"
+MANIFEST_VERSION = 4
+
+# 提出フォルダの期間別サブフォルダ（YYYY-MM または YYYY-MM-DD）
+PARTITION_PATTERN = re.compile(r"\d{4}-\d{2}(-\d{2})?$")
+
+def is_partition_name(name):
+    """期間別サブフォルダの名前かどうか"""
+    return PARTITION_PATTERN.match(name) is not None
+
+def partition_root(folder):
+    """期間別サブフォルダであれば提出フォルダ（1つ上）を返す"""
+    folder = os.path.normpath(folder)
+    if is_partition_name(os.path.basename(folder)):
+        return os.path.dirname(folder)
+    return folder
+
+def partition_overlaps(name, since):
+    """期間別サブフォルダに since 以降のファイルが含まれうるか（名前だけで判定）"""
+    return name >= since.strftime("%Y-%m-%d")[:len(name)]
+
+def get_manifest_path(folder, manifest_dir=MANIFEST_DIR):
+    """フォルダごとのマニフェストファイルのパスを取得"""
+    key = hashlib.sha1(os.path.abspath(folder).lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(manifest_dir, f"{key}.json")
+
+def load_manifest(manifest_path, folder):
+    """マニフェストを読み込む（存在しない・不正な場合は空）"""
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION or data.get("folder") != os.path.abspath(folder):
+            return {}
+        return data.get("entries", {})
+    except Exception as e:
+        print(f"[警告] スキャンマニフェストを読み込めませんでした（再作成します）: {e}")
+        return {}
+
+def save_manifest(manifest_path, folder, entries):
+    """マニフェストを一時ファイル経由でアトミックに保存"""
+    directory = os.path.dirname(manifest_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "folder": os.path.abspath(folder),
+                "entries": entries
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, manifest_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def scan_folder(folder, file_extension, manifest_dir=MANIFEST_DIR, since=None):
+    """提出フォルダを差分スキャンしてファイル情報の一覧を取得
+
+    フォルダ直下と期間別サブフォルダ（YYYY-MM / YYYY-MM-DD）を対象とし、
+    サブフォルダごとにマニフェストを持つ。since（datetime）を指定した場合は、
+    名前から since 以降のファイルを含みうると判断できるサブフォルダだけを一覧し、
+    日時が since 以降のファイルだけを返す（直下は分ける前のファイルのため常に一覧する）。
+    戻り値の形式は scan_directory と同じ。
+    """
+    files, partitions = scan_directory(folder, file_extension, manifest_dir)
+    for name in sorted(partitions):
+        if since is None or partition_overlaps(name, since):
+            files.extend(scan_directory(os.path.join(folder, name), file_extension, manifest_dir)[0])
+    if since is not None:
+        files = [f for f in files if f["timestamp"] and f["timestamp"] >= since]
+    return files
+
+def scan_directory(folder, file_extension, manifest_dir=MANIFEST_DIR):
+    """1つのフォルダを差分スキャンして (ファイル情報の一覧, 期間別サブフォルダ名の一覧) を取得
+
+    前回までに解析したファイル名・更新日時・サイズ・解析結果をマニフェストに
+    保持し、新規または変更されたファイルだけを解析する。更新日時・サイズは
+    os.scandir が一覧取得時に返す情報を使う。
+    file_extension は拡張子の文字列またはタプル（ブラウザログは LOG_EXTENSIONS）。
+    ファイル情報は filename, kind, format, path, summary_path, mtime, size, pc_name,
+    user_name, timestamp を持つ辞書（一覧取得順）。kind はログの種類
+    （full / delta / heartbeat）、format は保存形式（ブラウザログ以外は None）、
+    summary_path は集計サマリーが同じフォルダにある場合のみ設定される。
+    """
+    manifest_path = get_manifest_path(folder, manifest_dir)
+    cached = load_manifest(manifest_path, folder)
+    entries = {}
+    partitions = []
+    parsed_count = 0
+
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.is_file():
+                if is_partition_name(entry.name) and entry.is_dir():
+                    partitions.append(entry.name)
+                continue
+            stat = entry.stat()
+            mtime = stat.st_mtime
+            size = stat.st_size
+            record = cached.get(entry.name)
+            if record is None or record[0] != mtime or record[1] != size:
+                pc_name, user_name, timestamp = parse_filename(entry.name)
+                record = [mtime, size, pc_name, user_name, timestamp.isoformat() if timestamp else None]
+                parsed_count += 1
+            entries[entry.name] = record
+
+    count("files_listed", len(entries))
+    count("names_parsed", parsed_count)
+
+    # 追加・変更・削除があった場合のみマニフェストを保存
+    if parsed_count or len(entries) != len(cached):
+        try:
+            save_manifest(manifest_path, folder, entries)
+        except Exception as e:
+            print(f"[警告] スキャンマニフェストの保存に失敗しました: {e}")
+
+    files = []
+    for filename, (mtime, size, pc_name, user_name, timestamp) in entries.items():
+        if not filename.endswith(file_extension) or filename.endswith(SUMMARY_SUFFIX):
+            continue
+        stem, kind, fmt = split_log_name(filename)
+        summary_name = stem + SUMMARY_SUFFIX if fmt else None
+        files.append({
+            "filename": filename,
+            "kind": kind,
+            "format": fmt,
+            "path": os.path.join(folder, filename),
+            "summary_path": os.path.join(folder, summary_name) if summary_name in entries else None,
+            "mtime": mtime,
+            "size": size,
+            "pc_name": pc_name,
+            "user_name": user_name,
+            "timestamp": datetime.fromisoformat(timestamp) if timestamp else None
+        })
+    return files, partitions
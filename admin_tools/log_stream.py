@@ -0,0 +1,152 @@
+import json
+from log_reader import detect_log_format, iter_jsonl, read_log_document
+from run_report import count_file
+
+# 一度に読み込む文字数
+CHUNK_SIZE = 64 * 1024
+
+# 1つの値として読み足す最大文字数（壊れたファイルで終端まで読み続けないための上限）
+MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+class JsonStreamReader:
+    """ファイルを少しずつ読みながらJSONの値を順に取り出す簡易リーダー
+
+    バッファには未処理の部分だけを保持するため、メモリ使用量は
+    ファイル全体ではなく一度に取り出す値の大きさで決まる。
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE, max_value_size=MAX_VALUE_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        """バッファに追加で読み込む（処理済み部分は捨てる）"""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(size or 0, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """空白を読み飛ばし、次の1文字を返す（終端では空文字）"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch):
+        """次の文字が ch であることを確認して読み進める"""
+        actual = self.peek()
+        if actual != ch:
+            raise ValueError(f"'{ch}' が必要な位置に '{actual}' があります")
+        self.pos += 1
+
+    def value(self):
+        """次のJSONの値を1つ取り出す（壊れている場合は JSONDecodeError）"""
+        self.peek()
+        failed_at = None
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # 読み足しても同じ位置で失敗する場合は、値が途中で切れているのではなく壊れている
+                # （閉じていない文字列は先頭の位置で失敗するため、上限まで読み足して確認する）
+                position = (e.pos - self.pos, e.msg)
+                if position == failed_at and not e.msg.startswith("Unterminated string"):
+                    raise
+                failed_at = position
+                if len(self.buf) - self.pos >= self.max_value_size:
+                    raise json.JSONDecodeError(f"値が {self.max_value_size} 文字を超えています", e.doc, e.pos)
+                # 値が途中で切れている場合は読み足して再試行（読み込み量は倍々に増やす）
+                if not self._fill(min(len(self.buf) - self.pos, self.max_value_size)):
+                    raise
+                continue
+            # 数値などがバッファ末尾で切れている可能性があるため、読み足して確認
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def iter_array(self):
+        """配列の要素を位置だけ進めながら順に返す（要素の読み出しは呼び出し側）"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"配列の区切りに '{ch}' があります")
+
+    def iter_object(self):
+        """オブジェクトのキーを順に返す（値の読み出しは呼び出し側）"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"オブジェクトの区切りに '{ch}' があります")
+
+def iter_extension_records(log_file_path):
+    """ブラウザログを1件ずつ読みながら (プロファイル情報, 拡張機能) を返す
+
+    トップレベルのプロファイル配列と各プロファイルの extensions 配列を
+    順に読み進めるため、ファイル全体を展開しない。プロファイル情報には
+    extensions より前に現れた項目が入る（収集ツールは extensions を最後に出力する）。
+    JSON Lines 形式は1行（1プロファイル）ずつ、辞書表形式は読み込んでから返す。
+    """
+    fmt = detect_log_format(log_file_path)
+    if fmt in ("jsonl.gz", "jsonl.zst"):
+        # JSON Lines は1行が1プロファイル
+        for profile in iter_jsonl(log_file_path, fmt):
+            extensions = profile.pop("extensions", [])
+            for ext in extensions:
+                yield profile, ext
+        return
+    if fmt == "columnar":
+        for profile in read_log_document(log_file_path):
+            extensions = profile.pop("extensions", [])
+            for ext in extensions:
+                yield profile, ext
+        return
+
+    with open(log_file_path, "r", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for _ in reader.iter_array():
+            profile = {}
+            for key in reader.iter_object():
+                if key == "extensions":
+                    for _ in reader.iter_array():
+                        yield profile, reader.value()
+                else:
+                    profile[key] = reader.value()
+
+def count_extensions_streaming(log_file_path):
+    """ブラウザログを展開せずに拡張機能の数を数える"""
+    extension_count = sum(1 for _ in iter_extension_records(log_file_path))
+    count_file(log_file_path)
+    return extension_count
@@ -0,0 +1,139 @@
+import csv
+from datetime import timedelta
+
+# この日数より前の提出しかないPCを提出遅延とみなす
+DELAY_DAYS = 30
+
+def summarize_status(statuses):
+    """提出状況（完了 / 一部完了 / 未完了）のリストから提出状況のサマリーを作成"""
+    total = len(statuses)
+    completed = statuses.count("完了")
+    return {
+        "total": total,
+        "completed": completed,
+        "partial": statuses.count("一部完了"),
+        "not_completed": statuses.count("未完了"),
+        "completion_rate": (completed / total) * 100 if total > 0 else 0
+    }
+
+def merge_latest(browser_latest, photo_latest):
+    """PC名 → 最新の提出日時 をブラウザ情報・顔写真でまとめる（PC名 → {"browser_time", "photo_time"}）"""
+    latest_submissions = {}
+    for pc_name, timestamp in browser_latest.items():
+        latest_submissions.setdefault(pc_name, {"browser_time": None, "photo_time": None})["browser_time"] = timestamp
+    for pc_name, timestamp in photo_latest.items():
+        latest_submissions.setdefault(pc_name, {"browser_time": None, "photo_time": None})["photo_time"] = timestamp
+    return latest_submissions
+
+def count_delayed(latest_submissions, now):
+    """DELAY_DAYS 日以上提出のないPC数（ブラウザ情報, 顔写真）"""
+    browser_delay_count = 0
+    photo_delay_count = 0
+    for times in latest_submissions.values():
+        if times["browser_time"] and (now - times["browser_time"]).days > DELAY_DAYS:
+            browser_delay_count += 1
+        if times["photo_time"] and (now - times["photo_time"]).days > DELAY_DAYS:
+            photo_delay_count += 1
+    return browser_delay_count, photo_delay_count
+
+def report_stats(data, now):
+    """レポートの主な数値（統計項目 → 値）"""
+    status = data["status"]
+    browser_delay_count, photo_delay_count = count_delayed(data["latest"], now)
+    return {
+        "総端末数": status["total"],
+        "提出完了": status["completed"],
+        "一部提出": status["partial"],
+        "未提出": status["not_completed"],
+        "提出完了率": round(status["completion_rate"], 1),
+        "ブラウザ情報ファイル数": data["browser_files"],
+        "顔写真ファイル数": data["photo_files"],
+        "ブラウザ情報の提出遅延": browser_delay_count,
+        "顔写真の提出遅延": photo_delay_count
+    }
+
+def write_stats_csv(path, stats):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["統計項目", "値"])
+        for key, value in stats.items():
+            writer.writerow([key, value])
+    return path
+
+def write_markdown(path, data, now, scope=None):
+    """総合レポート（Markdown）を書き込む
+
+    data は以下を持つ辞書（子プロセスへ渡せるよう、値は辞書・リスト・数値・日時のみ）。
+      status         : 提出状況のサマリー（summarize_status）
+      browser_monthly: 年月 → ブラウザ情報の提出数
+      photo_monthly  : 年月 → 顔写真の提出数
+      browser_files  : ブラウザ情報ファイル数
+      photo_files    : 顔写真ファイル数
+      latest         : PC名 → {"browser_time", "photo_time"}（merge_latest）
+    scope を指定した場合は見出しに対象（例: "部署: 営業部"）を表示する。
+    """
+    status = data["status"]
+    browser_monthly = data["browser_monthly"]
+    photo_monthly = data["photo_monthly"]
+    latest_submissions = data["latest"]
+    report_date = now.strftime("%Y年%m月%d日")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        if scope:
+            f.write(f"# ブラウザ情報収集 総合レポート（{scope}）\n\n")
+        else:
+            f.write(f"# ブラウザ情報収集 総合レポート\n\n")
+        f.write(f"**作成日時:** {report_date}\n\n")
+
+        f.write("## 1. 提出状況サマリー\n\n")
+        f.write(f"- **総端末数:** {status['total']}台\n")
+        f.write(f"- **提出完了:** {status['completed']}台 ({status['completion_rate']:.1f}%)\n")
+        f.write(f"- **一部提出:** {status['partial']}台\n")
+        f.write(f"- **未提出:** {status['not_completed']}台\n\n")
+
+        f.write("## 2. 月別提出数\n\n")
+        f.write("### ブラウザ情報\n\n")
+        f.write("| 年月 | 提出数 |\n")
+        f.write("|------|-------|\n")
+        for year_month in sorted(browser_monthly.keys(), reverse=True):
+            f.write(f"| {year_month} | {browser_monthly[year_month]} |\n")
+
+        f.write("\n### 顔写真\n\n")
+        f.write("| 年月 | 提出数 |\n")
+        f.write("|------|-------|\n")
+        for year_month in sorted(photo_monthly.keys(), reverse=True):
+            f.write(f"| {year_month} | {photo_monthly[year_month]} |\n")
+
+        f.write("\n## 3. ファイル管理状況\n\n")
+        f.write(f"- **ブラウザ情報ファイル総数:** {data['browser_files']}件\n")
+        f.write(f"- **顔写真ファイル総数:** {data['photo_files']}件\n\n")
+
+        # 今月と先月の提出状況
+        current_month = now.strftime("%Y-%m")
+        last_month = (now - timedelta(days=30)).strftime("%Y-%m")
+
+        current_month_browser = browser_monthly.get(current_month, 0)
+        last_month_browser = browser_monthly.get(last_month, 0)
+        current_month_photo = photo_monthly.get(current_month, 0)
+        last_month_photo = photo_monthly.get(last_month, 0)
+
+        f.write("## 4. 今月と先月の提出状況\n\n")
+        f.write("| 項目 | 今月 | 先月 | 増減 |\n")
+        f.write("|------|------|------|------|\n")
+        f.write(f"| ブラウザ情報 | {current_month_browser} | {last_month_browser} | {current_month_browser - last_month_browser} |\n")
+        f.write(f"| 顔写真 | {current_month_photo} | {last_month_photo} | {current_month_photo - last_month_photo} |\n\n")
+
+        f.write("## 5. 提出遅延状況\n\n")
+
+        # 30日以上提出のないPCをカウント
+        browser_delay_count, photo_delay_count = count_delayed(latest_submissions, now)
+
+        f.write("### 30日以上提出のないPC数\n\n")
+        f.write(f"- **ブラウザ情報:** {browser_delay_count}台\n")
+        f.write(f"- **顔写真:** {photo_delay_count}台\n\n")
+
+        f.write("## 6. 次回のアクション\n\n")
+        f.write("- [ ] 未提出PCへのリマインダー送信\n")
+        f.write("- [ ] 30日以上提出のないPCの確認\n")
+        f.write("- [ ] 古いファイルのアーカイブ処理\n")
+    return path
@@ -0,0 +1,116 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from overall_report import summarize_status, merge_latest, report_stats, write_markdown, write_stats_csv
+from trend_chart import safe_filename
+
+# 分割したレポートを作成するプロセス数の既定値（1 の場合は子プロセスを使わない）
+# 2000台・200分割では1件あたり1ミリ秒未満で、子プロセスの起動の方が長いため、既定では使わない
+REPORT_WORKERS = 1
+
+# 分割の単位（指定名 → (表示名, 台帳の索引)）
+PARTITION_DIMENSIONS = {
+    "department": ("部署", "by_department"),
+    "os": ("OS", "by_os")
+}
+
+def build_partitions(statuses, catalogs, registry, dimensions):
+    """提出状況・提出フォルダの集計を、台帳の属性（部署・OS）ごとに1回の走査で振り分ける
+
+    statuses は (PC名, 提出状況) のリスト、catalogs は load_catalogs の戻り値（PC名は台帳に合わせて
+    分けたもの）、dimensions は PARTITION_DIMENSIONS の指定名のリスト。台帳にないPCはどの分割にも含めない。
+    (表示名, 属性の値) → overall_report.write_markdown に渡すデータ の辞書を返す。
+    """
+    # PC名 → そのPCが属する分割のリスト
+    partitions_of = {}
+    partitions = {}
+    for dimension in dimensions:
+        label, index_name = PARTITION_DIMENSIONS[dimension]
+        for value, pc_names in sorted(getattr(registry, index_name).items()):
+            data = partitions[(label, value)] = {
+                "statuses": [],
+                "browser_monthly": {},
+                "photo_monthly": {},
+                "browser_files": 0,
+                "photo_files": 0,
+                "browser_latest": {},
+                "photo_latest": {}
+            }
+            for pc_name in pc_names:
+                partitions_of.setdefault(pc_name, []).append(data)
+
+    for pc_name, status in statuses:
+        for data in partitions_of.get(pc_name, ()):
+            data["statuses"].append(status)
+
+    for kind in ("browser", "photo"):
+        catalog = catalogs[kind]
+        for info in catalog["files"]:
+            for data in partitions_of.get(info["pc_name"], ()):
+                monthly = data[f"{kind}_monthly"]
+                monthly[info["year_month"]] = monthly.get(info["year_month"], 0) + 1
+                data[f"{kind}_files"] += 1
+        for pc_name, timestamp in catalog["latest"].items():
+            for data in partitions_of.get(pc_name, ()):
+                data[f"{kind}_latest"][pc_name] = timestamp
+
+    for data in partitions.values():
+        data["status"] = summarize_status(data.pop("statuses"))
+        data["latest"] = merge_latest(data.pop("browser_latest"), data.pop("photo_latest"))
+    return partitions
+
+def partition_paths(folder, label, value, date):
+    """分割したレポート（Markdown）と統計（CSV）の保存先"""
+    name = f"総合レポート_{safe_filename(value)}_{date}"
+    directory = os.path.join(folder, f"{label}別")
+    return os.path.join(directory, f"{name}.md"), os.path.join(directory, f"{name}.csv")
+
+def render_partition(task):
+    """1つの分割のレポートと統計を書き込む（子プロセスで実行）"""
+    key, data, markdown_path, stats_path, now = task
+    label, value = key
+    write_markdown(markdown_path, data, now, f"{label}: {value or '（未設定）'}")
+    stats = report_stats(data, now)
+    write_stats_csv(stats_path, stats)
+    return key, markdown_path, stats
+
+def render_partitions(partitions, folder, now, workers=REPORT_WORKERS):
+    """分割ごとのレポートを workers 個のプロセスで作成し、(分割, レポートのパス, 統計) のリストを返す
+
+    子プロセスには分割済みのデータだけを渡す（提出フォルダは一覧し直さない）。
+    workers が 1 の場合は、このプロセスで順に作成する。
+    """
+    date = now.strftime("%Y%m%d")
+    tasks = []
+    for (label, value), data in partitions.items():
+        markdown_path, stats_path = partition_paths(folder, label, value, date)
+        os.makedirs(os.path.dirname(markdown_path), exist_ok=True)
+        tasks.append(((label, value), data, markdown_path, stats_path, now))
+
+    workers = max(1, min(int(workers), len(tasks)))
+    if workers == 1:
+        return [render_partition(task) for task in tasks]
+    # プロセスの起動・データの受け渡しの回数を減らすため、まとめて渡す
+    chunksize = max(1, len(tasks) // (workers * 4))
+    # 一括実行ではスレッドから呼ばれるため、Windows と同じ spawn で子プロセスを起動する
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(render_partition, tasks, chunksize=chunksize))
+
+def write_index(path, results, now):
+    """分割したレポートの一覧（Markdown）を書き込む"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# ブラウザ情報収集 総合レポート（部署別・OS別）\n\n")
+        f.write(f"**作成日時:** {now.strftime('%Y年%m月%d日')}\n\n")
+        current = None
+        for (label, value), markdown_path, stats in results:
+            if label != current:
+                if current is not None:
+                    f.write("\n")
+                current = label
+                f.write(f"## {label}別\n\n")
+                f.write(f"| {label} | 総端末数 | 提出完了 | 提出完了率 | 遅延（ブラウザ情報） | レポート |\n")
+                f.write("|------|------|------|------|------|------|\n")
+            link = os.path.relpath(markdown_path, os.path.dirname(path)).replace(os.sep, "/")
+            f.write(f"| {value or '（未設定）'} | {stats['総端末数']} | {stats['提出完了']} | {stats['提出完了率']:.1f}% | "
+                    f"{stats['ブラウザ情報の提出遅延']} | [{os.path.basename(markdown_path)}]({link}) |\n")
+    return path
@@ -0,0 +1,78 @@
+import os
+import json
+import socket
+from datetime import datetime, timedelta
+
+# この時間を過ぎたロックファイルは、異常終了したプロセスが残したものとみなして取り直す
+LOCK_STALE_HOURS = 24
+
+def format_owner(owner):
+    """ロックファイルの内容を表示用の文字列にする"""
+    if not owner:
+        return "内容を読み込めません"
+    return f"{owner.get('host', '?')} のプロセス {owner.get('pid', '?')}、{owner.get('started_at', '?')} から実行中"
+
+def read_owner(path):
+    """ロックファイルの内容を取得（読み込めない場合は None）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_stale(path, stale_hours=LOCK_STALE_HOURS):
+    """ロックファイルが作成から stale_hours 時間以上経過しているか"""
+    try:
+        modified = datetime.fromtimestamp(os.path.getmtime(path))
+    except OSError:
+        return True
+    return datetime.now() - modified > timedelta(hours=stale_hours)
+
+class RunLock:
+    """定期実行の重複を防ぐロックファイル
+
+    ロックファイルは排他的に作成し（同時に作成した場合は一方だけが成功する）、実行したPC名・
+    プロセスID・開始日時を書き込む。release() で削除する。異常終了で残ったロックファイルは
+    LOCK_STALE_HOURS を過ぎると取り直す（プロセスの生存確認はPCをまたげないため行わない）。
+    """
+
+    def __init__(self, path, stale_hours=LOCK_STALE_HOURS):
+        self.path = path
+        self.stale_hours = stale_hours
+        self.acquired = False
+
+    def acquire(self):
+        """ロックを取得（別のプロセスが実行中の場合は表示して False）"""
+        owner = {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                current = read_owner(self.path)
+                if not is_stale(self.path, self.stale_hours):
+                    print(f"[処理中断] 別の処理が実行中です: {self.path}（{format_owner(current)}）")
+                    return False
+                print(f"[警告] 古いロックファイルを削除します: {self.path}（{format_owner(current)}）")
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(owner, f, ensure_ascii=False)
+            self.acquired = True
+            return True
+        print(f"[処理中断] ロックファイルを作成できませんでした: {self.path}")
+        return False
+
+    def release(self):
+        if self.acquired:
+            self.acquired = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
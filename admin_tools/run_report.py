@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+# プロファイル結果のうち実行記録に含める関数の数（所要時間の累計が大きい順）
+PROFILE_TOP = 30
+
+# 計測中の実行記録（計測していない場合は None）
+_active = None
+
+def span(name):
+    """処理段階の所要時間を計測する with 文用のオブジェクト（計測していない場合は何もしない）"""
+    report = _active
+    if report is None:
+        return contextlib.nullcontext()
+    return report.span(name)
+
+def count(name, value=1):
+    """件数・バイト数・エラー数などを加算（計測していない場合は何もしない）"""
+    report = _active
+    if report is not None:
+        report.add(name, value)
+
+def count_file(path, name="logs_read"):
+    """読み込んだファイルの件数とバイト数を加算（計測していない場合はファイルサイズも取得しない）"""
+    report = _active
+    if report is not None:
+        report.add(name)
+        try:
+            report.add("bytes_read", os.path.getsize(path))
+        except OSError:
+            pass
+
+class RunReport:
+    """処理段階ごとの所要時間・件数を集め、実行記録（JSON）として保存する
+
+    start() から finish() までの間、モジュールの span() / count() がこの記録に集計される。
+    件数は全体と計測中のすべての段階（入れ子を含む）に加算する（並列処理のスレッドからも加算できる）。
+    計測中の段階はスレッドごとに持ち、段階を持たないスレッドの件数は start() したスレッドの段階に加算する。
+    別のスレッドで始めた段階は、start() したスレッドで計測中の段階の内側として記録する。
+    profile=True で cProfile（メインスレッドのみ）、trace_memory=True で段階ごとのピークメモリも記録する。
+    """
+
+    def __init__(self, tool, profile=False, trace_memory=False):
+        self.tool = tool
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.started_at = None
+        self.start_time = None
+        self.spans = []
+        self.counters = {}
+        self.stacks = {}
+        self.main_thread = None
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.status = "running"
+
+    def start(self):
+        global _active
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        self.main_thread = threading.get_ident()
+        self.stacks[self.main_thread] = []
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        _active = self
+        return self
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            stack = self.stacks.get(threading.get_ident()) or self.stacks.get(self.main_thread, ())
+            for record in stack:
+                record["counters"][name] = record["counters"].get(name, 0) + value
+
+    @contextlib.contextmanager
+    def span(self, name):
+        thread = threading.get_ident()
+        with self.lock:
+            stack = self.stacks.get(thread)
+            inherited = stack is None
+            if inherited:
+                stack = self.stacks[thread] = list(self.stacks.get(self.main_thread, ()))
+            record = {
+                "name": name,
+                "parent": stack[-1]["name"] if stack else None,
+                "offset": round(time.perf_counter() - self.start_time, 4),
+                "counters": {},
+                "status": "ok"
+            }
+            stack.append(record)
+        if self.trace_memory:
+            # 並列に実行している段階がある場合、ピークはそれらを含む
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["status"] = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                stack.pop()
+                if inherited:
+                    del self.stacks[thread]
+            record["seconds"] = round(seconds, 4)
+            record["rates"] = {
+                f"{name}_per_second": round(value / seconds, 1)
+                for name, value in record["counters"].items() if seconds > 0
+            }
+            if self.trace_memory:
+                # 内側の段階で reset_peak した分は、内側の記録から引き継ぐ
+                record["peak_bytes"] = max(tracemalloc.get_traced_memory()[1], record.pop("child_peak", 0))
+                tracemalloc.reset_peak()
+                if stack:
+                    parent = stack[-1]
+                    parent["child_peak"] = max(parent.get("child_peak", 0), record["peak_bytes"])
+            self.spans.append(record)
+
+    def profile_top(self):
+        """cProfile の結果を所要時間の累計が大きい順に返す"""
+        import pstats
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return [{
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "total_seconds": round(total, 4),
+            "cumulative_seconds": round(cumulative, 4)
+        } for (filename, line, function), (_, calls, total, cumulative, _) in rows]
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.start_time
+        report = {
+            "tool": self.tool,
+            "status": self.status,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "seconds": round(seconds, 4),
+            "argv": sys.argv[1:],
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "counters": dict(self.counters),
+            "spans": sorted(self.spans, key=lambda record: record["offset"])
+        }
+        if self.trace_memory:
+            # 段階ごとに reset_peak しているため、全体のピークは各段階のピークの最大
+            peaks = [record["peak_bytes"] for record in self.spans]
+            if tracemalloc.is_tracing():
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            report["peak_bytes"] = max(peaks, default=None)
+        return report
+
+    def write(self, path):
+        """ここまでの記録を保存（途中経過も上書き保存できる）"""
+        report = self.to_dict()
+        if self.profiler is not None:
+            self.profiler.disable()
+            report["profile"] = self.profile_top()
+            # 詳しく見る場合は python -m pstats や snakeviz で開く
+            profile_path = os.path.splitext(path)[0] + ".prof"
+            self.profiler.dump_stats(profile_path)
+            report["profile_path"] = profile_path
+            if self.status == "running":
+                self.profiler.enable()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def finish(self, path, status="ok"):
+        """計測を終了して実行記録を保存し、段階ごとの所要時間を表示"""
+        global _active
+        self.status = status
+        _active = None
+        try:
+            report = self.write(path)
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+        print(f"\n[実行記録] {path}（合計 {report['seconds']:.1f}秒）")
+        # 最上位の段階と、その1段内側の段階を表示
+        top_level = {record["name"] for record in report["spans"] if record["parent"] is None}
+        for record in report["spans"]:
+            if record["parent"] is None or record["parent"] in top_level:
+                indent = "  " if record["parent"] is None else "    "
+                print(f"{indent}{record['name']}: {record['seconds']:.2f}秒{format_counters(record['counters'])}")
+        return report
+
+def format_counters(counters):
+    """件数を表示用の文字列にする"""
+    if not counters:
+        return ""
+    return "（" + "、".join(f"{name} {value:,}" for name, value in counters.items()) + "）"
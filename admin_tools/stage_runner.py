@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from run_report import span
+
+# 同時に実行する段階の数の既定値
+STAGE_WORKERS = 4
+
+def run_stage(name, stage, inputs):
+    """1つの段階を実行し、結果（status / value / seconds）を返す（例外は失敗として扱う）"""
+    label = stage.get("label", name)
+    print(f"[処理開始] {label}")
+    start = time.perf_counter()
+    try:
+        with span(name) as record:
+            ok, value = stage["run"](inputs)
+            if record is not None and not ok:
+                record["status"] = "failed"
+    except Exception as e:
+        print(f"[エラー] {label}: {e}")
+        ok, value = False, None
+    seconds = time.perf_counter() - start
+    if ok:
+        print(f"[処理完了] {label}（{seconds:.1f}秒）")
+    else:
+        print(f"[失敗] {label}（{seconds:.1f}秒）")
+    return {"status": "ok" if ok else "failed", "value": value, "seconds": round(seconds, 4)}
+
+def run_stages(stages, workers=STAGE_WORKERS):
+    """依存関係に従って段階を実行し、段階名 → 結果 の辞書を返す
+
+    stages は 段階名 → {"label": 表示名, "after": 依存する段階名のリスト, "run": 関数} の辞書。
+    関数は依存する段階の値の辞書（段階名 → 値）を受け取り (成功したか, 値) を返す。
+    依存する段階がすべて成功した段階から、最大 workers 個を並列に実行する。
+    依存する段階が失敗した段階は実行せず skipped とする。
+    結果は {"status": "ok" / "failed" / "skipped", "value": 値, "seconds": 所要時間}。
+    """
+    for name, stage in stages.items():
+        unknown = [dep for dep in stage.get("after", []) if dep not in stages]
+        if unknown:
+            raise ValueError(f"段階 {name} の依存先がありません: {unknown}")
+
+    results = {}
+    remaining = dict(stages)
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        running = {}
+        while remaining or running:
+            # 実行できる段階をすべて開始（スキップした段階に依存する段階も続けてスキップ）
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, stage in list(remaining.items()):
+                    deps = stage.get("after", [])
+                    if any(dep not in results for dep in deps):
+                        continue
+                    del remaining[name]
+                    progressed = True
+                    failed = [dep for dep in deps if results[dep]["status"] != "ok"]
+                    if failed:
+                        print(f"[スキップ] {stage.get('label', name)}: 前の段階が完了していません（{'、'.join(failed)}）")
+                        results[name] = {"status": "skipped", "value": None, "seconds": 0}
+                        continue
+                    inputs = {dep: results[dep]["value"] for dep in deps}
+                    running[executor.submit(run_stage, name, stage, inputs)] = name
+
+            if not running:
+                if remaining:
+                    raise ValueError(f"段階の依存関係が循環しています: {sorted(remaining)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
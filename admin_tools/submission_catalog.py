@@ -0,0 +1,75 @@
+import os
+from datetime import datetime
+from log_scanner import scan_folder
+from filename_parser import resolve_pc_name, tally_unparseable
+
+def catalog_folder(folder, file_ext, archive_root, days_threshold=90, now=None, since=None, pc_names=None):
+    """提出フォルダを1回だけ一覧し、レポートとアーカイブに必要な集計を1パスで作成
+
+    期間別サブフォルダ内のファイルも対象とし、since を指定した場合はその日時以降の
+    ファイルを含むサブフォルダだけを一覧する（log_scanner.scan_folder を参照）。
+    pc_names（台帳のPC名）を渡すと、アンダースコアを含むPC名も台帳どおりに分ける。
+    戻り値は以下を持つ辞書（フォルダがない場合はいずれも空）。ディレクトリは作成しない。
+      files              : 日時を解析できたファイルの情報（アーカイブ先のパスを含む）
+      skipped            : 日時を解析できなかったファイル名
+      skipped_reasons    : 解析できなかった理由 → 件数（filename_parser.FAILURE_REASONS）
+      monthly            : 年月 → 提出数
+      latest             : PC名 → 最新の提出日時
+      archive_candidates : days_threshold 日より古いファイルの情報
+    """
+    if now is None:
+        now = datetime.now()
+
+    catalog = {
+        "folder": folder,
+        "archive_root": archive_root,
+        "days_threshold": days_threshold,
+        "files": [],
+        "skipped": [],
+        "skipped_reasons": {},
+        "monthly": {},
+        "latest": {},
+        "archive_candidates": []
+    }
+    if not os.path.exists(folder):
+        print(f"[エラー] フォルダが見つかりません: {folder}")
+        return catalog
+
+    underscored = {name for name in pc_names if "_" in name} if pc_names else None
+    for entry in scan_folder(folder, file_ext, since=since):
+        filename = entry["filename"]
+        timestamp = entry["timestamp"]
+        if not timestamp:
+            catalog["skipped"].append(filename)
+            continue
+
+        pc_name = entry["pc_name"]
+        user_name = entry["user_name"]
+        if underscored:
+            pc_name, user_name = resolve_pc_name(pc_name, user_name, underscored)
+        year_month = timestamp.strftime("%Y-%m")
+        info = {
+            "filename": filename,
+            "kind": entry["kind"],
+            "format": entry["format"],
+            "original_path": entry["path"],
+            "archive_path": os.path.join(archive_root, year_month, filename),
+            "summary_path": entry["summary_path"],
+            "size": entry["size"],
+            "timestamp": timestamp,
+            "year_month": year_month,
+            "pc_name": pc_name,
+            "user_name": user_name
+        }
+        catalog["files"].append(info)
+        catalog["monthly"][year_month] = catalog["monthly"].get(year_month, 0) + 1
+
+        latest = catalog["latest"].get(info["pc_name"])
+        if latest is None or timestamp > latest:
+            catalog["latest"][info["pc_name"]] = timestamp
+
+        if (now - timestamp).days > days_threshold:
+            catalog["archive_candidates"].append(info)
+
+    catalog["skipped_reasons"] = tally_unparseable(catalog["skipped"])
+    return catalog
@@ -0,0 +1,244 @@
+import os
+import re
+import math
+from html import escape
+
+# グラフの出力形式（svg・html は matplotlib を使わずに作成する）
+CHART_FORMATS = ("png", "svg", "html")
+
+# 拡張機能数の分布の階級数
+HISTOGRAM_BINS = 20
+
+# 月別実行数の系列（種類, 表示名, 色）。同じ年月の棒を横に並べて描く
+SERIES = [
+    ("browser", "ブラウザ情報", "#1f77b4"),
+    ("photo", "顔写真", "#2ca02c")
+]
+HISTOGRAM_COLOR = "#ff7f0e"
+
+# SVG の大きさ（PNG と同じ 12×8 インチを 80dpi で）
+SVG_WIDTH = 960
+SVG_HEIGHT = 640
+
+def month_range(first, last):
+    """first から last までの年月（"YYYY-MM"）を途中の月を含めて返す"""
+    year, month = int(first[:4]), int(first[5:7])
+    months = []
+    while f"{year:04d}-{month:02d}" <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def build_trend_data(monthly_rows, extension_counts, group_of=None):
+    """グループ（部署など）ごとのグラフ用データを1回の走査で作成
+
+    monthly_rows は (PC名, 種類, 年月, 件数) の並び、extension_counts は PC名 → 拡張機能数。
+    group_of（PC名 → グループ名）を省略した場合は全体を "" の1グループとし、指定した場合は
+    group_of にないPCを含めない。月別実行数は全グループ共通の年月の並びにそろえ、
+    {"months": 年月のリスト, "counts": 種類 → 年月と同じ順の件数のリスト, "extension_counts": 拡張機能数のリスト}
+    をグループ名 → データ の辞書で返す。
+    """
+    monthly = {}
+    months = set()
+    for pc_name, kind, ym, n in monthly_rows:
+        group = "" if group_of is None else group_of.get(pc_name)
+        if group is None:
+            continue
+        counts = monthly.setdefault(group, {}).setdefault(kind, {})
+        counts[ym] = counts.get(ym, 0) + n
+        months.add(ym)
+
+    extensions = {}
+    for pc_name, value in extension_counts.items():
+        group = "" if group_of is None else group_of.get(pc_name)
+        if group is not None:
+            extensions.setdefault(group, []).append(value)
+
+    all_months = month_range(min(months), max(months)) if months else []
+    groups = {}
+    for group in sorted(set(monthly) | set(extensions)):
+        counts = monthly.get(group, {})
+        groups[group] = {
+            "months": all_months,
+            "counts": {kind: [counts.get(kind, {}).get(ym, 0) for ym in all_months] for kind, _, _ in SERIES},
+            "extension_counts": extensions.get(group, [])
+        }
+    return groups
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """値を等間隔の bins 個の階級に分けた (階級の境界のリスト, 度数のリスト)（最後の階級は最大値を含む）"""
+    if not values:
+        return [], []
+    low, high = min(values), max(values)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    edges = [low + width * i for i in range(bins)] + [high]
+    counts = [0] * bins
+    for value in values:
+        counts[min(int((value - low) / width), bins - 1)] += 1
+    return edges, counts
+
+def chart_title(title, group):
+    return f"{title}（{group}）" if group else title
+
+def render_png(data, path, group=""):
+    """matplotlib の Figure を直接作成して PNG に保存（pyplot の状態を使わないため、続けて描いても図が残らない）"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(12, 8))
+    FigureCanvasAgg(figure)
+    monthly_axes, histogram_axes = figure.subplots(2, 1)
+
+    # 月別実行数（同じ年月の棒を横に並べる）
+    months = data["months"]
+    width = 0.8 / len(SERIES)
+    for i, (kind, label, color) in enumerate(SERIES):
+        offset = (i - (len(SERIES) - 1) / 2) * width
+        monthly_axes.bar([x + offset for x in range(len(months))], data["counts"][kind], width,
+                         color=color, alpha=0.8, label=label)
+    monthly_axes.set_xticks(range(len(months)))
+    monthly_axes.set_xticklabels(months, rotation=45)
+    monthly_axes.set_title(chart_title("月別実行数", group))
+    monthly_axes.set_xlabel("年月")
+    monthly_axes.set_ylabel("実行数")
+    monthly_axes.legend()
+    monthly_axes.grid(axis="y", linestyle="--", alpha=0.7)
+
+    # 拡張機能数の分布
+    edges, counts = histogram(data["extension_counts"])
+    if counts:
+        histogram_axes.bar(edges[:-1], counts, [edges[i + 1] - edges[i] for i in range(len(counts))],
+                           align="edge", color=HISTOGRAM_COLOR, alpha=0.7)
+    histogram_axes.set_title(chart_title("拡張機能数の分布", group))
+    histogram_axes.set_xlabel("拡張機能数")
+    histogram_axes.set_ylabel("PC数")
+    histogram_axes.grid(axis="y", linestyle="--", alpha=0.7)
+
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
+
+def nice_ticks(maximum, count=5):
+    """0 から maximum までを count 個程度に区切る目盛り（1・2・5 × 10のべき乗 刻み）"""
+    if maximum <= 0:
+        return [0, 1]
+    raw = maximum / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    if step <= 1:
+        step = 1
+    return [step * i for i in range(int(math.ceil(maximum / step)) + 1)]
+
+def format_number(value):
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.1f}"
+
+def svg_panel(x, y, width, height, title, xlabel, ylabel, labels, series, legend=False):
+    """棒グラフ1枚分の SVG 要素のリスト（series は (値のリスト, 色, 表示名) のリスト、同じ位置の棒は横に並べる）"""
+    parts = []
+    left, right, top, bottom = x + 60, x + width - 10, y + 30, y + height - 70
+    parts.append(f'<text x="{(left + right) / 2:.1f}" y="{y + 18}" text-anchor="middle" font-size="15">{escape(title)}</text>')
+
+    maximum = max((max(values, default=0) for values, _, _ in series), default=0)
+    ticks = nice_ticks(maximum)
+    scale = (bottom - top) / ticks[-1]
+    for tick in ticks:
+        ty = bottom - tick * scale
+        parts.append(f'<line x1="{left}" y1="{ty:.1f}" x2="{right}" y2="{ty:.1f}" stroke="#bbb" stroke-dasharray="4 3"/>')
+        parts.append(f'<text x="{left - 6}" y="{ty + 4:.1f}" text-anchor="end" font-size="11">{format_number(tick)}</text>')
+
+    slot = (right - left) / max(len(labels), 1)
+    bar_width = slot * 0.8 / len(series) if len(series) > 1 else slot
+    for i, (values, color, _) in enumerate(series):
+        offset = (i - (len(series) - 1) / 2) * bar_width
+        for j, value in enumerate(values):
+            if value:
+                bx = left + slot * (j + 0.5) + offset - bar_width / 2
+                parts.append(f'<rect x="{bx:.1f}" y="{bottom - value * scale:.1f}" width="{bar_width:.1f}" '
+                             f'height="{value * scale:.1f}" fill="{color}" fill-opacity="0.8"><title>{escape(labels[j])}: {value}</title></rect>')
+
+    # 目盛りの文字が重ならないように間引く
+    step = max(1, math.ceil(len(labels) / 24))
+    for j in range(0, len(labels), step):
+        lx = left + slot * (j + 0.5)
+        parts.append(f'<text x="{lx:.1f}" y="{bottom + 12}" text-anchor="end" font-size="11" '
+                     f'transform="rotate(-45 {lx:.1f} {bottom + 12})">{escape(labels[j])}</text>')
+    parts.append(f'<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}" stroke="#333"/>')
+    parts.append(f'<line x1="{left}" y1="{top}" x2="{left}" y2="{bottom}" stroke="#333"/>')
+    parts.append(f'<text x="{(left + right) / 2:.1f}" y="{y + height - 8}" text-anchor="middle" font-size="12">{escape(xlabel)}</text>')
+    parts.append(f'<text x="{x + 14}" y="{(top + bottom) / 2:.1f}" text-anchor="middle" font-size="12" '
+                 f'transform="rotate(-90 {x + 14} {(top + bottom) / 2:.1f})">{escape(ylabel)}</text>')
+
+    if legend:
+        for i, (_, color, label) in enumerate(series):
+            ly = top + 8 + i * 18
+            parts.append(f'<rect x="{right - 110}" y="{ly}" width="12" height="12" fill="{color}" fill-opacity="0.8"/>')
+            parts.append(f'<text x="{right - 92}" y="{ly + 11}" font-size="12">{escape(label)}</text>')
+    return parts
+
+def render_svg(data, group=""):
+    """月別実行数と拡張機能数の分布を SVG の文字列で作成（matplotlib を使わない）"""
+    half = SVG_HEIGHT // 2
+    monthly = [(data["counts"][kind], color, label) for kind, label, color in SERIES]
+    edges, counts = histogram(data["extension_counts"])
+    bins = [format_number(edge) for edge in edges[:-1]]
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{SVG_HEIGHT}" '
+             f'viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" font-family="sans-serif">',
+             f'<rect width="{SVG_WIDTH}" height="{SVG_HEIGHT}" fill="white"/>']
+    parts += svg_panel(0, 0, SVG_WIDTH, half, chart_title("月別実行数", group), "年月", "実行数",
+                       data["months"], monthly, legend=True)
+    parts += svg_panel(0, half, SVG_WIDTH, half, chart_title("拡張機能数の分布", group), "拡張機能数", "PC数",
+                       bins, [(counts, HISTOGRAM_COLOR, "PC数")])
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+def render_html(charts, title):
+    """(見出し, データ) のリストを1つの HTML にまとめる（グラフはインラインの SVG）"""
+    parts = ["<!DOCTYPE html>", '<html lang="ja">', "<head>", '<meta charset="utf-8">',
+             f"<title>{escape(title)}</title>", "</head>", '<body style="font-family: sans-serif">',
+             f"<h1>{escape(title)}</h1>"]
+    for heading, data in charts:
+        if heading:
+            parts.append(f"<h2>{escape(heading)}</h2>")
+        parts.append(render_svg(data, heading))
+    parts += ["</body>", "</html>"]
+    return "\n".join(parts)
+
+def safe_filename(name):
+    """部署名などをファイル名に使える文字列にする"""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name) or "未設定"
+
+def write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def write_chart(data, path, chart_format, group=""):
+    """1つのグラフを chart_format（png / svg / html）で保存"""
+    if chart_format == "png":
+        return render_png(data, path, group)
+    if chart_format == "svg":
+        return write_text(path, render_svg(data, group))
+    if chart_format == "html":
+        return write_text(path, render_html([(group, data)], chart_title("実行傾向レポート", group)))
+    raise ValueError(f"不明なグラフの出力形式: {chart_format}")
+
+def write_group_charts(groups, folder, name, chart_format, label="部署"):
+    """グループごとのグラフをまとめて保存し、保存したファイルのリストを返す
+
+    png・svg はグループごとに「name_グループ名.拡張子」、html は全グループを1つの「name.html」に保存する。
+    グループ名が空の場合は「（未設定）」として扱う。
+    """
+    if chart_format == "html":
+        charts = [(group or "（未設定）", groups[group]) for group in groups]
+        path = os.path.join(folder, f"{name}.html")
+        return [write_text(path, render_html(charts, f"{label}別 実行傾向レポート"))]
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"不明なグラフの出力形式: {chart_format}")
+    paths = []
+    for group, data in groups.items():
+        path = os.path.join(folder, f"{name}_{safe_filename(group)}.{chart_format}")
+        paths.append(write_chart(data, path, chart_format, group or "（未設定）"))
+    return paths
@@ -0,0 +1,167 @@
+"""管理者ツールの処理段階ごとの所要時間とメモリ使用量の計測
+
+端末数ごとに一時フォルダへ合成データ（fleet_generator）を作成し、CompareDeviceLogs と
+ExecutionHistoryLogger の各段階を実運用と同じ関数で順に実行する。段階ごとの所要時間と
+ピークメモリ（tracemalloc）をJSONで出力するため、変更前後の比較に使える。共有フォルダは使わない。
+
+    python benchmarks/bench_admin_pipeline.py --pcs 100 1000 --runs 3 --output pipeline.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import warnings
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import CompareDeviceLogs
+import ExecutionHistoryLogger
+import log_delta
+from filename_parser import parse_name
+from log_scanner import LOG_EXTENSIONS
+from log_ingest import ingest_logs, DEFAULT_WORKERS
+from fleet_generator import generate_fleet, LOG_DIR_NAME, PHOTO_DIR_NAME
+
+ARCHIVE_DIR_NAME = "archives"
+
+def configure_tools():
+    """管理者ツールの保存先を作業フォルダ内に向ける（台帳・履歴などは元から作業フォルダの相対パス）"""
+    CompareDeviceLogs.LOG_FOLDER = LOG_DIR_NAME
+    CompareDeviceLogs.FACE_PHOTO_FOLDER = PHOTO_DIR_NAME
+    ExecutionHistoryLogger.LOG_FOLDER = LOG_DIR_NAME
+    ExecutionHistoryLogger.FACE_PHOTO_FOLDER = PHOTO_DIR_NAME
+    ExecutionHistoryLogger.ARCHIVE_FOLDER = ARCHIVE_DIR_NAME
+
+def reset_caches():
+    """前の端末数の計測で作られたプロセス内のキャッシュを捨てる"""
+    parse_name.cache_clear()
+    log_delta._folder_logs.clear()
+
+class StageTimer:
+    """段階ごとに所要時間・ピークメモリを計測し、ツールの表示・警告は抑える"""
+
+    def __init__(self, trace_memory=True, verbose=False):
+        self.trace_memory = trace_memory
+        self.verbose = verbose
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with output, warnings.catch_warnings():
+                if not self.verbose:
+                    warnings.simplefilter("ignore")  # グラフの日本語フォントがない環境の警告など
+                result = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if self.trace_memory:
+                tracemalloc.stop()
+        self.stages[name] = {"seconds": round(seconds, 4), "peak_bytes": peak}
+        return result
+
+def run_pipeline(timer, workers):
+    """CompareDeviceLogs.main と ExecutionHistoryLogger の「すべての処理を実行」と同じ順に各段階を実行"""
+    registry = timer.run("registry_load", CompareDeviceLogs.load_registry)
+    timer.run("registry_load_cached", CompareDeviceLogs.load_registry)
+
+    def list_submissions():
+        return (CompareDeviceLogs.list_executed_files(LOG_DIR_NAME, LOG_EXTENSIONS, None, registry.keys()),
+                CompareDeviceLogs.list_executed_files(PHOTO_DIR_NAME, ".jpg", None, registry.keys()))
+    browser_logs, face_photos = timer.run("listing", list_submissions)
+    timer.run("listing_cached", list_submissions)
+
+    log_paths = {pc_name: browser_logs[pc_name]["path"] for pc_name in registry if pc_name in browser_logs}
+    extension_counts = timer.run("ingestion", ingest_logs, log_paths, CompareDeviceLogs.check_extension_count, workers)
+
+    updated_history = timer.run("history_update", CompareDeviceLogs.update_history,
+                                registry, browser_logs, face_photos, extension_counts)
+    summary_df = timer.run("summary", CompareDeviceLogs.create_execution_summary, updated_history, registry)
+    timer.run("comparison_csv", CompareDeviceLogs.write_comparison_csv, summary_df)
+
+    catalogs = timer.run("catalog", ExecutionHistoryLogger.load_catalogs, 90)
+    timer.run("trends_report", ExecutionHistoryLogger.create_execution_trends_report)
+    timer.run("overall_report", ExecutionHistoryLogger.create_overall_report, catalogs)
+    archived = timer.run("archive", ExecutionHistoryLogger.archive_files_by_period, 90, catalogs)
+    return {
+        "registry_pcs": len(registry),
+        "browser_pcs": len(browser_logs),
+        "photo_pcs": len(face_photos),
+        "ingested": len(extension_counts),
+        "archived_files": sum(archived)
+    }
+
+def run(pcs, runs, seed, workers, summary_ratio, trace_memory, verbose):
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work:
+        start = time.perf_counter()
+        fleet = generate_fleet(work, pcs, runs, seed, summary_ratio=summary_ratio)
+        fleet["seconds"] = round(time.perf_counter() - start, 4)
+        os.chdir(work)
+        try:
+            configure_tools()
+            reset_caches()
+            timer = StageTimer(trace_memory, verbose)
+            counts = run_pipeline(timer, workers)
+        finally:
+            os.chdir(original_dir)
+    return {"pcs": pcs, "runs": runs, "fleet": fleet, "counts": counts, "stages": timer.stages}
+
+def main():
+    parser = argparse.ArgumentParser(description="管理者ツールの処理段階ごとの所要時間とメモリ使用量を計測します。")
+    parser.add_argument("--pcs", type=int, nargs="+", default=[100, 1000], help="端末数（複数指定可）")
+    parser.add_argument("--runs", type=int, default=3, help="端末あたりの実行回数")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ログを同時に読み込む数")
+    parser.add_argument("--summary-ratio", type=float, default=1.0, help="集計サマリーを付けるログの割合（0でログ本体をすべて読み込む）")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="ピークメモリを計測しない（所要時間への影響をなくす）")
+    parser.add_argument("--output", default="bench_admin_pipeline.json", help="結果のJSONの出力先")
+    parser.add_argument("--verbose", action="store_true", help="各ツールの表示をそのまま出す")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__
+        },
+        "parameters": {
+            "runs": args.runs,
+            "workers": args.workers,
+            "summary_ratio": args.summary_ratio,
+            "tracemalloc": not args.no_tracemalloc,
+            "seed": args.seed
+        },
+        "sizes": []
+    }
+    for pcs in args.pcs:
+        result = run(pcs, args.runs, args.seed, args.workers, args.summary_ratio, not args.no_tracemalloc, args.verbose)
+        results["sizes"].append(result)
+        print(f"\n端末数 {pcs:,}台 × {args.runs}回（ファイル {result['fleet']['log_files'] + result['fleet']['photo_files']:,}件、"
+              f"{result['fleet']['bytes'] / 1024 / 1024:.1f}MB）")
+        print(f"{'段階':<22}{'秒':>10}{'ピーク(MB)':>12}")
+        for name, stage in result["stages"].items():
+            peak = f"{stage['peak_bytes'] / 1024 / 1024:.1f}" if stage["peak_bytes"] is not None else "-"
+            print(f"{name:<22}{stage['seconds']:>10.3f}{peak:>12}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n[作成完了] 計測結果: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""実行サマリー作成（create_execution_summary）の処理時間比較
+
+合成した端末台帳と実行履歴で、変更前の実装（PCごとの絞り込み）と
+現在の実装（列単位の処理）の処理時間を計測し、出力CSVが同一であることを確認する。
+変更前の実装は端末数の2乗に比例して遅くなるため、--legacy-limit を超える端末数では
+先頭 --legacy-sample 台分だけを全履歴に対して計測し、端末数に比例させて推定する。
+
+    python benchmarks/bench_execution_summary.py --sizes 1000 10000 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+
+import pandas as pd
+import CompareDeviceLogs
+from execution_history import read_history_csv, write_history_csv, HISTORY_COLUMNS
+
+def legacy_create_execution_summary(history_df, registry, now):
+    """変更前の実装（PCごとに履歴を絞り込み、1行ずつ日時を変換）"""
+    
+    # サマリー用のデータフレームを作成
+    summary_data = []
+    
+    for pc_name, info in registry.items():
+        user_name = info["使用者"]
+        
+        # 履歴から該当PCの情報を取得
+        pc_history = history_df[history_df["PC名"] == pc_name]
+        
+        if len(pc_history) > 0:
+            browser_time_str = pc_history.iloc[0]["ブラウザ情報実行日時"]
+            face_time_str = pc_history.iloc[0]["顔写真実行日時"]
+            extension_count = pc_history.iloc[0]["拡張機能数"]
+            
+            # 日時文字列をdatetimeオブジェクトに変換
+            browser_time = None
+            face_time = None
+            
+            if browser_time_str:
+                try:
+                    browser_time = datetime.strptime(browser_time_str, "%Y-%m-%d %H:%M:%S")
+                except:
+                    pass
+            
+            if face_time_str:
+                try:
+                    face_time = datetime.strptime(face_time_str, "%Y-%m-%d %H:%M:%S")
+                except:
+                    pass
+            
+            # 最新の実行から30日経過したかどうかを確認
+            browser_status = "未提出"
+            if browser_time:
+                days_since_browser = (now - browser_time).days
+                if days_since_browser <= 30:
+                    browser_status = "✅"
+                else:
+                    browser_status = f"要更新({days_since_browser}日経過)"
+            
+            face_status = "未提出"
+            if face_time:
+                days_since_face = (now - face_time).days
+                if days_since_face <= 30:
+                    face_status = "✅"
+                else:
+                    face_status = f"要更新({days_since_face}日経過)"
+            
+            # 提出状況のサマリー
+            status_summary = "未完了"
+            if browser_status == "✅" and face_status == "✅":
+                status_summary = "完了"
+            elif browser_status == "✅" or face_status == "✅":
+                status_summary = "一部完了"
+            
+            summary_data.append({
+                "PC名": pc_name,
+                "使用者": user_name,
+                "OS": info.get("OS", ""),
+                "ブラウザ情報状況": browser_status,
+                "顔写真状況": face_status,
+                "拡張機能数": extension_count if extension_count else 0,
+                "ブラウザ情報実行日時": browser_time_str,
+                "顔写真実行日時": face_time_str,
+                "提出状況": status_summary
+            })
+        else:
+            # 履歴に存在しない場合
+            summary_data.append({
+                "PC名": pc_name,
+                "使用者": user_name,
+                "OS": info.get("OS", ""),
+                "ブラウザ情報状況": "未提出",
+                "顔写真状況": "未提出",
+                "拡張機能数": 0,
+                "ブラウザ情報実行日時": "",
+                "顔写真実行日時": "",
+                "提出状況": "未完了"
+            })
+    
+    # サマリーデータフレームを作成
+    summary_df = pd.DataFrame(summary_data)
+    
+    return summary_df
+
+
+def make_fleet(size, now, rng):
+    """端末台帳と、実行履歴CSVを読み込んだ状態の履歴を作成"""
+    registry = {}
+    rows = []
+    for i in range(size):
+        pc_name = f"PC{i:06d}"
+        registry[pc_name] = {"使用者": f"user{i:06d}", "OS": rng.choice(["Windows 10", "Windows 11"]), "取得日時": ""}
+        if rng.random() < 0.1:
+            continue  # 未実行の端末
+        def run_time():
+            if rng.random() < 0.15:
+                return ""
+            return (now - timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86399))).strftime("%Y-%m-%d %H:%M:%S")
+        rows.append([pc_name, registry[pc_name]["使用者"], run_time(), run_time(), rng.randint(0, 60), ""])
+    history_df = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    # 保存・読み込みを経由して実運用と同じ型にする
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "実行履歴.csv")
+        write_history_csv(history_df, path)
+        history_df = read_history_csv(path)
+    return registry, history_df
+
+def run(size, seed, legacy_limit, legacy_sample):
+    rng = random.Random(seed)
+    now = datetime.now()
+    registry, history_df = make_fleet(size, now, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        CompareDeviceLogs.EXECUTION_SUMMARY = os.path.join(tmp, "実行サマリー.csv")
+        start = time.perf_counter()
+        summary_df = CompareDeviceLogs.create_execution_summary(history_df, registry, now)
+        new_seconds = time.perf_counter() - start
+
+    estimated = size > legacy_limit
+    sample = dict(list(registry.items())[:legacy_sample]) if estimated else registry
+    start = time.perf_counter()
+    legacy_df = legacy_create_execution_summary(history_df, sample, now)
+    legacy_seconds = (time.perf_counter() - start) * len(registry) / len(sample)
+    identical = legacy_df.to_csv(index=False) == summary_df.head(len(sample)).to_csv(index=False)
+    return new_seconds, legacy_seconds, identical, estimated
+
+def main():
+    parser = argparse.ArgumentParser(description="実行サマリー作成の処理時間を比較します。")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="端末数")
+    parser.add_argument("--legacy-limit", type=int, default=10000, help="変更前の実装を全台で計測する最大端末数")
+    parser.add_argument("--legacy-sample", type=int, default=2000, help="推定時に変更前の実装で計測する台数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'端末数':>8}{'変更前(秒)':>14}{'現在(秒)':>12}{'高速化':>10}  出力")
+    for size in args.sizes:
+        new_seconds, legacy_seconds, identical, estimated = run(size, args.seed, args.legacy_limit, args.legacy_sample)
+        mark = "*" if estimated else " "
+        print(f"{size:>8}{legacy_seconds:>13.3f}{mark}{new_seconds:>12.3f}{legacy_seconds / new_seconds:>9.0f}x"
+              f"  {'一致' if identical else '不一致'}")
+    print("* 一部の端末で計測した推定値（出力の比較もその端末分）")
+
+if __name__ == "__main__":
+    main()
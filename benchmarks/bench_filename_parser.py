@@ -0,0 +1,115 @@
+"""提出ファイル名の解析時間の比較
+
+合成したファイル名（ブラウザログ・差分・集計サマリー・顔写真、一部は使用者名に
+アンダースコアを含むもの・解析できないもの）を、変更前の2つの正規表現と
+strptime による解析と、filename_parser（固定長の日時・メモ化）で解析して比較する。
+
+    python benchmarks/bench_filename_parser.py --names 1000000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+
+import filename_parser
+from filename_parser import parse_name, parse_filename, split_log_kind, tally_unparseable, format_tally
+
+# ===== 変更前の実装（log_scanner.parse_filename）=====
+LEGACY_LOG_PATTERN = re.compile(r"(.+)_(.+)_(\d{4}-\d{2}-\d{2})_(.+)\.json")
+LEGACY_PHOTO_PATTERN = re.compile(r"(.+)_(.+)_(\d{8})_(\d{6})\.jpg")
+
+def legacy_parse_date_from_filename(filename):
+    log_match = LEGACY_LOG_PATTERN.match(filename)
+    if log_match:
+        date_str = log_match.group(3)
+        time_str = log_match.group(4).replace("_", " ")
+        try:
+            return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H%M%S")
+        except:
+            pass
+    photo_match = LEGACY_PHOTO_PATTERN.match(filename)
+    if photo_match:
+        try:
+            return datetime.strptime(f"{photo_match.group(3)}_{photo_match.group(4)}", "%Y%m%d_%H%M%S")
+        except:
+            pass
+    return None
+
+def legacy_parse_filename(filename):
+    filename, _ = split_log_kind(filename)
+    parts = filename.split("_")
+    pc_name = parts[0] if len(parts) >= 2 else ""
+    user_name = parts[1] if len(parts) >= 2 else ""
+    return pc_name, user_name, legacy_parse_date_from_filename(filename)
+
+# ===== 合成データ =====
+def make_names(count, rng):
+    """提出フォルダにありそうなファイル名を count 件作成（約1%は解析できない名前）"""
+    log_suffixes = [".json", ".delta.json", ".heartbeat.json", ".jsonl.gz", ".summary.json"]
+    names = []
+    for _ in range(count):
+        pc = f"PC{rng.randint(0, 99999):05d}"
+        user = rng.choice(["user", "taro_yamada", "hanako", "s_suzuki"]) + str(rng.randint(0, 999))
+        when = datetime(2024, 1, 1) + (datetime(2026, 1, 1) - datetime(2024, 1, 1)) * rng.random()
+        roll = rng.random()
+        if roll < 0.01:
+            names.append(rng.choice(["Thumbs.db", f"{pc}_{when:%Y-%m-%d}.json", f"{pc}_{user}_2024-02-30_120000.json"]))
+        elif roll < 0.3:
+            names.append(f"{pc}_{user}_{when:%Y%m%d_%H%M%S}.jpg")
+        else:
+            names.append(f"{pc}_{user}_{when:%Y-%m-%d_%H%M%S}{rng.choice(log_suffixes)}")
+    return names
+
+def measure(parser, names):
+    start = time.perf_counter()
+    results = [parser(name) for name in names]
+    return time.perf_counter() - start, results
+
+def run(count, seed):
+    names = make_names(count, random.Random(seed))
+
+    legacy_seconds, legacy_results = measure(legacy_parse_filename, names)
+    parse_name.cache_clear()
+    cold_seconds, results = measure(parse_filename, names)
+    # 同じフォルダを再び一覧した場合（キャッシュに収まる件数で計測）
+    rescan = names[:filename_parser.PARSE_CACHE_SIZE]
+    measure(parse_filename, rescan)
+    warm_seconds, _ = measure(parse_filename, rescan)
+
+    # 使用者名にアンダースコアを含まない名前は変更前と同じ結果になること
+    # （変更前は集計サマリーの日時を解析しないため、サマリーは比較しない）
+    mismatches = sum(
+        1 for name, old, new in zip(names, legacy_results, results)
+        if new[2] and "_" not in new[1] and not name.endswith(filename_parser.SUMMARY_SUFFIX) and old != new
+    )
+    legacy_user_split = sum(1 for old, new in zip(legacy_results, results) if new[2] and old[1] != new[1])
+    legacy_only = sum(1 for old, new in zip(legacy_results, results) if old[2] and not new[2])
+
+    print(f"ファイル名 {count:,}件（解析キャッシュ {filename_parser.PARSE_CACHE_SIZE:,}件）")
+    print("| 実装 | 件数 | 秒 | 1件あたり(µs) |")
+    print("|------|---:|---:|---:|")
+    for label, size, seconds in [("変更前（正規表現2つ + strptime）", count, legacy_seconds),
+                                 ("filename_parser（初回）", count, cold_seconds),
+                                 ("filename_parser（再一覧・キャッシュ内）", len(rescan), warm_seconds)]:
+        print(f"| {label} | {size:,} | {seconds:.2f} | {seconds / size * 1e6:.2f} |")
+    tally = tally_unparseable(names)
+    print(f"解析できない名前: {sum(tally.values()):,}件（{format_tally(tally)}）")
+    print(f"変更前と結果が異なる名前（使用者名にアンダースコアなし）: {mismatches}件")
+    print(f"変更前は解析でき、現在は解析できない名前: {legacy_only}件")
+    print(f"変更前は使用者名が途中で切れていた名前: {legacy_user_split:,}件")
+
+def main():
+    parser = argparse.ArgumentParser(description="提出ファイル名の解析時間を比較します。")
+    parser.add_argument("--names", type=int, default=1000000, help="ファイル名の件数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.names, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""ブラウザログの保存形式ごとのサイズと読み込み時間の比較
+
+合成した端末群のログを各形式で一時フォルダに書き出し、合計サイズと
+管理者ツール側の読み込み（read_log_document）時間を計測する。
+
+    python benchmarks/bench_log_formats.py --pcs 1000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "distribute"))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+
+from log_writer import FORMAT_SUFFIXES, encode_log, resolve_format
+from log_reader import read_log_document
+
+def make_extension_pool(size, rng):
+    """よく使われる拡張機能を模した (ID, バージョン, 名称, 説明) の一覧"""
+    pool = []
+    for i in range(size):
+        ext_id = "".join(rng.choice("abcdefghijklmnop") for _ in range(32))
+        pool.append({
+            "id": ext_id,
+            "version": f"{rng.randint(1, 30)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}",
+            "name": f"拡張機能 {i}",
+            "description": "業務効率化のためのブラウザ拡張機能です。" * rng.randint(1, 6),
+            "manifest_version": rng.choice([2, 3])
+        })
+    return pool
+
+def make_device_log(pool, rng):
+    """1台分のログ（プロファイルのリスト）を作成"""
+    profiles = []
+    for browser in ["chrome", "edge"]:
+        for p in range(rng.randint(1, 4)):
+            profiles.append({
+                "browser": browser,
+                "profile": "Default" if p == 0 else f"Profile {p}",
+                "user_name": f"user{rng.randint(0, 9999)}@example.co.jp",
+                "gaia_name": "",
+                "extensions": rng.sample(pool, rng.randint(3, 40))
+            })
+    return profiles
+
+def run(pcs, seed):
+    rng = random.Random(seed)
+    pool = make_extension_pool(300, rng)
+    logs = [make_device_log(pool, rng) for _ in range(pcs)]
+
+    results = []
+    for fmt in FORMAT_SUFFIXES:
+        actual = resolve_format(fmt, "full")
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            start = time.perf_counter()
+            for i, data in enumerate(logs):
+                path = os.path.join(tmp, f"PC{i:05d}_user_2024-05-01_120000{FORMAT_SUFFIXES[actual]}")
+                with open(path, "wb") as f:
+                    f.write(encode_log(data, "full", actual))
+                paths.append(path)
+            write_seconds = time.perf_counter() - start
+            total_bytes = sum(os.path.getsize(p) for p in paths)
+
+            start = time.perf_counter()
+            count = 0
+            for path in paths:
+                count += sum(len(p["extensions"]) for p in read_log_document(path))
+            read_seconds = time.perf_counter() - start
+
+        results.append({
+            "format": fmt if fmt == actual else f"{fmt}→{actual}",
+            "bytes": total_bytes,
+            "write_seconds": write_seconds,
+            "read_seconds": read_seconds,
+            "extensions": count
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="ブラウザログの保存形式ごとのサイズ・読み込み時間を比較します。")
+    parser.add_argument("--pcs", type=int, default=1000, help="合成する端末数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = run(args.pcs, args.seed)
+    base = results[0]
+    print(f"端末数: {args.pcs}台 / 拡張機能レコード: {base['extensions']}件")
+    print(f"{'形式':<12}{'合計サイズ':>14}{'比率':>8}{'書き込み(秒)':>14}{'読み込み(秒)':>14}")
+    for r in results:
+        print(f"{r['format']:<12}{r['bytes'] / 1024 / 1024:>12.2f}MB{r['bytes'] / base['bytes']:>8.2f}"
+              f"{r['write_seconds']:>14.3f}{r['read_seconds']:>14.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""各ツールの起動時の import にかかる時間の計測（python -X importtime）
+
+ツールごとに別プロセスで `python -X importtime -c "import ツール"` を実行し、ツール本体の
+import の累計時間（cumulative）とプロセス全体の所要時間の中央値を表示する。
+--baseline に git のリビジョンを指定すると、そのリビジョンのツールも同じ方法で計測して比較する。
+読み込みに失敗したツール（cv2 など依存パッケージがない環境）は「読み込み失敗」と表示する。
+
+    python benchmarks/bench_startup.py --runs 7 --baseline HEAD~1
+"""
+import os
+import sys
+import time
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (フォルダ, モジュール)。PyInstaller で exe にするツールと管理者ツール
+ENTRY_POINTS = [
+    ("distribute", "collect_browser_info"),
+    ("distribute", "capture_face_photo"),
+    ("admin_tools", "CompareDeviceLogs"),
+    ("admin_tools", "ExecutionHistoryLogger"),
+    ("admin_tools", "ExtensionInventory"),
+    ("admin_tools", "MigrateToPartitions")
+]
+
+# 読み込みに時間がかかる依存パッケージ（読み込まれたかどうかを表示）
+HEAVY_MODULES = ["pandas", "matplotlib", "requests", "cv2", "numpy"]
+
+def parse_importtime(stderr):
+    """-X importtime の出力を (モジュール名, 階層, self µs, cumulative µs) のリストにする"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+def measure_once(tree, folder, module):
+    """1回分: (ツールの import の累計秒, プロセス全体の秒, 読み込まれた重い依存パッケージ)。失敗時は None"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(tree, folder), capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    rows = parse_importtime(result.stderr)
+    cumulative = next((us for name, depth, _, us in rows if name == module and depth == 0), 0)
+    loaded = sorted({name for name, _, _, _ in rows if name in HEAVY_MODULES})
+    return cumulative / 1e6, wall, loaded
+
+def measure(tree, folder, module, runs):
+    """runs 回計測した中央値（初回は .pyc の作成を含むため捨てる）"""
+    if measure_once(tree, folder, module) is None:
+        return None
+    samples = [measure_once(tree, folder, module) for _ in range(runs)]
+    samples = [s for s in samples if s is not None]
+    if not samples:
+        return None
+    return {
+        "import_seconds": statistics.median(s[0] for s in samples),
+        "process_seconds": statistics.median(s[1] for s in samples),
+        "heavy_modules": samples[0][2]
+    }
+
+def extract_revision(revision, dest):
+    """git のリビジョンのツール（distribute / admin_tools）を dest に展開"""
+    archive = subprocess.run(["git", "archive", "--format=tar", revision, "distribute", "admin_tools"],
+                             cwd=ROOT, capture_output=True, check=True).stdout
+    tar_path = os.path.join(dest, "tree.tar")
+    with open(tar_path, "wb") as f:
+        f.write(archive)
+    with tarfile.open(tar_path) as tar:
+        tar.extractall(dest)
+    os.remove(tar_path)
+
+def format_result(result):
+    if result is None:
+        return "読み込み失敗", "-", "-"
+    return (f"{result['import_seconds'] * 1000:.0f}", f"{result['process_seconds'] * 1000:.0f}",
+            ", ".join(result["heavy_modules"]) or "なし")
+
+def main():
+    parser = argparse.ArgumentParser(description="各ツールの起動時の import にかかる時間を計測します。")
+    parser.add_argument("--runs", type=int, default=5, help="ツールごとの計測回数（中央値を表示）")
+    parser.add_argument("--baseline", help="比較するgitのリビジョン（例: HEAD~1）")
+    args = parser.parse_args()
+
+    trees = [("現在", ROOT)]
+    with tempfile.TemporaryDirectory() as work:
+        if args.baseline:
+            extract_revision(args.baseline, work)
+            trees.insert(0, (args.baseline, work))
+
+        print(f"Python {sys.version.split()[0]}、各{args.runs}回の中央値（ミリ秒）")
+        print("| ツール | 対象 | import | プロセス全体 | 読み込まれる重いパッケージ |")
+        print("|------|------|---:|---:|------|")
+        for folder, module in ENTRY_POINTS:
+            for label, tree in trees:
+                import_ms, process_ms, heavy = format_result(measure(tree, folder, module, args.runs))
+                print(f"| {module} | {label} | {import_ms} | {process_ms} | {heavy} |")
+
+if __name__ == "__main__":
+    main()
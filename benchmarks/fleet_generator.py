@@ -0,0 +1,124 @@
+"""管理者ツール計測用の合成データ（端末台帳・ブラウザログ・顔写真）の作成
+
+指定フォルダに以下を作成する。共有フォルダは使わない。
+  端末台帳.csv   : PC名・使用者・OS・部署・取得日時（一部の使用者名はアンダースコアを含む）
+  logs/          : 端末ごとに runs 回分の全件ログと集計サマリー（収集ツールと同じ形式・期間別サブフォルダ）
+  face_photos/   : 端末ごとに runs 回分の顔写真（中身は最小限のJPEG）
+
+    python benchmarks/fleet_generator.py 出力フォルダ --pcs 1000 --runs 3
+"""
+import os
+import sys
+import csv
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "distribute"))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_writer import build_log_filename, encode_log, resolve_format
+from partitioning import partition_dir
+from collect_browser_info import build_log_summary, SUMMARY_SUFFIX
+from bench_log_formats import make_extension_pool, make_device_log
+
+REGISTRY_NAME = "端末台帳.csv"
+LOG_DIR_NAME = "logs"
+PHOTO_DIR_NAME = "face_photos"
+
+OS_CHOICES = ["Windows 10", "Windows 11", "Windows 11", "Windows 11"]
+DEPARTMENTS = ["総務部", "経理部", "営業部", "開発部", "人事部", "情報システム部"]
+
+# 最小限のJPEG（SOI・APP0・EOI）
+PLACEHOLDER_JPEG = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00\xff\xd9"
+
+def make_user_name(i, rng):
+    return rng.choice(["user", "taro_yamada", "hanako", "s_suzuki"]) + f"{i:06d}"
+
+def write_registry(path, devices):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PC名", "使用者", "OS", "部署", "取得日時"])
+        for device in devices:
+            writer.writerow([device["pc_name"], device["user_name"], device["os"], device["department"], device["acquired_at"]])
+
+def write_file(directory, filename, payload):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, filename), "wb") as f:
+        f.write(payload)
+    return len(payload)
+
+def generate_fleet(root, pcs, runs, seed=1, days=180, submit_ratio=0.95, photo_ratio=0.8,
+                   summary_ratio=1.0, log_format="json", layout="month", now=None):
+    """root 以下に合成データを作成し、件数とバイト数を返す
+
+    台帳の submit_ratio の端末がブラウザ情報を提出し、そのうち photo_ratio の端末が顔写真も提出する。
+    実行日時は直近 days 日に散らばる。summary_ratio の割合のログにだけ集計サマリーを付ける
+    （残りは集計サマリーのない古いログとして、管理者ツールがログ本体を読み込む）。
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    pool = make_extension_pool(300, rng)
+    log_root = os.path.join(root, LOG_DIR_NAME)
+    photo_root = os.path.join(root, PHOTO_DIR_NAME)
+    os.makedirs(log_root, exist_ok=True)
+    os.makedirs(photo_root, exist_ok=True)
+
+    devices = []
+    stats = {"pcs": pcs, "runs": runs, "log_files": 0, "summary_files": 0, "photo_files": 0, "bytes": 0}
+    fmt = resolve_format(log_format, "full")
+    for i in range(pcs):
+        device = {
+            "pc_name": f"PC{i:06d}",
+            "user_name": make_user_name(i, rng),
+            "os": rng.choice(OS_CHOICES),
+            "department": rng.choice(DEPARTMENTS),
+            "acquired_at": (now - timedelta(days=rng.randint(200, 2000))).strftime("%Y-%m-%d")
+        }
+        devices.append(device)
+        if rng.random() >= submit_ratio:
+            continue  # 未提出の端末
+
+        submits_photo = rng.random() < photo_ratio
+        log = make_device_log(pool, rng)
+        for _ in range(runs):
+            executed_at = (now - timedelta(seconds=rng.randint(0, days * 86400))).replace(microsecond=0)
+            timestamp = executed_at.strftime("%Y-%m-%d %H:%M:%S")
+            base_name = f"{device['pc_name']}_{device['user_name']}_{executed_at:%Y-%m-%d_%H%M%S}"
+            target_dir = partition_dir(log_root, executed_at, layout)
+            stats["bytes"] += write_file(target_dir, build_log_filename(base_name, "full", fmt), encode_log(log, "full", fmt))
+            stats["log_files"] += 1
+            if rng.random() < summary_ratio:
+                summary = build_log_summary(log, timestamp)
+                summary["kind"] = "full"
+                stats["bytes"] += write_file(target_dir, base_name + SUMMARY_SUFFIX,
+                                             json.dumps(summary, ensure_ascii=False).encode("utf-8"))
+                stats["summary_files"] += 1
+            if submits_photo:
+                photo_name = f"{device['pc_name']}_{device['user_name']}_{executed_at:%Y%m%d_%H%M%S}.jpg"
+                stats["bytes"] += write_file(partition_dir(photo_root, executed_at, layout), photo_name, PLACEHOLDER_JPEG)
+                stats["photo_files"] += 1
+
+    write_registry(os.path.join(root, REGISTRY_NAME), devices)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="管理者ツール計測用の合成データを作成します。")
+    parser.add_argument("output", help="出力フォルダ")
+    parser.add_argument("--pcs", type=int, default=1000, help="端末数")
+    parser.add_argument("--runs", type=int, default=3, help="端末あたりの実行回数")
+    parser.add_argument("--days", type=int, default=180, help="実行日時を散らばらせる日数")
+    parser.add_argument("--summary-ratio", type=float, default=1.0, help="集計サマリーを付けるログの割合")
+    parser.add_argument("--format", default="json", help="ログの保存形式（json / jsonl.gz / jsonl.zst / columnar）")
+    parser.add_argument("--layout", choices=["month", "day", "flat"], default="month", help="期間別サブフォルダの分け方")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    stats = generate_fleet(args.output, args.pcs, args.runs, args.seed, args.days,
+                           summary_ratio=args.summary_ratio, log_format=args.format, layout=args.layout)
+    print(json.dumps(stats, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
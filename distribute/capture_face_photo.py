@@ -4,11 +4,16 @@ import cv2
 import datetime
 import socket
 import getpass
+from partitioning import partition_dir
 
 # 📁 写真保存先（共有ネットワークドライブ）
 def get_shared_folder_path():
     return r"\\server\face_photos"
 
+# 🗂 共有フォルダの分け方（"month": YYYY-MM\ / "day": YYYY-MM-DD\ / "flat": 分けない）
+# 既定は従来どおり直下に保存（管理者ツールの更新を配布してから "month" などにする）
+PARTITION_LAYOUT = "flat"
+
 # 🖥 実行中のPC名を取得
 def get_pc_name():
     return socket.gethostname()
@@ -18,8 +23,9 @@ def get_user_name():
     return getpass.getuser()
 
 # 📅 現在の日時を"YYYYMMDD_HHMMSS"形式で取得
-def get_current_datetime_formatted():
-    now = datetime.datetime.now()
+def get_current_datetime_formatted(now=None):
+    if now is None:
+        now = datetime.datetime.now()
     formatted_datetime = now.strftime("%Y%m%d_%H%M%S")
     return formatted_datetime
 
@@ -55,10 +61,10 @@ def save_image(image, path):
         print(f"[エラー] 画像保存に失敗しました: {e}")
 
 # 📎 保存ファイル名を構築（PC名_ユーザー名_日時.jpg）
-def build_filename():
+def build_filename(now=None):
     pc = get_pc_name()
     user = get_user_name()
-    dt = get_current_datetime_formatted()
+    dt = get_current_datetime_formatted(now)
     return f"{pc}_{user}_{dt}.jpg"
 
 # 📍 実行ファイルのあるディレクトリを取得（未使用だが保持）
@@ -71,10 +77,12 @@ def get_executable_directory():
 
 # 🚀 メイン処理
 def main():
-    save_folder = get_shared_folder_path()
+    # 撮影日時の期間別サブフォルダへ保存（ファイル名と同じ日時で決める）
+    now = datetime.datetime.now()
+    save_folder = partition_dir(get_shared_folder_path(), now, PARTITION_LAYOUT)
     if not ensure_output_path(save_folder):
         return
-    filename = build_filename()
+    filename = build_filename(now)
     full_save_path = os.path.join(save_folder, filename)
     frame = capture_image_from_camera()
     if frame is not None:
@@ -1,17 +1,50 @@
 import os
+import sys
 import json
 import socket
 import getpass
 import datetime
-import requests
+import hashlib
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from manifest_cache import ManifestCache
+from delta_upload import load_upload_state, save_upload_state, save_pending_state, confirm_pending_state, plan_upload
+from log_writer import build_log_filename, encode_log, resolve_format
+from slack_notifier import SlackNotifier
+from partitioning import partition_name, partition_dir
+from spool import spool_files, drain_spool, start_background_forwarder, get_spool_dir, FORWARD_ARG
 
 # ===== Slack設定 =====
 SLACK_WEBHOOK_URL = "https://hooks.slack.com/services/XXXXXXXXX/XXXXXXXXX/XXXXXXXXXXXXXXXXXXXXXXXX"  # ←必ず差し替え
+SLACK_NOTIFY = True        # False の場合は端末ごとに通知せず、管理者ツールの新規提出通知にまとめる
+SLACK_WAIT_SECONDS = 20    # 終了前に通知の完了を待つ最大時間
 
 # ===== 保存先ネットワークフォルダ（管理者用）=====
 LOG_DIR = r"\\server\logs"
 
+# ===== 共有フォルダの分け方（"month": YYYY-MM\ / "day": YYYY-MM-DD\ / "flat": 分けない）=====
+# 既定は従来どおり直下に保存（管理者ツールの更新を配布してから "month" などにする）
+PARTITION_LAYOUT = "flat"
+
+# ===== プロファイルを同時にスキャンする数（1で逐次実行）=====
+SCAN_WORKERS = 8
+
+# ===== 集計サマリー（ログと同名で拡張子のみ異なるファイル）=====
+SUMMARY_SUFFIX = ".summary.json"
+
+# ===== 送信方式（"full": 毎回全件 / "delta": 変更分のみ・定期的に全件）=====
+UPLOAD_MODE = "full"
+
+# ===== ログの保存形式（"json" / "jsonl.gz" / "jsonl.zst" / "columnar"）=====
+LOG_FORMAT = "json"
+
+# ===== 送信待ちフォルダ（%LOCALAPPDATA%\BrowserAuditKit\spool）経由で共有フォルダへ送る =====
+# 既定は従来どおり共有フォルダへ直接保存（管理者ツールの更新を配布してから True にする）
+USE_SPOOL = False
+FORWARD_IN_BACKGROUND = True   # False の場合はこの場で転送を待つ
+FORWARD_TIMEOUT_SECONDS = 60   # この場で転送する場合に待つ最大時間
+
 # ===== 情報取得補助関数 =====
 def get_user_data_path(browser):
     local = os.environ.get("LOCALAPPDATA")
@@ -40,7 +73,16 @@ def list_profiles(user_data_path):
         })
     return result
 
-def list_extensions(profile_path):
+def read_manifest_fields(manifest_file):
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {
+        "name": manifest.get("name", "N/A"),
+        "description": manifest.get("description", ""),
+        "manifest_version": manifest.get("manifest_version", "")
+    }
+
+def list_extensions(profile_path, cache=None):
     ext_path = profile_path / "Extensions"
     if not ext_path.exists():
         return []
@@ -50,88 +92,196 @@ def list_extensions(profile_path):
             continue
         for version_dir in ext_id.iterdir():
             manifest_file = version_dir / "manifest.json"
-            if manifest_file.exists():
-                try:
-                    with open(manifest_file, "r", encoding="utf-8") as f:
-                        manifest = json.load(f)
-                    extensions.append({
-                        "id": ext_id.name,
-                        "version": version_dir.name,
-                        "name": manifest.get("name", "N/A"),
-                        "description": manifest.get("description", ""),
-                        "manifest_version": manifest.get("manifest_version", "")
-                    })
-                except:
-                    continue
+            try:
+                stat = manifest_file.stat()
+            except OSError:
+                continue
+            try:
+                # 更新日時・サイズが同じ manifest.json は前回の解析結果を使う
+                key = ManifestCache.make_key(ext_id.name, version_dir.name, stat) if cache is not None else None
+                fields = cache.get(key) if cache is not None else None
+                if fields is None:
+                    fields = read_manifest_fields(manifest_file)
+                    if cache is not None:
+                        cache.put(key, fields)
+                extensions.append({
+                    "id": ext_id.name,
+                    "version": version_dir.name,
+                    "name": fields["name"],
+                    "description": fields["description"],
+                    "manifest_version": fields["manifest_version"]
+                })
+            except:
+                continue
     return extensions
 
-def scan_browser(browser):
-    user_data_path = get_user_data_path(browser)
-    profiles = list_profiles(user_data_path)
+def scan_browsers(browsers, workers=SCAN_WORKERS, cache=None):
+    # プロファイル一覧はブラウザごとに取得し、拡張機能の読み込みをプロファイル単位で並列化
+    tasks = []
+    for browser in browsers:
+        try:
+            user_data_path = get_user_data_path(browser)
+            for prof in list_profiles(user_data_path):
+                tasks.append((browser, user_data_path, prof))
+        except Exception as e:
+            print(f"[{browser}] スキャン中にエラー: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(list_extensions, path / prof["profile"], cache) for _, path, prof in tasks]
+
+    # 結果はブラウザ・プロファイルの順に並べる（どこかで失敗したブラウザは従来どおり除外）
     results = []
-    for prof in profiles:
-        prof_info = {
+    failed = set()
+    for (browser, _, prof), future in zip(tasks, futures):
+        try:
+            extensions = future.result()
+        except Exception as e:
+            if browser not in failed:
+                print(f"[{browser}] スキャン中にエラー: {e}")
+            failed.add(browser)
+            continue
+        results.append({
             "browser": browser,
             "profile": prof['profile'],
             "user_name": prof['user_name'],
             "gaia_name": prof['gaia_name'],
-            "extensions": list_extensions(user_data_path / prof["profile"])
-        }
-        results.append(prof_info)
-    return results
+            "extensions": extensions
+        })
+    return [r for r in results if r["browser"] not in failed]
 
 # ===== Slack送信 =====
 def post_to_slack(message):
-    payload = {"text": message}
+    with SlackNotifier(SLACK_WEBHOOK_URL) as notifier:
+        return notifier.post(message)
+
+# ===== 集計サマリー作成 =====
+def build_log_summary(data, timestamp, scan_seconds=None):
+    extension_keys = sorted({f"{ext['id']}@{ext['version']}" for p in data for ext in p["extensions"]})
+    return {
+        "timestamp": timestamp,
+        "profile_count": len(data),
+        "extension_count": sum(len(p["extensions"]) for p in data),
+        "extension_hash": hashlib.sha256("\n".join(extension_keys).encode("utf-8")).hexdigest(),
+        "scan_seconds": scan_seconds
+    }
+
+# ===== JSON保存処理 =====
+def write_log_files(files, target_dir):
+    # 送信待ちフォルダを使わない場合は共有フォルダへ直接書き込む
+    os.makedirs(target_dir, exist_ok=True)
+    for filename, payload in files:
+        with open(os.path.join(target_dir, filename), "wb") as f:
+            f.write(payload)
+
+def save_log_to_network(data, pc_name, user_name, timestamp, scan_seconds=None, kind="full", summary_data=None):
+    # data は送信内容（全件・差分・ハートビート）、summary_data は集計対象の全件
+    # 保存したログのパス（送信待ちフォルダまたは共有フォルダ）を返す。失敗時は None
+    base_name = f"{pc_name}_{user_name}_{timestamp.replace(':', '').replace(' ', '_')}"
+    fmt = resolve_format(LOG_FORMAT, kind)
+    filename = build_log_filename(base_name, kind, fmt)
     try:
-        res = requests.post(SLACK_WEBHOOK_URL, json=payload)
-        if res.status_code != 200:
-            print(f"[Slack通知エラー] ステータスコード: {res.status_code}")
+        files = [(filename, encode_log(data, kind, fmt))]
     except Exception as e:
-        print(f"[Slack通知失敗] {e}")
+        print(f"[保存失敗] {e}")
+        return None
 
-# ===== JSON保存処理 =====
-def save_log_to_network(data, pc_name, user_name, timestamp):
-    filename = f"{pc_name}_{user_name}_{timestamp.replace(':', '').replace(' ', '_')}.json"
-    os.makedirs(LOG_DIR, exist_ok=True)
-    full_path = os.path.join(LOG_DIR, filename)
+    # 管理者ツールが全体を読まずに済むよう集計サマリーを併せて保存
     try:
-        with open(full_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"[保存完了] ログ → {full_path}")
+        summary = build_log_summary(data if summary_data is None else summary_data, timestamp, scan_seconds)
+        summary["kind"] = kind
+        files.append((base_name + SUMMARY_SUFFIX, json.dumps(summary, ensure_ascii=False).encode("utf-8")))
+    except Exception as e:
+        print(f"[サマリー保存失敗] {e}")
+
+    # 実行日時の期間別サブフォルダへ保存（管理者ツールが必要な期間だけ一覧できるように）
+    executed_at = datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    try:
+        if USE_SPOOL:
+            saved_path = spool_files(files, subdir=partition_name(executed_at, PARTITION_LAYOUT))[0]
+            print(f"[保存完了] ログ → {saved_path}（送信待ち）")
+        else:
+            target_dir = partition_dir(LOG_DIR, executed_at, PARTITION_LAYOUT)
+            write_log_files(files, target_dir)
+            saved_path = os.path.join(target_dir, filename)
+            print(f"[保存完了] ログ → {saved_path}")
     except Exception as e:
         print(f"[保存失敗] {e}")
+        return None
+    return saved_path
+
+# ===== 差分送信の送信状態 =====
+def confirm_upload_state():
+    # 送信待ちフォルダから消えた（共有フォルダへの書き込みを確認して転送された）ログの送信状態だけを確定する
+    spool_dir = get_spool_dir()
+    return confirm_pending_state(lambda log: not os.path.exists(os.path.join(spool_dir, log)))
+
+# ===== 送信待ちログの転送 =====
+def forward_spooled_logs(deadline_seconds=None):
+    deadline = time.time() + deadline_seconds if deadline_seconds else None
+    sent, remaining = drain_spool(LOG_DIR, deadline=deadline)
+    if sent or remaining:
+        print(f"[送信待ち] 転送 {sent}件 / 未送信 {remaining}件")
+    confirm_upload_state()
+    return remaining == 0
+
+def forward_main():
+    # --forward で起動されたバックグラウンド転送（共有フォルダに届くまで再試行）
+    return 0 if forward_spooled_logs() else 1
 
 # ===== メイン =====
 def main():
     pc_name = socket.gethostname()
     user_name = getpass.getuser()
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    all_data = []
 
-    for browser in ["chrome", "edge"]:
-        try:
-            result = scan_browser(browser)
-            all_data.extend(result)
-        except Exception as e:
-            print(f"[{browser}] スキャン中にエラー: {e}")
+    start = time.perf_counter()
+    cache = ManifestCache.load()
+    all_data = scan_browsers(["chrome", "edge"], cache=cache)
+    cache.save()
+    scan_seconds = round(time.perf_counter() - start, 2)
+    print(f"[スキャン完了] {scan_seconds}秒（manifestキャッシュ: {cache.hits}件再利用 / {cache.misses}件解析）")
 
     profile_count = len(all_data)
     extension_count = sum(len(p["extensions"]) for p in all_data)
 
-    # Slack通知
+    # Slack通知（ログの保存と並行して送信）
+    notifier = SlackNotifier(SLACK_WEBHOOK_URL)
     slack_message = (
         f"✅ 拡張機能収集完了\n"
         f"📌 PC名: {pc_name}\n"
         f"👤 ユーザー: {user_name}\n"
         f"🕒 実行時刻: {timestamp}\n"
         f"🌐 プロファイル数: {profile_count}件\n"
-        f"🧩 拡張機能数: {extension_count}件"
+        f"🧩 拡張機能数: {extension_count}件\n"
+        f"⏱ スキャン時間: {scan_seconds}秒"
     )
-    post_to_slack(slack_message)
+    if SLACK_NOTIFY:
+        notifier.send_async(slack_message)
+
+    # JSON保存（差分モードでは前回送信分からの変更のみ）
+    if UPLOAD_MODE == "delta":
+        # 前回のログが共有フォルダに届いたことを確認できない場合は、差分の起点が食い違わないよう全件を送る
+        state = load_upload_state() if confirm_upload_state() else None
+        kind, document, inventory, digest = plan_upload(all_data, state, timestamp)
+        saved_path = save_log_to_network(document, pc_name, user_name, timestamp, scan_seconds, kind, all_data)
+        if saved_path:
+            last_full = timestamp if kind == "full" else state["last_full"]
+            if USE_SPOOL:
+                # 送信状態は転送されたことを確認してから確定する（forward_spooled_logs / 次回の実行時）
+                save_pending_state(inventory, digest, last_full, os.path.relpath(saved_path, get_spool_dir()))
+            else:
+                save_upload_state(inventory, digest, last_full)
+    else:
+        save_log_to_network(all_data, pc_name, user_name, timestamp, scan_seconds)
+
+    # 送信待ちのログ（前回までに送れなかった分を含む）を共有フォルダへ転送
+    if USE_SPOOL:
+        if not (FORWARD_IN_BACKGROUND and start_background_forwarder()):
+            forward_spooled_logs(FORWARD_TIMEOUT_SECONDS)
 
-    # JSON保存
-    save_log_to_network(all_data, pc_name, user_name, timestamp)
+    notifier.close(SLACK_WAIT_SECONDS)
 
 if __name__ == "__main__":
+    if FORWARD_ARG in sys.argv[1:]:
+        sys.exit(forward_main())
     main()
@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import datetime
+import tempfile
+from manifest_cache import CACHE_DIR_NAME
+
+# ===== 差分アップロード設定 =====
+STATE_FILE_NAME = "upload_state.json"
+PENDING_FILE_NAME = "upload_state.pending.json"  # 送信待ちのログが共有フォルダへ届くまでの送信状態
+FULL_SNAPSHOT_INTERVAL_DAYS = 90  # この日数が経過したら差分ではなく全件を送る
+STATE_VERSION = 1
+
+def get_state_path(name=STATE_FILE_NAME):
+    local = os.environ.get("LOCALAPPDATA")
+    if not local:
+        return None
+    return os.path.join(local, CACHE_DIR_NAME, name)
+
+# ===== 正規化とハッシュ（管理者ツールの log_delta.py もこの実装を使う）=====
+def canonical_inventory(profiles):
+    # {"ブラウザ/プロファイル": {..., "extensions": {拡張機能ID: [バージョン順のレコード]}}}
+    inventory = {}
+    for p in profiles:
+        extensions = {}
+        for ext in p.get("extensions", []):
+            extensions.setdefault(ext["id"], []).append(ext)
+        for records in extensions.values():
+            records.sort(key=lambda e: e["version"])
+        inventory[f"{p['browser']}/{p['profile']}"] = {
+            "browser": p["browser"],
+            "profile": p["profile"],
+            "user_name": p.get("user_name", ""),
+            "gaia_name": p.get("gaia_name", ""),
+            "extensions": extensions
+        }
+    return inventory
+
+def inventory_hash(inventory):
+    text = json.dumps(inventory, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def diff_inventory(old, new):
+    changes = []
+    for key in sorted(set(old) | set(new)):
+        before = old.get(key)
+        after = new.get(key)
+        if before == after:
+            continue
+        if before is None:
+            changes.append({
+                "browser": after["browser"], "profile": after["profile"],
+                "user_name": after["user_name"], "gaia_name": after["gaia_name"],
+                "status": "added",
+                "added": [e for ext_id in sorted(after["extensions"]) for e in after["extensions"][ext_id]],
+                "removed": [], "updated": []
+            })
+        elif after is None:
+            changes.append({"browser": before["browser"], "profile": before["profile"], "status": "removed"})
+        else:
+            old_ext = before["extensions"]
+            new_ext = after["extensions"]
+            changes.append({
+                "browser": after["browser"], "profile": after["profile"],
+                "user_name": after["user_name"], "gaia_name": after["gaia_name"],
+                "status": "changed",
+                "added": [e for ext_id in sorted(set(new_ext) - set(old_ext)) for e in new_ext[ext_id]],
+                "removed": sorted(set(old_ext) - set(new_ext)),
+                "updated": [e for ext_id in sorted(set(new_ext) & set(old_ext))
+                            if new_ext[ext_id] != old_ext[ext_id] for e in new_ext[ext_id]]
+            })
+    return changes
+
+# ===== 前回アップロード状態の保存・読み込み =====
+def load_upload_state(path=None):
+    path = path or get_state_path()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            return None
+        return state
+    except Exception as e:
+        print(f"[差分] 前回の送信状態を読み込めないため全件を送信します: {e}")
+        return None
+
+def save_upload_state(inventory, digest, last_full, path=None, log=None):
+    path = path or get_state_path()
+    if not path:
+        return
+    tmp_path = None
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".upload_state_", suffix=".tmp", dir=directory)
+        state = {"version": STATE_VERSION, "hash": digest, "last_full": last_full, "inventory": inventory}
+        if log:
+            state["log"] = log
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[差分] 送信状態の保存に失敗しました: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# ===== 送信待ちのログが共有フォルダへ届いてから送信状態を確定する =====
+def save_pending_state(inventory, digest, last_full, log, path=None):
+    """送信待ちフォルダに置いたログ（log）が転送されるまで、送信状態を保留として保存"""
+    save_upload_state(inventory, digest, last_full, path or get_state_path(PENDING_FILE_NAME), log)
+
+def confirm_pending_state(is_delivered, path=None, pending_path=None):
+    """保留中の送信状態のログが届いていれば（is_delivered(log) が True）確定し、確定できないものが残れば False"""
+    path = path or get_state_path()
+    pending_path = pending_path or get_state_path(PENDING_FILE_NAME)
+    if not pending_path or not os.path.exists(pending_path):
+        return True
+    try:
+        with open(pending_path, "r", encoding="utf-8") as f:
+            log = json.load(f).get("log")
+        if not log or not is_delivered(log):
+            return False
+        os.replace(pending_path, path)
+        return True
+    except Exception as e:
+        print(f"[差分] 送信状態を確定できませんでした: {e}")
+        return False
+
+# ===== 送信内容の決定 =====
+def plan_upload(all_data, state, timestamp):
+    """(種類, 送信する内容, 正規化済み一覧, ハッシュ) を返す"""
+    inventory = canonical_inventory(all_data)
+    digest = inventory_hash(inventory)
+
+    full_due = True
+    if state and state.get("last_full"):
+        last_full = datetime.datetime.strptime(state["last_full"], "%Y-%m-%d %H:%M:%S")
+        now = datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        full_due = (now - last_full).days >= FULL_SNAPSHOT_INTERVAL_DAYS
+
+    if full_due:
+        return "full", all_data, inventory, digest
+
+    if state["hash"] == digest:
+        return "heartbeat", {"format": "heartbeat", "timestamp": timestamp, "hash": digest}, inventory, digest
+
+    document = {
+        "format": "delta",
+        "timestamp": timestamp,
+        "base": state["hash"],
+        "hash": digest,
+        "profiles": diff_inventory(state["inventory"], inventory)
+    }
+    return "delta", document, inventory, digest
@@ -0,0 +1,86 @@
+import io
+import json
+import gzip
+
+# ===== 出力形式とファイル名の末尾 =====
+# json      : 従来どおり整形済みJSON
+# jsonl.gz  : 1行1プロファイルのJSON Lines を gzip 圧縮
+# jsonl.zst : 同上を zstd 圧縮（zstd が使えない環境では jsonl.gz）
+# columnar  : 拡張機能の情報を (ID, バージョン) ごとに1回だけ持つ辞書表形式
+FORMAT_SUFFIXES = {
+    "json": ".json",
+    "jsonl.gz": ".jsonl.gz",
+    "jsonl.zst": ".jsonl.zst",
+    "columnar": ".col.json"
+}
+
+# ===== ログの種類（全件・差分・ハートビート）を表すファイル名の印 =====
+KIND_MARKERS = {
+    "full": "",
+    "delta": ".delta",
+    "heartbeat": ".heartbeat"
+}
+
+COLUMNAR_FIELDS = ["id", "version", "name", "description", "manifest_version"]
+
+def get_zstd_compressor():
+    try:
+        from compression import zstd  # Python 3.14 以降
+        return zstd.compress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress
+    except ImportError:
+        return None
+
+def resolve_format(fmt, kind):
+    # 辞書表形式は全件のみ（差分・ハートビートは通常のJSON）
+    if fmt == "columnar" and kind != "full":
+        return "json"
+    if fmt == "jsonl.zst" and get_zstd_compressor() is None:
+        print("[ログ形式] zstd が使用できないため gzip で保存します。")
+        return "jsonl.gz"
+    return fmt
+
+def build_log_filename(base_name, kind, fmt):
+    return base_name + KIND_MARKERS[kind] + FORMAT_SUFFIXES[fmt]
+
+def to_columnar(profiles):
+    table = []
+    index = {}
+    columnar_profiles = []
+    for p in profiles:
+        refs = []
+        for ext in p["extensions"]:
+            row = [ext.get(field, "") for field in COLUMNAR_FIELDS]
+            key = json.dumps(row, ensure_ascii=False)
+            if key not in index:
+                index[key] = len(table)
+                table.append(row)
+            refs.append(index[key])
+        prof = {k: v for k, v in p.items() if k != "extensions"}
+        prof["extensions"] = refs
+        columnar_profiles.append(prof)
+    return {"format": "columnar", "fields": COLUMNAR_FIELDS, "extensions": table, "profiles": columnar_profiles}
+
+def encode_jsonl(document, kind):
+    # 全件は1行1プロファイル、差分・ハートビートは1行
+    records = document if kind == "full" else [document]
+    buf = io.StringIO()
+    for record in records:
+        buf.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        buf.write("\n")
+    return buf.getvalue().encode("utf-8")
+
+def encode_log(document, kind, fmt):
+    if fmt == "json":
+        return json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8")
+    if fmt == "columnar":
+        return json.dumps(to_columnar(document), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if fmt == "jsonl.gz":
+        return gzip.compress(encode_jsonl(document, kind), compresslevel=6)
+    if fmt == "jsonl.zst":
+        return get_zstd_compressor()(encode_jsonl(document, kind))
+    raise ValueError(f"Unsupported log format: {fmt}")
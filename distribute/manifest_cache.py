@@ -0,0 +1,89 @@
+import os
+import json
+import threading
+import tempfile
+from collections import OrderedDict
+
+# ===== キャッシュ設定 =====
+CACHE_DIR_NAME = "BrowserAuditKit"
+CACHE_FILE_NAME = "manifest_cache.json"
+CACHE_MAX_ENTRIES = 2000
+CACHE_VERSION = 1
+
+def get_cache_path():
+    local = os.environ.get("LOCALAPPDATA")
+    if not local:
+        return None
+    return os.path.join(local, CACHE_DIR_NAME, CACHE_FILE_NAME)
+
+# ===== manifest.json 解析結果のキャッシュ =====
+class ManifestCache:
+    """(拡張機能ID, バージョン, manifestの更新日時, サイズ) → 取得項目 のLRUキャッシュ
+
+    manifest.json が更新されると更新日時・サイズが変わりキーが一致しなくなるため、
+    古い結果は自動的に使われなくなり、上限件数を超えた分から捨てられる。
+    """
+
+    def __init__(self, path=None, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=None, max_entries=CACHE_MAX_ENTRIES):
+        cache = cls(path or get_cache_path(), max_entries)
+        if cache.path and os.path.exists(cache.path):
+            try:
+                with open(cache.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    for key, value in data.get("entries", []):
+                        cache.entries[key] = value
+            except Exception as e:
+                print(f"[キャッシュ] 読み込みに失敗したため作り直します: {e}")
+        return cache
+
+    @staticmethod
+    def make_key(ext_id, version, stat):
+        return f"{ext_id}/{version}/{stat.st_mtime_ns}/{stat.st_size}"
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        tmp_path = None
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".manifest_cache_", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                with self.lock:
+                    json.dump({"version": CACHE_VERSION, "entries": list(self.entries.items())},
+                              f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception as e:
+            print(f"[キャッシュ] 保存に失敗しました: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,20 @@
+import os
+
+# ===== 共有フォルダの期間別サブフォルダ =====
+# month : \\server\logs\YYYY-MM\
+# day   : \\server\logs\YYYY-MM-DD\
+# flat  : 分けない（従来どおり直下）
+PARTITION_FORMATS = {
+    "month": "%Y-%m",
+    "day": "%Y-%m-%d",
+    "flat": None
+}
+
+def partition_name(when, layout="month"):
+    # 実行日時（datetime）が属するサブフォルダ名。flat の場合は空文字
+    fmt = PARTITION_FORMATS[layout]
+    return when.strftime(fmt) if fmt else ""
+
+def partition_dir(root, when, layout="month"):
+    name = partition_name(when, layout)
+    return os.path.join(root, name) if name else root
@@ -0,0 +1,137 @@
+import time
+import random
+import threading
+
+# ===== 通知設定の既定値 =====
+CONNECT_TIMEOUT = 3.05   # 接続までの待ち時間（秒）
+READ_TIMEOUT = 10        # 応答までの待ち時間（秒）
+MAX_RETRIES = 3          # 失敗時の再送回数
+BACKOFF_SECONDS = 1.0    # 再送の待ち時間（倍々に延ばし、ゆらぎを加える）
+MAX_BACKOFF_SECONDS = 30 # 再送の待ち時間の上限（Retry-After で指定された場合も含む）
+POOL_SIZE = 4            # 接続プールの大きさ
+BATCH_MAX_LINES = 50     # まとめ送信で1通に載せる最大行数（超えた分は件数のみ）
+MESSAGE_MAX_CHARS = 3500 # 1通あたりの最大文字数（超える場合は分割）
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def coalesce_messages(messages, header=None, max_lines=BATCH_MAX_LINES, max_chars=MESSAGE_MAX_CHARS):
+    """同じ内容をまとめ、件数を付けて1通（長い場合は数通）に整形"""
+    counts = {}
+    for message in messages:
+        counts[message] = counts.get(message, 0) + 1
+    lines = [m if n == 1 else f"{m}（×{n}）" for m, n in counts.items()]
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"（他 {len(lines) - max_lines}件）"]
+
+    chunks = []
+    current = header or ""
+    for line in lines:
+        candidate = f"{current}\n{line}" if current else line
+        if current and len(candidate) > max_chars:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+class SlackNotifier:
+    """Slack Incoming Webhook への通知（接続の再利用・タイムアウト・再送・まとめ送信）
+
+    batch=True の場合、send() した内容は flush() までためておき、まとめて送信する。
+    send_async() は別スレッドで送信し、close() で指定時間まで完了を待つ。
+    接続（requests）は最初に送信するときに作成するため、送信しない場合は requests を読み込まない。
+    """
+
+    def __init__(self, webhook_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, pool_size=POOL_SIZE, batch=False):
+        self.webhook_url = webhook_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.batch = batch
+        self.pending = []
+        self.threads = []
+        self.lock = threading.Lock()
+        self.pool_size = pool_size
+        self.session = None
+
+    def get_session(self):
+        """接続を再利用するセッション（最初の呼び出しで作成）"""
+        with self.lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.session = session
+            return self.session
+
+    def retry_delay(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), MAX_BACKOFF_SECONDS)
+        return min(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5), MAX_BACKOFF_SECONDS)
+
+    def post(self, message):
+        """1通送信し、成功したかどうかを返す"""
+        session = self.get_session()
+        import requests
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = session.post(self.webhook_url, json={"text": message}, timeout=self.timeout)
+                if response.status_code == 200:
+                    return True
+                if response.status_code not in RETRY_STATUS:
+                    print(f"[Slack通知エラー] ステータスコード: {response.status_code}")
+                    return False
+                error = f"ステータスコード: {response.status_code}"
+            except requests.RequestException as e:
+                error = e
+            if attempt >= self.max_retries:
+                print(f"[Slack通知失敗] {error}")
+                return False
+            time.sleep(self.retry_delay(attempt, response))
+        return False
+
+    def send(self, message):
+        """通知する（まとめ送信時はためておく）"""
+        if self.batch:
+            with self.lock:
+                self.pending.append(message)
+            return True
+        return self.post(message)
+
+    def send_async(self, message):
+        """別スレッドで送信し、呼び出し元は待たない"""
+        thread = threading.Thread(target=self.post, args=(message,), daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return thread
+
+    def flush(self, header=None):
+        """ためておいた内容をまとめて送信"""
+        with self.lock:
+            messages, self.pending = self.pending, []
+        if not messages:
+            return True
+        results = [self.post(chunk) for chunk in coalesce_messages(messages, header)]
+        return all(results)
+
+    def close(self, timeout=None):
+        """未送信分を送り、別スレッドの送信を最大 timeout 秒待って接続を閉じる"""
+        self.flush()
+        deadline = time.time() + timeout if timeout is not None else None
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+        # 送信中のスレッドが残っている場合は接続を閉じずに終了する（プロセス終了時に破棄）
+        if self.session is not None and not any(thread.is_alive() for thread in self.threads):
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
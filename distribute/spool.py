@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+from manifest_cache import CACHE_DIR_NAME
+
+# ===== 送信待ちフォルダ（ローカル）=====
+SPOOL_DIR_NAME = "spool"
+LOCK_FILE_NAME = ".forward.lock"
+LOCK_STALE_SECONDS = 60 * 60  # これより古いロックは異常終了の残骸とみなす
+
+# ===== 再送設定 =====
+FORWARD_MAX_ATTEMPTS = 6      # 1ファイルあたりの試行回数
+FORWARD_BASE_DELAY = 2.0      # 初回の待ち時間（秒）、以降は倍々
+FORWARD_MAX_DELAY = 60.0      # 待ち時間の上限（秒）
+FORWARD_ARG = "--forward"
+
+def get_spool_dir():
+    local = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    return os.path.join(local, CACHE_DIR_NAME, SPOOL_DIR_NAME)
+
+# ===== 送信待ちフォルダへの書き込み =====
+def spool_files(files, spool_dir=None, subdir=""):
+    # files は (ファイル名, 内容のbytes) のリスト。1件ずつ一時ファイル経由で配置する
+    # subdir は共有フォルダ側の期間別サブフォルダ（送信待ちフォルダにも同じ名前で置き、転送時に引き継ぐ）
+    spool_dir = spool_dir or get_spool_dir()
+    target_dir = os.path.join(spool_dir, subdir) if subdir else spool_dir
+    os.makedirs(target_dir, exist_ok=True)
+    written = []
+    for filename, payload in files:
+        fd, tmp_path = tempfile.mkstemp(prefix=".spool_", suffix=".tmp", dir=target_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            final_path = os.path.join(target_dir, filename)
+            os.replace(tmp_path, final_path)
+            written.append(final_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return written
+
+def list_files(directory):
+    return [
+        name for name in os.listdir(directory)
+        if not name.startswith(".") and os.path.isfile(os.path.join(directory, name))
+    ]
+
+def list_spooled(spool_dir=None):
+    # 送信待ちフォルダからの相対パスの一覧（期間別サブフォルダ内を含む）
+    # ファイル名順（同じ実行ではログ本体が集計サマリーより先、実行日時の古い順）
+    spool_dir = spool_dir or get_spool_dir()
+    if not os.path.isdir(spool_dir):
+        return []
+    names = list_files(spool_dir)
+    for subdir in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, subdir)
+        if not subdir.startswith(".") and os.path.isdir(path):
+            names.extend(os.path.join(subdir, name) for name in list_files(path))
+    return sorted(names)
+
+# ===== 多重起動防止 =====
+def acquire_lock(spool_dir):
+    lock_path = os.path.join(spool_dir, LOCK_FILE_NAME)
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    os.close(fd)
+    return lock_path
+
+def release_lock(lock_path):
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+# ===== 共有フォルダへの転送 =====
+def forward_file(src_path, dest_dir):
+    # 一時名でコピーしてサイズを確認後、本来の名前へ置き換える（途中のファイルは管理者ツールから見えない）
+    filename = os.path.basename(src_path)
+    os.makedirs(dest_dir, exist_ok=True)
+    partial_path = os.path.join(dest_dir, f".{filename}.partial")
+    shutil.copyfile(src_path, partial_path)
+    if os.path.getsize(partial_path) != os.path.getsize(src_path):
+        os.remove(partial_path)
+        raise IOError(f"転送後のサイズが一致しません: {filename}")
+    os.replace(partial_path, os.path.join(dest_dir, filename))
+    os.remove(src_path)
+
+def backoff_delay(attempt):
+    delay = min(FORWARD_BASE_DELAY * (2 ** attempt), FORWARD_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.5)
+
+def drain_spool(dest_dir, spool_dir=None, max_attempts=FORWARD_MAX_ATTEMPTS, deadline=None):
+    # 送信待ちのファイルを順に転送する。転送できないファイルがあればそこで打ち切り、次回に持ち越す
+    spool_dir = spool_dir or get_spool_dir()
+    if not list_spooled(spool_dir):
+        return 0, 0
+    lock_path = acquire_lock(spool_dir)
+    if lock_path is None:
+        print("[送信待ち] 別の転送処理が実行中です。")
+        return 0, len(list_spooled(spool_dir))
+
+    sent = 0
+    try:
+        for relative_path in list_spooled(spool_dir):
+            src_path = os.path.join(spool_dir, relative_path)
+            # 送信待ちフォルダと同じ期間別サブフォルダへ転送する
+            subdir, filename = os.path.split(relative_path)
+            target_dir = os.path.join(dest_dir, subdir) if subdir else dest_dir
+            for attempt in range(max_attempts):
+                try:
+                    forward_file(src_path, target_dir)
+                    sent += 1
+                    print(f"[転送完了] {filename} → {target_dir}")
+                    break
+                except Exception as e:
+                    print(f"[転送失敗] {filename}（{attempt + 1}/{max_attempts}回目）: {e}")
+                    delay = backoff_delay(attempt)
+                    if attempt + 1 >= max_attempts or (deadline and time.time() + delay > deadline):
+                        return sent, len(list_spooled(spool_dir))
+                    time.sleep(delay)
+    finally:
+        release_lock(lock_path)
+    return sent, len(list_spooled(spool_dir))
+
+# ===== バックグラウンド転送の起動 =====
+def start_background_forwarder():
+    # 実行ファイル（PyInstaller）なら自分自身を、スクリプトならPythonで自分を --forward 付きで起動する
+    if getattr(sys, "frozen", False):
+        command = [sys.executable, FORWARD_ARG]
+    else:
+        command = [sys.executable, os.path.abspath(sys.argv[0]), FORWARD_ARG]
+    kwargs = {
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.DEVNULL,
+        "close_fds": True
+    }
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(command, **kwargs)
+        return True
+    except Exception as e:
+        print(f"[送信待ち] バックグラウンド転送を起動できませんでした: {e}")
+        return False
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "distribute"))
+sys.path.insert(0, os.path.join(ROOT, "admin_tools"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch):
+    """合成データ（台帳・ブラウザログ・顔写真）と実行サマリーを作成し、作業フォルダをそこへ移す"""
+    import fleet_generator
+    import CompareDeviceLogs
+    import ExecutionHistoryLogger
+    import slack_notifier
+
+    fleet_generator.generate_fleet(str(tmp_path), pcs=40, runs=2)
+    monkeypatch.chdir(tmp_path)
+    for module in (CompareDeviceLogs, ExecutionHistoryLogger):
+        monkeypatch.setattr(module, "LOG_FOLDER", fleet_generator.LOG_DIR_NAME)
+        monkeypatch.setattr(module, "FACE_PHOTO_FOLDER", fleet_generator.PHOTO_DIR_NAME)
+        monkeypatch.setattr(module, "RUN_REPORT", None)
+    # Slackへは送信しない
+    monkeypatch.setattr(slack_notifier.SlackNotifier, "post", lambda self, message: True)
+    monkeypatch.setattr(ExecutionHistoryLogger, "ARCHIVE_FOLDER", "archives")
+    CompareDeviceLogs.main([])
+    return tmp_path
@@ -0,0 +1,121 @@
+import io
+from datetime import datetime
+import pandas as pd
+import pytest
+import CompareDeviceLogs
+
+NOW = datetime(2026, 10, 17, 9, 0, 0)
+
+REGISTRY = {
+    "PC001": {"使用者": "user1", "OS": "Windows 11"},
+    "PC002": {"使用者": "user2", "OS": "Windows 10"},
+    "PC003": {"使用者": "user3", "OS": ""},
+    "PC_A04": {"使用者": "user4"},
+    "PC005": {"使用者": "user5", "OS": "Windows 11"},
+    "PC006": {"使用者": "user6", "OS": "Windows 11"},
+}
+
+HISTORY_CSV = """PC名,使用者,ブラウザ情報実行日時,顔写真実行日時,拡張機能数
+PC001,user1,2026-10-10 12:00:00,2026-10-01 08:30:00,12
+PC001,user1,2026-01-01 00:00:00,2026-01-01 00:00:00,3
+PC002,user2,2026-08-01 12:00:00,,0
+PC_A04,user4,,2026-09-17 08:59:59,
+PC005,user5,2026/10/01 12:00,2026-09-16 08:59:59,7
+PC999,user9,2026-10-10 12:00:00,2026-10-10 12:00:00,5
+"""
+
+def baseline_execution_summary(history_df, registry, now):
+    """ベクトル化する前の create_execution_summary（比較用）"""
+    summary_data = []
+    for pc_name, info in registry.items():
+        user_name = info["使用者"]
+        pc_history = history_df[history_df["PC名"] == pc_name]
+        if len(pc_history) > 0:
+            browser_time_str = pc_history.iloc[0]["ブラウザ情報実行日時"]
+            face_time_str = pc_history.iloc[0]["顔写真実行日時"]
+            extension_count = pc_history.iloc[0]["拡張機能数"]
+            browser_time = None
+            face_time = None
+            if browser_time_str:
+                try:
+                    browser_time = datetime.strptime(browser_time_str, "%Y-%m-%d %H:%M:%S")
+                except:
+                    pass
+            if face_time_str:
+                try:
+                    face_time = datetime.strptime(face_time_str, "%Y-%m-%d %H:%M:%S")
+                except:
+                    pass
+            browser_status = "未提出"
+            if browser_time:
+                days_since_browser = (now - browser_time).days
+                if days_since_browser <= 30:
+                    browser_status = "✅"
+                else:
+                    browser_status = f"要更新({days_since_browser}日経過)"
+            face_status = "未提出"
+            if face_time:
+                days_since_face = (now - face_time).days
+                if days_since_face <= 30:
+                    face_status = "✅"
+                else:
+                    face_status = f"要更新({days_since_face}日経過)"
+            status_summary = "未完了"
+            if browser_status == "✅" and face_status == "✅":
+                status_summary = "完了"
+            elif browser_status == "✅" or face_status == "✅":
+                status_summary = "一部完了"
+            summary_data.append({
+                "PC名": pc_name,
+                "使用者": user_name,
+                "OS": info.get("OS", ""),
+                "ブラウザ情報状況": browser_status,
+                "顔写真状況": face_status,
+                "拡張機能数": extension_count if extension_count else 0,
+                "ブラウザ情報実行日時": browser_time_str,
+                "顔写真実行日時": face_time_str,
+                "提出状況": status_summary
+            })
+        else:
+            summary_data.append({
+                "PC名": pc_name,
+                "使用者": user_name,
+                "OS": info.get("OS", ""),
+                "ブラウザ情報状況": "未提出",
+                "顔写真状況": "未提出",
+                "拡張機能数": 0,
+                "ブラウザ情報実行日時": "",
+                "顔写真実行日時": "",
+                "提出状況": "未完了"
+            })
+    return pd.DataFrame(summary_data)
+
+def history_from_csv():
+    """CSVの実行履歴（空欄は NaN）"""
+    return pd.read_csv(io.StringIO(HISTORY_CSV), encoding="utf-8")
+
+def history_from_sqlite():
+    """SQLiteの実行履歴（空欄は空文字、拡張機能数は文字列と数値が混在）"""
+    history_df = pd.read_csv(io.StringIO(HISTORY_CSV), dtype=str, keep_default_na=False)
+    history_df["拡張機能数"] = [int(v) if v else "" for v in history_df["拡張機能数"]]
+    return history_df
+
+@pytest.mark.parametrize("load_history", [history_from_csv, history_from_sqlite])
+def test_execution_summary_matches_baseline(tmp_path, monkeypatch, load_history):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(CompareDeviceLogs, "EXECUTION_SUMMARY", "実行サマリー.csv")
+    history_df = load_history()
+
+    CompareDeviceLogs.create_execution_summary(history_df, REGISTRY, now=NOW)
+    baseline_execution_summary(history_df, REGISTRY, NOW).to_csv("baseline.csv", index=False, encoding="utf-8")
+    with open("実行サマリー.csv", encoding="utf-8") as f, open("baseline.csv", encoding="utf-8") as g:
+        assert f.read() == g.read()
+
+def test_execution_summary_empty_history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(CompareDeviceLogs, "EXECUTION_SUMMARY", "実行サマリー.csv")
+    history_df = history_from_csv().iloc[0:0]
+
+    summary_df = CompareDeviceLogs.create_execution_summary(history_df, REGISTRY, now=NOW)
+    expected = baseline_execution_summary(history_df, REGISTRY, NOW)
+    assert summary_df.to_csv(index=False) == expected.to_csv(index=False)
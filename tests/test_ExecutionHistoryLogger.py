@@ -0,0 +1,34 @@
+import os
+import ExecutionHistoryLogger
+from execution_history import HISTORY_COLUMNS
+
+def test_report_stages_create_reports_folder_together(fleet):
+    # 総合レポートと部署別・OS別の総合レポートは同時に実行され、どちらも定期レポートのフォルダを作成する
+    assert not os.path.exists(ExecutionHistoryLogger.REPORTS_FOLDER)
+    args = ExecutionHistoryLogger.parse_args(["--no-lock", "report", "--by", "department", "--by", "os"])
+    assert ExecutionHistoryLogger.run_batch(args) == ExecutionHistoryLogger.EXIT_OK
+
+    reports_path = os.path.join(ExecutionHistoryLogger.REPORTS_FOLDER, "定期レポート")
+    names = os.listdir(reports_path)
+    assert any(name.startswith("ブラウザ情報収集_総合レポート_2") for name in names)
+    assert any(name.startswith("ブラウザ情報収集_総合レポート_分割一覧_") for name in names)
+    assert os.listdir(os.path.join(reports_path, "部署別"))
+    assert os.listdir(os.path.join(reports_path, "OS別"))
+
+def test_trends_report_skipped_for_empty_history(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ExecutionHistoryLogger, "HISTORY_BACKEND", "csv")
+    with open(ExecutionHistoryLogger.HISTORY_CSV, "w", encoding="utf-8") as f:
+        f.write(",".join(HISTORY_COLUMNS) + "\n")
+    assert ExecutionHistoryLogger.create_execution_trends_report("svg", by_department=False) is None
+    assert "[スキップ] 実行傾向レポート" in capsys.readouterr().out
+    assert os.listdir(ExecutionHistoryLogger.REPORTS_FOLDER) == []
+
+def test_trends_report_reads_csv_without_creating_database(fleet, monkeypatch):
+    import CompareDeviceLogs
+    os.remove(ExecutionHistoryLogger.HISTORY_DB)
+    assert os.path.exists(ExecutionHistoryLogger.HISTORY_CSV)
+    assert ExecutionHistoryLogger.create_execution_trends_report("svg", by_department=False) is not None
+    assert not os.path.exists(ExecutionHistoryLogger.HISTORY_DB)
+    assert len(CompareDeviceLogs.get_execution_history()) == 40
+    assert not os.path.exists(CompareDeviceLogs.HISTORY_DB)
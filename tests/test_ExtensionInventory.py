@@ -0,0 +1,32 @@
+import os
+import json
+import ExtensionInventory
+
+def write_log(filename, extensions):
+    with open(os.path.join("logs", filename), "w", encoding="utf-8") as f:
+        json.dump([{"browser": "Chrome", "profile": "Default", "extensions": extensions}], f)
+
+def test_update_uses_registry_pc_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ExtensionInventory, "DEVICE_REGISTRY", "端末台帳.csv")
+    with open("端末台帳.csv", "w", encoding="utf-8") as f:
+        f.write("PC名,使用者\nPC_A01,user1\nPC002,user2\n")
+    os.makedirs("logs")
+    write_log("PC_A01_user1_2026-10-01_120000.json", [{"id": "abc", "version": "1.0", "name": "A"}])
+    write_log("PC002_user2_2026-10-01_120000.json", [{"id": "abc", "version": "2.0", "name": "A"}])
+
+    conn = ExtensionInventory.open_inventory(":memory:")
+    try:
+        pc_names = ExtensionInventory.load_registry_names()
+        assert ExtensionInventory.update_inventory(conn, "logs", workers=1, pc_names=pc_names) == 2
+        assert conn.execute("SELECT pc_name, user_name FROM sources ORDER BY pc_name").fetchall() == [
+            ("PC002", "user2"), ("PC_A01", "user1")]
+        assert [row[3] for row in ExtensionInventory.query_extension(conn, "abc", "1.0")] == ["PC_A01"]
+    finally:
+        conn.close()
+
+def test_registry_names_none_without_registry(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ExtensionInventory, "DEVICE_REGISTRY", "端末台帳.csv")
+    assert ExtensionInventory.load_registry_names() is None
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,81 @@
+import os
+import json
+import archiver
+
+def touch(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def pairs(name):
+    """ログと集計サマリーの (元のパス, 移動先のパス)"""
+    return [[os.path.join("logs", "2026-07", name + ".json"), os.path.join("archives", "2026-07", name + ".json")],
+            [os.path.join("logs", "2026-07", name + ".summary.json"),
+             os.path.join("archives", "2026-07", name + ".summary.json")]]
+
+def test_archive_resumes_from_half_written_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journal_path = archiver.get_journal_path("archives", "journal")
+    names = ["PC001_user1_2026-07-01_120000", "PC002_user2_2026-07-01_120000",
+             "PC003_user3_2026-07-01_120000", "PC004_user4_2026-07-01_120000"]
+    done, half_moved, planned, cut_off = names
+
+    # 完了済み（元の場所に残っていても移動しない）
+    touch(pairs(done)[0][0])
+    # ログだけ移動済みで集計サマリーが残っている
+    touch(pairs(half_moved)[0][1], b"log")
+    touch(pairs(half_moved)[1][0], b"summary")
+    # 未着手（コピーの途中で中断した一時ファイルが残っている）
+    touch(pairs(planned)[0][0], b"log")
+    touch(pairs(planned)[1][0], b"summary")
+    touch(pairs(planned)[0][1] + archiver.PARTIAL_SUFFIX, b"l")
+    # 計画の行を書き込む途中で中断
+    touch(pairs(cut_off)[0][0])
+
+    os.makedirs("journal")
+    with open(journal_path, "w", encoding="utf-8") as f:
+        for name in (done, half_moved, planned):
+            f.write(json.dumps({"event": "plan", "filename": name, "pairs": pairs(name)}) + "\n")
+        f.write(json.dumps({"event": "done", "filename": done}) + "\n")
+        f.write(json.dumps({"event": "plan", "filename": cut_off, "pairs": pairs(cut_off)})[:40])
+
+    # 今回の対象にも前回の未完了分が含まれる（1回だけ移動する）
+    src, dst = pairs(planned)[0]
+    catalog = {"archive_root": "archives", "files": [], "archive_candidates": [
+        {"filename": planned, "original_path": src, "archive_path": dst, "format": None}]}
+    stats = archiver.archive_catalog(catalog, workers=2, journal_dir="journal")
+
+    assert stats["resumed"] == 2
+    assert (stats["files"], stats["failed"]) == (2, 0)
+    assert os.path.exists(pairs(done)[0][0])
+    assert os.path.exists(pairs(cut_off)[0][0])
+    for name in (half_moved, planned):
+        for src, dst in pairs(name):
+            assert not os.path.exists(src)
+            assert os.path.exists(dst)
+    with open(pairs(planned)[0][1], "rb") as f:
+        assert f.read() == b"log"
+    assert not os.path.exists(journal_path)
+
+def test_failed_task_kept_in_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    name = "PC001_user1_2026-07-01_120000"
+    (src, dst), _ = pairs(name)
+    touch(src)
+    catalog = {"archive_root": "archives", "files": [], "archive_candidates": [
+        {"filename": name, "original_path": src, "archive_path": dst, "format": None}]}
+
+    move_file = archiver.move_file
+    def fail(src, dst):
+        raise OSError("中断")
+    monkeypatch.setattr(archiver, "move_file", fail)
+    assert archiver.archive_catalog(catalog, journal_dir="journal")["failed"] == 1
+    journal_path = archiver.get_journal_path("archives", "journal")
+    assert [task["filename"] for task in archiver.load_journal(journal_path)] == [name]
+
+    # 次回は今回の対象がなくても、ジャーナルから再開する
+    monkeypatch.setattr(archiver, "move_file", move_file)
+    stats = archiver.archive_catalog(dict(catalog, archive_candidates=[]), journal_dir="journal")
+    assert (stats["resumed"], stats["files"], stats["failed"]) == (1, 1, 0)
+    assert os.path.exists(dst) and not os.path.exists(src)
+    assert not os.path.exists(journal_path)
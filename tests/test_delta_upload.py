@@ -0,0 +1,24 @@
+import os
+import delta_upload
+
+PROFILES = [{"browser": "chrome", "profile": "Default", "user_name": "", "gaia_name": "",
+             "extensions": [{"id": "a", "version": "1"}]}]
+
+def test_pending_state_is_confirmed_only_after_delivery(tmp_path):
+    state_path = str(tmp_path / delta_upload.STATE_FILE_NAME)
+    pending_path = str(tmp_path / delta_upload.PENDING_FILE_NAME)
+    kind, _, inventory, digest = delta_upload.plan_upload(PROFILES, None, "2026-10-01 09:00:00")
+    assert kind == "full"
+    delta_upload.save_pending_state(inventory, digest, "2026-10-01 09:00:00", "2026-10/log.json", pending_path)
+
+    # 共有フォルダへ届くまでは送信状態を確定せず、次回は全件を送る
+    delivered = set()
+    assert not delta_upload.confirm_pending_state(lambda log: log in delivered, state_path, pending_path)
+    assert delta_upload.load_upload_state(state_path) is None
+
+    delivered.add("2026-10/log.json")
+    assert delta_upload.confirm_pending_state(lambda log: log in delivered, state_path, pending_path)
+    assert not os.path.exists(pending_path)
+    state = delta_upload.load_upload_state(state_path)
+    assert state["hash"] == digest
+    assert delta_upload.plan_upload(PROFILES, state, "2026-10-02 09:00:00")[0] == "heartbeat"
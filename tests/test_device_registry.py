@@ -0,0 +1,55 @@
+import os
+import device_registry
+
+def write_registry(path, text, mtime_ns):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def spy_parse(monkeypatch):
+    parsed = []
+    parse_registry_csv = device_registry.parse_registry_csv
+    def spy(csv_path):
+        parsed.append(csv_path)
+        return parse_registry_csv(csv_path)
+    monkeypatch.setattr(device_registry, "parse_registry_csv", spy)
+    return parsed
+
+def test_cache_reused_until_registry_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parsed = spy_parse(monkeypatch)
+    mtime_ns = 1_790_000_000_000_000_000
+    write_registry("端末台帳.csv", "PC名,使用者\nPC001,user1\n", mtime_ns)
+
+    assert device_registry.load_device_registry("端末台帳.csv")["PC001"]["使用者"] == "user1"
+    assert device_registry.load_device_registry("端末台帳.csv")["PC001"]["使用者"] == "user1"
+    assert len(parsed) == 1
+
+    # 同じサイズで更新日時だけが異なる場合は読み込み直す
+    write_registry("端末台帳.csv", "PC名,使用者\nPC001,user2\n", mtime_ns + 1)
+    assert device_registry.load_device_registry("端末台帳.csv")["PC001"]["使用者"] == "user2"
+    assert len(parsed) == 2
+
+    # 更新日時が同じでサイズが異なる場合も読み込み直す
+    write_registry("端末台帳.csv", "PC名,使用者\nPC001,user3\nPC002,user4\n", mtime_ns + 1)
+    registry = device_registry.load_device_registry("端末台帳.csv")
+    assert [(pc_name, record["使用者"]) for pc_name, record in registry.items()] == [
+        ("PC001", "user3"), ("PC002", "user4")]
+    assert len(parsed) == 3
+
+    assert device_registry.load_device_registry("端末台帳.csv")["PC002"]["使用者"] == "user4"
+    assert len(parsed) == 3
+
+def test_broken_cache_is_rebuilt(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    parsed = spy_parse(monkeypatch)
+    write_registry("端末台帳.csv", "PC名,使用者\nPC001,user1\n", 1_790_000_000_000_000_000)
+    device_registry.load_device_registry("端末台帳.csv")
+
+    with open(device_registry.get_cache_path("端末台帳.csv"), "wb") as f:
+        f.write(b"broken")
+    assert device_registry.load_device_registry("端末台帳.csv")["PC001"]["使用者"] == "user1"
+    assert len(parsed) == 2
+    assert "[警告] 台帳キャッシュを読み込めませんでした" in capsys.readouterr().out
+    assert device_registry.load_device_registry("端末台帳.csv")["PC001"]["使用者"] == "user1"
+    assert len(parsed) == 2
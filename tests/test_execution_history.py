@@ -0,0 +1,38 @@
+import os
+from execution_history import CsvHistoryStore, SqliteHistoryStore, open_history_store
+
+UPDATES = [
+    {"PC名": "PC001", "使用者": "user1", "ブラウザ情報実行日時": "2026-09-01 10:00:00", "顔写真実行日時": "2026-10-02 10:00:00", "拡張機能数": 3},
+    {"PC名": "PC002", "使用者": "user2", "ブラウザ情報実行日時": "2026/10/05 10:00:00", "顔写真実行日時": "不明", "拡張機能数": 1},
+    {"PC名": "PC003", "使用者": "user3", "ブラウザ情報実行日時": "未実行", "顔写真実行日時": "", "拡張機能数": 0}
+]
+
+def test_monthly_counts_match_between_backends(tmp_path):
+    csv_store = CsvHistoryStore(str(tmp_path / "history.csv"))
+    sqlite_store = SqliteHistoryStore(str(tmp_path / "history.db"))
+    for store in (csv_store, sqlite_store):
+        store.record(UPDATES, now="2026-10-17 12:00:00")
+
+    expected = [("PC001", "browser", "2026-09", 1), ("PC001", "photo", "2026-10", 1), ("PC002", "browser", "2026-10", 1)]
+    assert sorted(csv_store.monthly_counts_by_pc()) == expected
+    assert sorted(sqlite_store.monthly_counts_by_pc()) == expected
+    for kind in ("browser", "photo"):
+        assert sqlite_store.monthly_counts(kind).to_dict() == csv_store.monthly_counts(kind).to_dict()
+    sqlite_store.conn.close()
+
+def test_read_only_open_does_not_create_database(tmp_path):
+    csv_path = str(tmp_path / "history.csv")
+    db_path = str(tmp_path / "history.db")
+    CsvHistoryStore(csv_path).record(UPDATES, now="2026-10-17 12:00:00")
+
+    store = open_history_store("sqlite", csv_path, db_path, read_only=True)
+    assert sorted(store.latest_per_pc()["PC名"]) == ["PC001", "PC002", "PC003"]
+    store.close()
+    assert not os.path.exists(db_path)
+
+    # 書き込む側で開いたときに取り込み、以降は読み込みでもデータベースを使う
+    open_history_store("sqlite", csv_path, db_path).close()
+    store = open_history_store("sqlite", csv_path, db_path, read_only=True)
+    assert isinstance(store, SqliteHistoryStore)
+    assert len(store.latest_per_pc()) == 3
+    store.close()
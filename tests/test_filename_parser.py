@@ -0,0 +1,64 @@
+from datetime import datetime
+import pytest
+from filename_parser import parse_name, diagnose, resolve_pc_name, tally_unparseable, ParsedName
+
+MAY_1 = datetime(2024, 5, 1, 12, 0, 0)
+
+@pytest.mark.parametrize("filename, expected", [
+    ("PC001_user1_2024-05-01_120000.json", ("PC001", "user1", "full", "json")),
+    ("PC001_user1_2024-05-01_120000.jsonl.gz", ("PC001", "user1", "full", "jsonl.gz")),
+    ("PC001_user1_2024-05-01_120000.jsonl.zst", ("PC001", "user1", "full", "jsonl.zst")),
+    ("PC001_user1_2024-05-01_120000.col.json", ("PC001", "user1", "full", "columnar")),
+    ("PC001_user1_2024-05-01_120000.delta.json", ("PC001", "user1", "delta", "json")),
+    ("PC001_user1_2024-05-01_120000.delta.jsonl.gz", ("PC001", "user1", "delta", "jsonl.gz")),
+    ("PC001_user1_2024-05-01_120000.heartbeat.json", ("PC001", "user1", "heartbeat", "json")),
+    ("PC001_user1_2024-05-01_120000.summary.json", ("PC001", "user1", "summary", "json")),
+    ("PC001_user1_20240501_120000.jpg", ("PC001", "user1", "full", None)),
+    # 使用者名のアンダースコアは使用者名に含める
+    ("PC001_taro_yamada_2024-05-01_120000.json", ("PC001", "taro_yamada", "full", "json")),
+    # PC名のアンダースコアは最初の区切りで切る（台帳による分け直しは resolve_pc_name）
+    ("PC_A01_user1_2024-05-01_120000.delta.json", ("PC", "A01_user1", "delta", "json")),
+    ("PC_A01_user1_20240501_120000.jpg", ("PC", "A01_user1", "full", None)),
+])
+def test_parse_name(filename, expected):
+    pc_name, user_name, kind, fmt = expected
+    assert parse_name(filename) == ParsedName(pc_name, user_name, MAY_1, kind, fmt)
+
+@pytest.mark.parametrize("filename, reason", [
+    ("PC001_user1_2024-05-01_120000.txt", "extension"),
+    ("PC001_user1_2024-05-01_120000.summary.jsonl.gz", "extension"),
+    ("PC001_user1_20240501_120000.delta.jpg", "extension"),
+    ("PC001_user1_2024-05-01_1200.json", "timestamp"),
+    ("PC001_user1_2024-05-01-120000.json", "timestamp"),
+    ("PC001_user1_20240501_120000.json", "timestamp"),
+    ("PC001_user1_2024-05-01_120000.jpg", "timestamp"),
+    ("PC001_user1_2024-05-01_120000.backup.json", "timestamp"),
+    ("PC001_user1_2024-02-30_120000.json", "date"),
+    ("PC001_user1_2024-05-01_250000.json", "date"),
+    ("PC001_2024-05-01_120000.json", "owner"),
+    ("_user1_2024-05-01_120000.json", "owner"),
+    ("_2024-05-01_120000.json", "owner"),
+    ("2024-05-01_120000.json", "timestamp"),
+    ("", "extension"),
+])
+def test_malformed_names(filename, reason):
+    assert parse_name(filename) is None
+    assert diagnose(filename) == (None, reason)
+
+def test_tally_unparseable():
+    tally = tally_unparseable(["PC001_user1_2024-05-01_120000.json", "notes.txt", "PC001_2024-05-01_120000.json",
+                               "PC001_user1_2024-02-30_120000.json", "PC002_2024-05-01_120000.json"])
+    assert tally == {"extension": 1, "owner": 2, "date": 1}
+
+@pytest.mark.parametrize("pc_name, user_name, expected", [
+    ("PC", "A01_user1", ("PC_A01", "user1")),
+    ("PC", "A01_taro_yamada", ("PC_A01", "taro_yamada")),
+    # 一致するものが複数ある場合は長い方
+    ("PC", "A01_B_user1", ("PC_A01_B", "user1")),
+    # 台帳にない場合・PC名と使用者名だけの場合はそのまま
+    ("PC", "Z99_user1", ("PC", "Z99_user1")),
+    ("PC", "A01", ("PC", "A01")),
+    ("PC001", "user1", ("PC001", "user1")),
+])
+def test_resolve_pc_name(pc_name, user_name, expected):
+    assert resolve_pc_name(pc_name, user_name, {"PC_A01", "PC_A01_B"}) == expected
@@ -0,0 +1,31 @@
+import os
+import log_delta
+
+def touch(*parts):
+    open(os.path.join(*parts), "w").close()
+    return parts[-1]
+
+def test_pc_logs_rescanned_only_for_unknown_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(log_delta, "_folder_logs", {})
+    scans = []
+    scan_folder = log_delta.scan_folder
+    def spy(*args, **kwargs):
+        scans.append(args[0])
+        return scan_folder(*args, **kwargs)
+    monkeypatch.setattr(log_delta, "scan_folder", spy)
+
+    os.makedirs(os.path.join("logs", "2026-09"))
+    full = touch("logs", "2026-09", "PC001_user1_2026-09-01_120000.json")
+    delta = touch("logs", "2026-09", "PC001_user1_2026-09-20_120000.delta.json")
+    assert [e["kind"] for e in log_delta.get_pc_logs("logs", "PC001", delta)] == ["full", "delta"]
+    assert [e["kind"] for e in log_delta.get_pc_logs("logs", "PC001", full)] == ["full", "delta"]
+    assert len(scans) == 1
+
+    # 一覧の後に届いたログを求められた場合だけ一覧し直す
+    os.makedirs(os.path.join("logs", "2026-10"))
+    heartbeat = touch("logs", "2026-10", "PC001_user1_2026-10-01_120000.heartbeat.json")
+    logs = log_delta.get_pc_logs(os.path.join("logs", "2026-10"), "PC001", heartbeat)
+    assert [e["kind"] for e in logs] == ["full", "delta", "heartbeat"]
+    assert log_delta.get_pc_logs("logs", "PC001", delta) == logs
+    assert len(scans) == 2
@@ -0,0 +1,75 @@
+import io
+import json
+import pytest
+from log_stream import JsonStreamReader, iter_extension_records
+
+class CountingReader(io.StringIO):
+    """読み込んだ文字数を数える"""
+    chars_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.chars_read += len(chunk)
+        return chunk
+
+def profiles(count, name="プロファイル"):
+    return [{
+        "browser": "Chrome",
+        "profile": f"{name} {i}",
+        "user_name": "山田 太郎",
+        "extensions": [{"id": f"ext{i}{j}", "name": f"拡張機能 \u2603 {j}", "version": f"1.{j}",
+                        "permissions": ["tabs", {"hosts": ["<all_urls>"], "nested": [[1, 2.5e-3], None]}]}
+                       for j in range(i % 4)]
+    } for i in range(count)]
+
+DOCUMENTS = {
+    "valid": profiles(30),
+    "nested": {"a": [{"b": [[[{"c": -12.5e10}]]], "d": True, "e": False, "f": None}], "g": ""},
+    "unicode": ["日本語", "絵文字 🍣", "エスケープ \" \\ \n \t", "\u0000"],
+    "numbers": [0, -0.0, 123456789012345678901234567890, 1e308, -1.5e-7]
+}
+
+@pytest.mark.parametrize("name", sorted(DOCUMENTS))
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_value_matches_json_load(name, chunk_size):
+    text = json.dumps(DOCUMENTS[name], ensure_ascii=name != "unicode", indent=1)
+    assert JsonStreamReader(io.StringIO(text), chunk_size=chunk_size).value() == json.load(io.StringIO(text))
+
+def test_extension_records_match_json_load(tmp_path):
+    path = tmp_path / "PC001_user_2026-10-01_120000.json"
+    path.write_text(json.dumps(DOCUMENTS["valid"], ensure_ascii=False, indent=2), encoding="utf-8")
+    with open(path, encoding="utf-8") as f:
+        expected = [({k: v for k, v in p.items() if k != "extensions"}, ext) for p in json.load(f) for ext in p["extensions"]]
+    assert [(dict(profile), ext) for profile, ext in iter_extension_records(str(path))] == expected
+
+@pytest.mark.parametrize("text", [
+    '{"a": tru, "b": 1}',
+    '{"a" 1}',
+    '[1, 2,, 3]',
+    '{"a": [1, 2}',
+    '{"a": "\\x"}',
+    '{"a": "閉じていない文字列',
+    '[{"a": 1}, {"b": ',
+])
+def test_malformed_and_truncated_raise_like_json_load(text):
+    with pytest.raises(ValueError):
+        json.load(io.StringIO(text))
+    with pytest.raises(ValueError):
+        JsonStreamReader(io.StringIO(text), chunk_size=4).value()
+
+def test_malformed_value_stops_before_end_of_file():
+    text = '[{"a": tru}, ' + ", ".join(["1"] * 200000) + "]"
+    f = CountingReader(text)
+    reader = JsonStreamReader(f, chunk_size=64)
+    reader.expect("[")
+    with pytest.raises(json.JSONDecodeError):
+        reader.value()
+    assert f.chars_read <= 256
+
+def test_unterminated_value_is_capped():
+    f = CountingReader('["' + "x" * 100000)
+    reader = JsonStreamReader(f, chunk_size=64, max_value_size=1024)
+    reader.expect("[")
+    with pytest.raises(json.JSONDecodeError, match="1024"):
+        reader.value()
+    assert f.chars_read <= 4 * 1024
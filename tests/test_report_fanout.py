@@ -0,0 +1,79 @@
+import os
+from datetime import datetime, timedelta
+from device_registry import DeviceRegistry
+from submission_catalog import catalog_folder
+import report_fanout
+
+def make_registry(pcs):
+    return DeviceRegistry({
+        "pc_name": [f"PC{i:03d}" for i in range(pcs)],
+        "user_name": [f"user{i:03d}" for i in range(pcs)],
+        "os": ["Windows 11" if i % 3 else "Windows 10" for i in range(pcs)],
+        "department": [f"部署{i % 7}" for i in range(pcs)],
+        "acquired_at": ["" for _ in range(pcs)]
+    })
+
+def make_catalogs(pcs, now):
+    catalogs = {}
+    for kind, step in (("browser", 1), ("photo", 2)):
+        files = []
+        latest = {}
+        for i in range(0, pcs, step):
+            for days in (5, 40):
+                timestamp = now - timedelta(days=days + i % 11)
+                files.append({"pc_name": f"PC{i:03d}", "year_month": timestamp.strftime("%Y-%m")})
+                latest[f"PC{i:03d}"] = max(latest.get(f"PC{i:03d}", timestamp), timestamp)
+        catalogs[kind] = {"files": files, "latest": latest}
+    return catalogs
+
+def read_outputs(results):
+    return {key: (open(path, encoding="utf-8").read(), stats) for key, path, stats in results}
+
+def test_process_pool_matches_in_process(tmp_path, monkeypatch):
+    pools = []
+    process_pool = report_fanout.ProcessPoolExecutor
+    def spy(*args, **kwargs):
+        pools.append(kwargs["max_workers"])
+        return process_pool(*args, **kwargs)
+    monkeypatch.setattr(report_fanout, "ProcessPoolExecutor", spy)
+
+    now = datetime(2026, 10, 17, 12, 0, 0)
+    pcs = 60
+    statuses = [(f"PC{i:03d}", ("完了", "一部完了", "未完了")[i % 3]) for i in range(pcs)]
+    partitions = report_fanout.build_partitions(statuses, make_catalogs(pcs, now), make_registry(pcs),
+                                                ["department", "os"])
+    assert len(partitions) == 9
+
+    in_process = report_fanout.render_partitions(partitions, str(tmp_path / "serial"), now, workers=1)
+    assert pools == []
+    pooled = report_fanout.render_partitions(partitions, str(tmp_path / "pool"), now, workers=2)
+    assert pools == [2]
+
+    assert [key for key, _, _ in pooled] == [key for key, _, _ in in_process]
+    assert read_outputs(pooled) == read_outputs(in_process)
+    for (_, serial_path, _), (_, pool_path, _) in zip(in_process, pooled):
+        serial_csv = open(os.path.splitext(serial_path)[0] + ".csv", encoding="utf-8").read()
+        assert open(os.path.splitext(pool_path)[0] + ".csv", encoding="utf-8").read() == serial_csv
+
+def test_underscored_pc_names_follow_registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("logs")
+    for filename in ("PC_A01_user1_2026-10-01_120000.json", "PC_A01_user1_2026-10-10_120000.json",
+                     "PC002_user2_2026-10-05_120000.json"):
+        open(os.path.join("logs", filename), "w").close()
+    registry = DeviceRegistry({
+        "pc_name": ["PC_A01", "PC002"],
+        "user_name": ["user1", "user2"],
+        "os": ["Windows 11", "Windows 11"],
+        "department": ["営業部", "総務部"],
+        "acquired_at": ["", ""]
+    })
+    now = datetime(2026, 10, 17, 12, 0, 0)
+    catalog = catalog_folder("logs", ".json", "archives", now=now, pc_names=registry.keys())
+    assert sorted(catalog["latest"]) == ["PC002", "PC_A01"]
+    assert {(info["pc_name"], info["user_name"]) for info in catalog["files"]} == {("PC_A01", "user1"), ("PC002", "user2")}
+
+    empty = {"files": [], "latest": {}}
+    partitions = report_fanout.build_partitions([], {"browser": catalog, "photo": empty}, registry, ["department"])
+    assert partitions[("部署", "営業部")]["browser_files"] == 2
+    assert list(partitions[("部署", "営業部")]["latest"]) == ["PC_A01"]
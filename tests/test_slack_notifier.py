@@ -0,0 +1,93 @@
+import json
+import time
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import slack_notifier
+
+class Response:
+    def __init__(self, retry_after):
+        self.headers = {"Retry-After": retry_after}
+
+def test_retry_delay_is_capped():
+    notifier = slack_notifier.SlackNotifier("", backoff=10)
+    assert notifier.retry_delay(0, Response("5")) == 5
+    assert notifier.retry_delay(0, Response("86400")) == slack_notifier.MAX_BACKOFF_SECONDS
+    assert notifier.retry_delay(10) <= slack_notifier.MAX_BACKOFF_SECONDS
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """ローカルの Webhook（replies に (ステータスコード, ヘッダー, 応答までの秒数) を順に積むと、その順に応答する）"""
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    received = []
+    replies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(json.loads(body)["text"])
+            status, headers, delay = replies.pop(0) if replies else (200, {}, 0)
+            time.sleep(delay)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hook", received, replies
+    server.shutdown()
+    server.server_close()
+
+def test_retry_after_is_honoured_before_success(webhook, monkeypatch):
+    url, received, replies = webhook
+    sleeps = []
+    monkeypatch.setattr(slack_notifier, "time", SimpleNamespace(sleep=sleeps.append, time=time.time))
+    replies.append((429, {"Retry-After": "2"}, 0))
+    with slack_notifier.SlackNotifier(url, backoff=10) as notifier:
+        assert notifier.post("テスト") is True
+    assert received == ["テスト", "テスト"]
+    assert sleeps == [2.0]
+
+def test_timeout_is_retried_then_reported(webhook, monkeypatch):
+    url, received, replies = webhook
+    monkeypatch.setattr(slack_notifier, "time", SimpleNamespace(sleep=lambda seconds: None, time=time.time))
+    replies.extend([(200, {}, 0.5), (200, {}, 0.5)])
+    notifier = slack_notifier.SlackNotifier(url, read_timeout=0.1, max_retries=1)
+    started = time.time()
+    assert notifier.post("テスト") is False
+    assert time.time() - started < 0.9
+    assert len(received) == 2
+    notifier.close()
+
+def test_one_post_per_flushed_batch(webhook):
+    url, received, _ = webhook
+    notifier = slack_notifier.SlackNotifier(url, batch=True)
+    for pc_name in ("PC001", "PC002", "PC001"):
+        notifier.send(f"・{pc_name}")
+    assert received == []
+    assert notifier.flush(header="📥 新規提出 3台") is True
+    notifier.close()
+    assert received == ["📥 新規提出 3台\n・PC001（×2）\n・PC002"]
+
+def test_pending_batch_is_sent_when_the_run_fails(fleet, monkeypatch):
+    import CompareDeviceLogs
+    posted = []
+    monkeypatch.setattr(slack_notifier.SlackNotifier, "post", lambda self, message: posted.append(message) or True)
+    def update_history(registry, browser_logs, face_photos, extension_counts, notifier=None):
+        notifier.send("・PC001（user001）拡張機能 3件")
+    def fail(*args):
+        raise RuntimeError("実行サマリーの作成に失敗")
+    monkeypatch.setattr(CompareDeviceLogs, "update_history", update_history)
+    monkeypatch.setattr(CompareDeviceLogs, "create_execution_summary", fail)
+    with pytest.raises(RuntimeError):
+        CompareDeviceLogs.main([])
+    assert posted == ["📥 新規提出 1台\n・PC001（user001）拡張機能 3件"]